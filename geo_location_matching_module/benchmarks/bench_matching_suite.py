@@ -0,0 +1,142 @@
+"""
+Reproducible end-to-end benchmark of FuzzyMatcher on synthetic data (see synthetic_data.py).
+
+For every size, in a fresh process so that peak memory is that of the size alone:
+- match() in process: throughput, wall/CPU time, rows and scorer calls of every stage (process()
+  is the 'clean' stage) and peak RSS (of the process and, with --n_jobs > 1, of its largest
+  worker), from FuzzyMatcher.profile();
+- precision and recall against the generator's ground truth, so that speed work cannot lower
+  match quality unnoticed;
+- the run_fuzzy_matching.py CLI end to end (reading and writing files included), with its wall
+  time and peak RSS.
+
+Results are printed as a table and written as JSON, one record per size. input_mb is the
+in-memory size of the generated frames, to compare peak RSS against (e.g. with --compact).
+
+Usage:
+    python bench_matching_suite.py --sizes 10000 100000 --output bench_results.json
+    python bench_matching_suite.py --sizes 1000000 5000000 --skip_cli --compact
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+MODULE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'geo_location_matching_module')
+sys.path.insert(0, MODULE_DIR)
+from fuzzy_matching_module import FuzzyMatcher  # noqa: E402
+from synthetic_data import CUSTOMER_COLUMNS, UNMATCHED_COLUMNS, generate, precision_recall  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 5_000_000)
+
+
+def bench_match(n_rows, seed, matcher_kwargs):
+    """
+    Generate n_rows pairs and time match() on them. Runs in its own process.
+    """
+    logging.getLogger().setLevel(logging.ERROR)
+    start = time.perf_counter()
+    customers, unmatched = generate(n_rows, seed=seed)
+    generate_s = time.perf_counter() - start
+    input_mb = (customers.memory_usage(deep=True).sum() + unmatched.memory_usage(deep=True).sum()) / 1024 ** 2
+
+    # The compact mode leaves its inputs untouched; the default mode cleans them in place
+    df2 = unmatched if matcher_kwargs.get('compact') else unmatched.copy()
+    matcher = FuzzyMatcher(customers, df2, **CUSTOMER_COLUMNS, **UNMATCHED_COLUMNS, **matcher_kwargs)
+    result = matcher.match()
+    profile = matcher.profile()
+    match_s = profile['stages']['total']['wall_s']
+    return {
+        'rows': n_rows,
+        'generate_s': generate_s,
+        'match_s': match_s,
+        'rows_per_s': n_rows / match_s if match_s else None,
+        'input_mb': input_mb,
+        'peak_rss_mb': profile['peak_rss_mb'],
+        'peak_rss_children_mb': profile['peak_rss_children_mb'],
+        'quality': precision_recall(result, unmatched),
+        'stages': profile['stages'],
+        'counters': profile['counters'],
+        'block_sizes_df1': profile.get('block_sizes_df1', {}),
+    }
+
+
+def bench_cli(n_rows, seed, matcher_kwargs, workdir):
+    """
+    Write n_rows pairs to workdir and time run_fuzzy_matching.py on them in a child process.
+    """
+    customers, unmatched = generate(n_rows, seed=seed)
+    customers_path = os.path.join(workdir, f'customers_{n_rows}.csv')
+    unmatched_path = os.path.join(workdir, f'unmatched_{n_rows}.csv')
+    results_path = os.path.join(workdir, f'matched_{n_rows}.csv')
+    customers.to_csv(customers_path, index=False)
+    unmatched.to_csv(unmatched_path, index=False)
+    del customers, unmatched
+
+    command = [
+        sys.executable, os.path.join(MODULE_DIR, 'run_fuzzy_matching.py'),
+        '--input_customers', customers_path, '--input_unmatched', unmatched_path,
+        '--output_path', workdir, '--matched_results', results_path,
+    ]
+    for key, column in {**CUSTOMER_COLUMNS, **UNMATCHED_COLUMNS}.items():
+        command += [f'--{key}', column]
+    for key, value in matcher_kwargs.items():
+        if value is True:
+            command.append(f'--{key}')
+        elif value is not None and value is not False:
+            command += [f'--{key}', str(value)]
+    start = time.perf_counter()
+    subprocess.run(command, check=True, cwd=MODULE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    seconds = time.perf_counter() - start
+    # The CLI reports its own peak memory in the stats sidecar of its results
+    with open(f'{results_path}.stats.json') as f:
+        cli_profile = json.load(f)
+    return {
+        'cli_s': seconds,
+        'cli_rows_per_s': n_rows / seconds,
+        'cli_peak_rss_mb': cli_profile['peak_rss_mb'],
+        'cli_peak_rss_children_mb': cli_profile['peak_rss_children_mb'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES[:2]))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threshold', type=int, default=90)
+    parser.add_argument('--radius_m', type=float, default=250)
+    parser.add_argument('--n_jobs', type=int, default=1)
+    parser.add_argument('--compact', action='store_true', default=False)
+    parser.add_argument('--skip_cli', action='store_true', default=False)
+    parser.add_argument('--output', type=str, default='bench_results.json')
+    args = parser.parse_args()
+
+    matcher_kwargs = dict(threshold=args.threshold, radius_m=args.radius_m, n_jobs=args.n_jobs, compact=args.compact)
+    records = []
+    print(f"{'rows':>9} {'match s':>9} {'rows/s':>9} {'input MB':>8} {'peak MB':>8} {'precision':>9} {'recall':>7} {'cli s':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in sorted(args.sizes):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                record = pool.submit(bench_match, n_rows, args.seed, matcher_kwargs).result()
+            if not args.skip_cli:
+                record.update(bench_cli(n_rows, args.seed, matcher_kwargs, workdir))
+            records.append(record)
+            quality = record['quality']
+            cli_s = f"{record['cli_s']:>8.1f}" if 'cli_s' in record else f"{'-':>8}"
+            print(f"{n_rows:>9} {record['match_s']:>9.2f} {record['rows_per_s']:>9.0f} {record['input_mb']:>8.0f} "
+                  f"{max(record['peak_rss_mb'] or 0, record['peak_rss_children_mb'] or 0):>8.0f} "
+                  f"{quality['precision']:>9.3f} {quality['recall']:>7.3f} {cli_s}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'seed': args.seed, 'settings': matcher_kwargs, 'runs': records},
+                  f, indent=2, default=float)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark how FuzzyMatcher.match scales with the number of postal-code blocks.
+
+Every block has the same number of customers and unmatched rows, so a matcher whose stages
+stay inside their postal block should take roughly constant time per block as blocks are added.
+
+Usage:
+    python bench_postal_block_scaling.py --blocks 100 200 400 800 --rows_per_block 20
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'geo_location_matching_module'))
+from fuzzy_matching_module import FuzzyMatcher  # noqa: E402
+
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'cafe', 'grill', 'bistro', 'diner', 'market', 'pizza', 'bakery', 'deli']
+STREETS = ['main st', 'oak ave', 'pine rd', 'elm st', 'maple dr', 'cedar ln']
+
+
+def make_data(n_blocks, rows_per_block, seed=0):
+    """
+    Build customer and unmatched frames with n_blocks postal codes of rows_per_block rows each.
+    Half of the unmatched rows are lightly perturbed copies of customers from their own postal
+    code; the other half have no counterpart and stay unmatched, as in real feeds.
+    """
+    rng = random.Random(seed)
+    customers, unmatched = [], []
+    for block in range(n_blocks):
+        postal_code = f"{10000 + block:05d}"
+        for row in range(rows_per_block):
+            name = ' '.join(rng.choice(WORDS) for _ in range(3))
+            address = f"{rng.randint(1, 9999)} {rng.choice(STREETS)}"
+            customers.append({
+                'CUSTOMER_ID': len(customers),
+                'POSTAL_CODE': postal_code,
+                'CUSTOMER_DESC': name,
+                'STREET_ADDRESS': address,
+            })
+            if row % 2:
+                name = f"unknown {rng.randint(0, 10 ** 6)}"
+                address = f"po box {rng.randint(0, 10 ** 6)}"
+            unmatched.append({
+                'POSTAL_CODE': postal_code,
+                'CUSTOMER_DESC': name[:-1] if rng.random() < 0.5 else name,
+                'STREET_ADDRESS_LINE_1': address,
+            })
+    return pd.DataFrame(customers), pd.DataFrame(unmatched)
+
+
+def run(n_blocks, rows_per_block):
+    """
+    Time a single match() run and return (seconds, matched rows).
+    """
+    df1, df2 = make_data(n_blocks, rows_per_block)
+    matcher = FuzzyMatcher(
+        df1, df2,
+        zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE',
+        name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+        address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1'
+    )
+    start = time.perf_counter()
+    result = matcher.match()
+    return time.perf_counter() - start, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--blocks', type=int, nargs='+', default=[100, 200, 400, 800])
+    parser.add_argument('--rows_per_block', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    print(f"{'blocks':>8} {'rows':>8} {'matched':>8} {'seconds':>10} {'ms/block':>10}")
+    for n_blocks in args.blocks:
+        seconds, n_matched = run(n_blocks, args.rows_per_block)
+        print(f"{n_blocks:>8} {n_blocks * args.rows_per_block:>8} {n_matched:>8} "
+              f"{seconds:>10.3f} {1000 * seconds / n_blocks:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Synthetic customer master / unmatched feed pairs with known ground truth, for benchmarks.
+
+The customer master has a skewed (Zipf-like) postal code distribution, so a few postal blocks
+are large and most are small, as in real data. The unmatched feed holds perturbed copies of
+customers (typos in names and addresses, case and abbreviation changes, jittered coordinates,
+missing fields) mixed with rows that have no counterpart. Its TRUE_CUSTOMER_ID column is the
+customer each row was copied from (missing for rows without a counterpart).
+
+Generation is vectorized apart from the typo injection, so 5M row pairs take seconds to minutes.
+
+Usage:
+    python synthetic_data.py --rows 100000 --customers customers.parquet --unmatched unmatched.parquet
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+NAME_WORDS = np.array([
+    'alpha', 'beta', 'gamma', 'delta', 'omega', 'sunrise', 'golden', 'silver', 'royal', 'lucky', 'happy',
+    'green', 'blue', 'red', 'star', 'city', 'valley', 'river', 'lake', 'mountain', 'ocean', 'harbor',
+    'corner', 'family', 'village', 'metro', 'east', 'west', 'north', 'south', 'central', 'pacific',
+    'cafe', 'grill', 'bistro', 'diner', 'market', 'pizza', 'bakery', 'deli', 'tavern', 'kitchen',
+    'liquor', 'pharmacy', 'grocery', 'foods', 'express', 'station', 'house', 'garden', 'taqueria',
+])
+NAME_SUFFIXES = np.array(['', '', '', ' inc', ' llc', ' co', ' & sons', ' #2'])
+STREETS = np.array([
+    'main street', 'oak avenue', 'pine road', 'elm street', 'maple drive', 'cedar lane', 'park boulevard',
+    'washington street', 'lake road', 'hill street', 'church street', 'market street', 'broadway',
+    'sunset boulevard', 'highland avenue', 'mill road', 'river road', 'center street',
+])
+# Abbreviations applied to copied addresses, as feeds rarely agree on them
+ABBREVIATIONS = (('street', 'st'), ('avenue', 'ave'), ('road', 'rd'), ('drive', 'dr'), ('lane', 'ln'),
+                 ('boulevard', 'blvd'))
+TYPO_ALPHABET = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+
+CUSTOMER_COLUMNS = dict(
+    zip_col1='POSTAL_CODE', name_col1='CUSTOMER_DESC', address_col1='STREET_ADDRESS',
+    lat_col1='LATITUDE_COORDINATE', long_col1='LONGITUDE_COORDINATE', id_col='CUSTOMER_ID',
+)
+UNMATCHED_COLUMNS = dict(
+    zip_col2='POSTAL_CODE', name_col2='CUSTOMER_DESC', address_col2='STREET_ADDRESS_LINE_1',
+    lat_col2='LATITUDE', long_col2='LONGITUDE',
+)
+TRUTH_COL = 'TRUE_CUSTOMER_ID'
+
+
+def _join(*parts):
+    """
+    Element-wise concatenation of string arrays (and scalars).
+    """
+    result = np.asarray(parts[0], dtype=object)
+    for part in parts[1:]:
+        result = result + np.asarray(part, dtype=object)
+    return result
+
+
+def _postal_codes(rng, n_postal_codes, size, skew):
+    """
+    Draw size postal code ranks from a Zipf-like distribution over n_postal_codes codes.
+    """
+    weights = 1 / np.arange(1, n_postal_codes + 1) ** skew
+    return rng.choice(n_postal_codes, size=size, p=weights / weights.sum())
+
+
+def _names(rng, size):
+    words = NAME_WORDS[rng.integers(len(NAME_WORDS), size=(3, size))]
+    return _join(words[0], ' ', words[1], ' ', words[2], NAME_SUFFIXES[rng.integers(len(NAME_SUFFIXES), size=size)])
+
+
+def _addresses(rng, size):
+    return _join(rng.integers(1, 10_000, size=size).astype(str), ' ', STREETS[rng.integers(len(STREETS), size=size)])
+
+
+def _typo(text, rng):
+    """
+    One random character deletion, substitution, insertion or transposition.
+    """
+    if len(text) < 2:
+        return text
+    position = int(rng.integers(len(text) - 1))
+    kind = rng.integers(4)
+    if kind == 0:
+        return text[:position] + text[position + 1:]
+    if kind == 1:
+        return text[:position] + rng.choice(TYPO_ALPHABET) + text[position + 1:]
+    if kind == 2:
+        return text[:position] + rng.choice(TYPO_ALPHABET) + text[position:]
+    return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+
+def _inject_typos(rng, values, rate):
+    """
+    Apply one or two typos to a share rate of values (in place).
+    """
+    for position in np.flatnonzero(rng.random(len(values)) < rate):
+        text = _typo(values[position], rng)
+        values[position] = _typo(text, rng) if rng.random() < 0.3 else text
+    return values
+
+
+def _blank(rng, values, rate, fill=None):
+    """
+    Replace a share rate of values by fill (in place).
+    """
+    values[rng.random(len(values)) < rate] = fill
+    return values
+
+
+def generate(n_rows, n_customers=None, match_rate=0.6, typo_rate=0.3, missing_rate=0.05, skew=1.1,
+             rows_per_postal_code=200, jitter_m=25, seed=0):
+    """
+    Generate a customer master and an unmatched feed with ground truth.
+
+    Parameters:
+    n_rows (int): Number of unmatched rows.
+    n_customers (int): Number of customers (default: n_rows).
+    match_rate (float): Share of unmatched rows that are copies of a customer.
+    typo_rate (float): Share of copied names and addresses that get typos.
+    missing_rate (float): Share of unmatched postal codes, addresses and coordinates left empty.
+    skew (float): Zipf exponent of the postal code distribution (0 is uniform).
+    rows_per_postal_code (int): Average number of customers per postal code.
+    jitter_m (float): Standard deviation of the coordinate jitter of copies, in meters.
+    seed (int): Random seed; equal arguments give equal frames.
+
+    Returns:
+    tuple: (customers, unmatched) DataFrames with the columns of CUSTOMER_COLUMNS and
+        UNMATCHED_COLUMNS, plus TRUTH_COL (nullable Int64) on unmatched.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = n_rows if n_customers is None else n_customers
+    n_postal_codes = max(1, n_customers // rows_per_postal_code)
+    postal_codes = rng.permutation(np.arange(10_000, 100_000))[:n_postal_codes].astype(str)
+    centroid_lat = rng.uniform(30, 45, size=n_postal_codes)
+    centroid_long = rng.uniform(-120, -75, size=n_postal_codes)
+
+    ranks = _postal_codes(rng, n_postal_codes, n_customers, skew)
+    customers = pd.DataFrame({
+        'CUSTOMER_ID': np.arange(n_customers, dtype=np.int64),
+        'POSTAL_CODE': postal_codes[ranks],
+        'CUSTOMER_DESC': _names(rng, n_customers),
+        'STREET_ADDRESS': _addresses(rng, n_customers),
+        'LATITUDE_COORDINATE': centroid_lat[ranks] + rng.normal(0, 0.02, size=n_customers),
+        'LONGITUDE_COORDINATE': centroid_long[ranks] + rng.normal(0, 0.02, size=n_customers),
+    })
+
+    # Copies of customers, in random order
+    n_copies = int(round(n_rows * match_rate))
+    source = rng.integers(n_customers, size=n_copies)
+    names = customers['CUSTOMER_DESC'].to_numpy(dtype=object)[source]
+    addresses = customers['STREET_ADDRESS'].to_numpy(dtype=object)[source]
+    for long_form, short_form in ABBREVIATIONS:
+        abbreviate = rng.random(n_copies) < 0.5
+        addresses[abbreviate] = pd.Series(addresses[abbreviate], dtype=object).str.replace(long_form, short_form).to_numpy(dtype=object)
+    upper = rng.random(n_copies) < 0.3
+    names[upper] = pd.Series(names[upper], dtype=object).str.upper().to_numpy(dtype=object)
+    jitter_deg = jitter_m / 111_000
+    copies = pd.DataFrame({
+        'POSTAL_CODE': customers['POSTAL_CODE'].to_numpy(dtype=object)[source],
+        'CUSTOMER_DESC': _inject_typos(rng, names, typo_rate),
+        'STREET_ADDRESS_LINE_1': _inject_typos(rng, addresses, typo_rate),
+        'LATITUDE': customers['LATITUDE_COORDINATE'].to_numpy()[source] + rng.normal(0, jitter_deg, size=n_copies),
+        'LONGITUDE': customers['LONGITUDE_COORDINATE'].to_numpy()[source] + rng.normal(0, jitter_deg, size=n_copies),
+        TRUTH_COL: source,
+    })
+
+    # Rows without a counterpart, in the same postal codes
+    n_new = n_rows - n_copies
+    new_ranks = _postal_codes(rng, n_postal_codes, n_new, skew)
+    new = pd.DataFrame({
+        'POSTAL_CODE': postal_codes[new_ranks],
+        'CUSTOMER_DESC': _names(rng, n_new),
+        'STREET_ADDRESS_LINE_1': _addresses(rng, n_new),
+        'LATITUDE': centroid_lat[new_ranks] + rng.normal(0, 0.02, size=n_new),
+        'LONGITUDE': centroid_long[new_ranks] + rng.normal(0, 0.02, size=n_new),
+        TRUTH_COL: -1,
+    })
+
+    unmatched = pd.concat([copies, new], ignore_index=True).iloc[rng.permutation(n_rows)].reset_index(drop=True)
+    unmatched[TRUTH_COL] = unmatched[TRUTH_COL].astype('Int64').mask(unmatched[TRUTH_COL] < 0)
+    for column in ('POSTAL_CODE', 'STREET_ADDRESS_LINE_1'):
+        unmatched[column] = _blank(rng, unmatched[column].to_numpy(dtype=object), missing_rate)
+    no_coordinates = rng.random(n_rows) < missing_rate
+    unmatched.loc[no_coordinates, ['LATITUDE', 'LONGITUDE']] = np.nan
+    return customers, unmatched
+
+
+def precision_recall(result, unmatched, df2_index_col='df2_index'):
+    """
+    Score a match() result against the ground truth of generate().
+
+    Parameters:
+    result (pd.DataFrame): match() output for unmatched (df2_index and customer_id columns).
+    unmatched (pd.DataFrame): The unmatched frame passed to the matcher, with TRUTH_COL.
+
+    Returns:
+    dict: matched (df2 rows given a customer), correct (given their true customer), precision
+        (correct / matched) and recall (correct / rows with a counterpart).
+    """
+    matched = result.loc[result['customer_id'].notna(), [df2_index_col, 'customer_id']].drop_duplicates(df2_index_col)
+    truth = unmatched[TRUTH_COL].reindex(matched[df2_index_col].to_numpy())
+    predicted = matched['customer_id'].to_numpy(dtype=np.float64, na_value=np.nan)
+    correct = int((truth.to_numpy(dtype=np.float64, na_value=np.nan) == predicted).sum())
+    n_matched, n_true = len(matched), int(unmatched[TRUTH_COL].notna().sum())
+    return {
+        'matched': n_matched,
+        'correct': correct,
+        'precision': correct / n_matched if n_matched else 1.0,
+        'recall': correct / n_true if n_true else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--customers', type=str, required=True)
+    parser.add_argument('--unmatched', type=str, required=True)
+    args = parser.parse_args()
+
+    customers, unmatched = generate(args.rows, seed=args.seed)
+    for frame, path in ((customers, args.customers), (unmatched, args.unmatched)):
+        if path.endswith('.csv'):
+            frame.to_csv(path, index=False)
+        else:
+            frame.to_parquet(path, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import argparse
+from fuzzy_matching_module import FuzzyMatcher
+from run_fuzzy_matching import read_customers
+from table_io import TABLE_FORMATS
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input_customers', type=str, required=True)
+    parser.add_argument('--customer_index', type=str, required=True)
+    parser.add_argument('--zip_col1', type=str, default='POSTAL_CODE')
+    parser.add_argument('--name_col1', type=str, default='CUSTOMER_DESC')
+    parser.add_argument('--address_col1', type=str, default='STREET_ADDRESS')
+    parser.add_argument('--lat_col1', type=str, default='LATITUDE_COORDINATE')
+    parser.add_argument('--long_col1', type=str, default='LONGITUDE_COORDINATE')
+    parser.add_argument('--id_col', type=str, default='CUSTOMER_ID')
+    parser.add_argument('--priority_col', type=str, default=None)
+    parser.add_argument('--lat_long_tolerance', type=float, default=3)
+    parser.add_argument('--radius_m', type=float, default=None)
+    parser.add_argument('--format', type=str, default='auto', choices=['auto', *TABLE_FORMATS])
+    args = parser.parse_args()
+
+    customers = read_customers(args)
+    customer_index = FuzzyMatcher.build_customer_index(
+        customers,
+        zip_col1=args.zip_col1,
+        name_col1=args.name_col1,
+        address_col1=args.address_col1,
+        lat_col1=args.lat_col1 if args.lat_col1 in customers.columns else None,
+        long_col1=args.long_col1 if args.long_col1 in customers.columns else None,
+        id_col=args.id_col,
+        priority_col=args.priority_col,
+        lat_long_tolerance=args.lat_long_tolerance,
+        radius_m=args.radius_m
+    )
+    customer_index.save(args.customer_index)
+    print(f"Customer index with {len(customer_index)} rows and {len(customer_index.block_keys)} postal blocks "
+          f"written to {args.customer_index}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bumped whenever the on-disk layout changes.
+INDEX_FORMAT_VERSION = 2
+
+META_FILE = 'meta.json'
+
+
+class CustomerIndex:
+    """
+    Cleaned customer master (df1) kept ready for repeat matching runs.
+
+    The frame holds only the matching columns, already cleaned, with rows grouped by postal code
+    (in order of first appearance, original order within a code) so that every postal block is a
+    contiguous slice described by block_keys and block_offsets.
+
+    On disk the index is a directory with one .npy file per numeric column, which is loaded
+    memory-mapped (plus a missing-value mask if the column has missing values), and a UTF-8 byte
+    buffer plus int64 offsets per string column, next to a meta.json describing the columns and
+    the cleaning configuration.
+    """
+
+    def __init__(self, frame, config, block_keys, block_offsets):
+        """
+        Parameters:
+        frame (pd.DataFrame): Cleaned df1 working columns, grouped by postal code.
+        config (dict): Column names and cleaning settings the index was built with.
+        block_keys (np.ndarray): Postal code of each block, in frame order.
+        block_offsets (np.ndarray): Start row of each block, plus the total row count.
+        """
+        self.frame = frame
+        self.config = config
+        self.block_keys = block_keys
+        self.block_offsets = block_offsets
+        # Lookup structures built from the frame on first use (e.g. the name n-gram index),
+        # shared by every matcher using this index; not persisted
+        self.derived = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    @classmethod
+    def from_cleaned(cls, df1, config):
+        """
+        Build an index from an already cleaned df1 projection.
+
+        Parameters:
+        df1 (pd.DataFrame): Cleaned working columns of df1.
+        config (dict): Column names and cleaning settings; must contain 'zip_col1'.
+
+        Returns:
+        CustomerIndex: The index, grouped by postal code.
+        """
+        codes, uniques = pd.factorize(df1[config['zip_col1']])
+        # Rows without a postal code go last and never form a block
+        order = np.argsort(np.where(codes < 0, len(uniques), codes), kind='stable')
+        frame = df1.iloc[order].reset_index(drop=True)
+        sorted_codes = codes[order]
+        present = sorted_codes >= 0
+        starts = np.searchsorted(sorted_codes[present], np.arange(len(uniques)))
+        block_offsets = np.r_[starts, present.sum()].astype(np.int64)
+        return cls(frame, dict(config), np.asarray(uniques, dtype=object), block_offsets)
+
+    def blocks(self):
+        """
+        Returns:
+        dict: Postal code -> integer row positions of its block. Built once and shared, so
+            callers must not modify it.
+        """
+        if 'blocks' not in self.derived:
+            self.derived['blocks'] = {
+                key: np.arange(start, end)
+                for key, start, end in zip(self.block_keys, self.block_offsets[:-1], self.block_offsets[1:])
+            }
+        return self.derived['blocks']
+
+    def save(self, path):
+        """
+        Write the index to the directory at path (created if missing).
+        """
+        os.makedirs(path, exist_ok=True)
+        columns = []
+        for number, column in enumerate(self.frame.columns):
+            stem = f'col{number}'
+            values = self.frame[column]
+            numeric = self._numeric(values)
+            if numeric is None:
+                self._save_strings(path, stem, values.to_numpy(dtype=object))
+                columns.append({'name': column, 'file': stem, 'kind': 'string'})
+                continue
+            array, missing = numeric
+            np.save(os.path.join(path, f'{stem}.npy'), array)
+            if missing.any():
+                np.save(os.path.join(path, f'{stem}.mask.npy'), missing)
+                columns.append({'name': column, 'file': stem, 'kind': 'masked'})
+            else:
+                columns.append({'name': column, 'file': stem, 'kind': 'numeric'})
+        self._save_strings(path, 'block_keys', self.block_keys)
+        np.save(os.path.join(path, 'block_offsets.npy'), self.block_offsets)
+
+        meta = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'n_rows': len(self.frame),
+            'columns': columns,
+            'config': self.config,
+        }
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load an index written by save.
+
+        Parameters:
+        path (str): Index directory.
+        mmap (bool): Memory-map numeric columns instead of reading them (default True). The
+            frame's numeric columns are then read-only views of the mapped files, not copies.
+
+        Returns:
+        CustomerIndex: The loaded index.
+        """
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get('format_version') != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Customer index at '{path}' has format version {meta.get('format_version')}, "
+                f"expected {INDEX_FORMAT_VERSION}. Rebuild the index."
+            )
+        mmap_mode = 'r' if mmap else None
+        data = {}
+        for column in meta['columns']:
+            if column['kind'] == 'string':
+                data[column['name']] = cls._load_strings(path, column['file'], mmap_mode)
+                continue
+            values = np.load(os.path.join(path, f"{column['file']}.npy"), mmap_mode=mmap_mode)
+            if column['kind'] == 'masked':
+                values = cls._masked_array(values, np.load(os.path.join(path, f"{column['file']}.mask.npy")))
+            data[column['name']] = values
+        # copy=False keeps each column its own block; consolidating the numeric columns into one
+        # 2D block would copy the memory-mapped arrays into memory
+        frame = pd.DataFrame(data, columns=[column['name'] for column in meta['columns']], copy=False)
+        block_keys = cls._load_strings(path, 'block_keys', mmap_mode)
+        block_offsets = np.load(os.path.join(path, 'block_offsets.npy'))
+        return cls(frame, meta['config'], block_keys, block_offsets)
+
+    @staticmethod
+    def _numeric(values):
+        """
+        A numeric column as a (numpy array, missing-value mask) pair, or None if it must be stored
+        as strings. Nullable and Arrow-backed numeric columns qualify too; their missing values
+        are filled with 0 in the array and flagged in the mask, so they reload as nullable numbers.
+        """
+        dtype = values.dtype
+        if isinstance(dtype, np.dtype):
+            return (values.to_numpy(), np.zeros(len(values), dtype=bool)) if dtype.kind in 'biuf' else None
+        dtype = getattr(dtype, 'numpy_dtype', None)
+        if dtype is None or dtype.kind not in 'biuf':
+            return None
+        return values.to_numpy(dtype=dtype, na_value=0), values.isna().to_numpy(dtype=bool)
+
+    @staticmethod
+    def _masked_array(values, missing):
+        """
+        Wrap a numeric array and its missing-value mask in the matching nullable pandas array,
+        without copying values.
+        """
+        if values.dtype.kind == 'b':
+            return pd.arrays.BooleanArray(values, missing)
+        if values.dtype.kind == 'f':
+            return pd.arrays.FloatingArray(values, missing)
+        return pd.arrays.IntegerArray(values, missing)
+
+    @staticmethod
+    def _save_strings(path, stem, values):
+        """
+        Store an object array as a UTF-8 byte buffer, int64 end offsets and a validity mask.
+        Non-string values are stored as their str().
+        """
+        valid = np.asarray(pd.notna(values), dtype=bool)
+        encoded = [str(value).encode('utf-8') if present else b'' for value, present in zip(values, valid)]
+        np.save(os.path.join(path, f'{stem}.data.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        np.save(os.path.join(path, f'{stem}.offsets.npy'), np.cumsum([len(value) for value in encoded], dtype=np.int64))
+        np.save(os.path.join(path, f'{stem}.valid.npy'), valid)
+
+    @staticmethod
+    def _load_strings(path, stem, mmap_mode=None):
+        """
+        Decode a string column written by _save_strings into an object array (None for missing).
+        """
+        buffer = np.load(os.path.join(path, f'{stem}.data.npy'), mmap_mode=mmap_mode).tobytes()
+        ends = np.load(os.path.join(path, f'{stem}.offsets.npy'))
+        valid = np.load(os.path.join(path, f'{stem}.valid.npy'))
+        starts = np.r_[0, ends[:-1]]
+        values = np.empty(len(ends), dtype=object)
+        values[:] = [buffer[start:end].decode('utf-8') if present else None
+                     for start, end, present in zip(starts.tolist(), ends.tolist(), valid.tolist())]
+        return values
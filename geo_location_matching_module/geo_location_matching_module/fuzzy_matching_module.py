@@ -1,7 +1,23 @@
+import numpy as np
 import pandas as pd
 from rapidfuzz import process, fuzz
 import string
 import logging
+import copy
+import heapq
+import os
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from spatial_index import MAX_GEOHASH_PRECISION, GeohashIndex, GridIndex, geohash
+from union_find import UnionFind
+from customer_index import CustomerIndex
+from ngram_index import NgramIndex
+from incremental import IncrementalState, row_fingerprints, sequence_fingerprint
+from match_cache import MatchCache, choice_set_version
+from instrumentation import count_sizes, match_profile, timed_stage
+from sharding import SHARD_POSITION_COL, shard_of
+from scorers import SCORERS, ScorePrefilter, get_scorer, pair_mask
 
 try:
     from tqdm import tqdm
@@ -10,14 +26,171 @@ except ImportError:
 
 logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
 
+# Rules for resolving customers that share the same cleaned key to a single customer_id.
+TIE_BREAK_RULES = ('first', 'all', 'priority')
+
+# Upper bound on the number of cells in a single cdist score matrix (float64, ~32 MB).
+MAX_SCORE_CELLS = 4_000_000
+
+# Upper bound on the number of radius-stage candidate pairs of a postal block scored at once.
+MAX_RADIUS_PAIRS = 1_000_000
+
+# Number of block result frames collapsed into one while the postal blocks are matched.
+RESULT_FRAME_BATCH = 256
+
+# Smaller bounds of the compact mode: scoring peaks at a few times the size of these arrays.
+COMPACT_SCORE_CELLS = 1_000_000
+COMPACT_RADIUS_PAIRS = 250_000
+
+# Single translation table for vectorized name cleaning: drop punctuation and lowercase ASCII.
+NAME_TRANSLATION = str.maketrans(string.ascii_uppercase, string.ascii_lowercase, string.punctuation)
+
+# Punctuation removal table for address cleaning, built once.
+ADDRESS_TRANSLATION = str.maketrans('', '', string.punctuation)
+
+# Number of chunks handed to each parallel job, so that uneven chunks still balance out.
+CHUNKS_PER_JOB = 4
+
+# Stages that only compare a df2 row with its own postal block.
+OWN_BLOCK_MATCH_TYPES = ('lat-long', 'address-zip')
+
+# Temporary df2 column carrying row positions through an incremental match run.
+ROW_POSITION_COL = '__row_position'
+
+# Stages of the cascade whose scorer can be configured, and the stages whose threshold can be
+# configured, with their defaults. The name fallback threshold defaults to the matcher's
+# threshold; geohash and block-level thresholds are set by geohash_threshold and level_thresholds.
+STAGE_SCORERS = {
+    'lat_long': 'ratio', 'address_zip': 'ratio', 'name_fallback': 'ratio', 'geohash': 'ratio', 'block_levels': 'ratio',
+}
+STAGE_THRESHOLDS = {'lat_long': 80, 'address_zip': 85}
+
+# Wider blocking levels rows can be retried at after missing in their own postal block, with
+# their default threshold and match_type label.
+BLOCK_LEVEL_THRESHOLDS = {'zip3': 90, 'neighbour': 90}
+BLOCK_LEVEL_MATCH_TYPES = {'zip3': 'zip3', 'neighbour': 'neighbour-zip'}
+
+# Secondary keys giant postal blocks can be split on, with the df1/df2 columns each one needs.
+SUB_BLOCK_KEYS = {
+    'name_token': ('name_col1', 'name_col2'),
+    'street_number': ('address_col1', 'address_col2'),
+    'grid': ('lat_col1', 'long_col1', 'lat_col2', 'long_col2'),
+}
+
+
+def resolve_n_jobs(n_jobs):
+    """
+    Number of parallel jobs for an n_jobs setting, where -1 means all cores.
+    """
+    return os.cpu_count() if n_jobs == -1 else n_jobs
+
+
 class FuzzyMatcher:
     def __init__(self, df1, df2, zip_col1, zip_col2, name_col1, name_col2, 
                  address_col1=None, address_col2=None, lat_col1=None, long_col1=None, 
-                 lat_col2=None, long_col2=None, threshold=75, lat_long_tolerance=0.01):
+                 lat_col2=None, long_col2=None, threshold=75, lat_long_tolerance=0.01,
+                 scoring='batch', workers=-1, id_col='CUSTOMER_ID', tie_break='first', priority_col=None,
+                 n_jobs=1, executor='process', radius_m=None, vectorized=True, cache=None,
+                 name_fallback=False, fallback_top_k=20, block_levels=(), level_thresholds=None,
+                 neighbour_radius_m=10_000, max_level_candidates=5_000, geohash_precision=None,
+                 geohash_threshold=85, compact=False, max_block_size=None, sub_block_keys=('name_token',),
+                 sub_block_grid_m=500, sub_block_audit=0, stage_scorers=None, stage_thresholds=None,
+                 prefilter=True):
         """
         Initialize the FuzzyMatcher class with dataframes and column configurations.
+
+        Parameters:
+        df1 (pd.DataFrame or CustomerIndex): Customers to match to, raw or as a prebuilt index
+            (see build_customer_index and from_index), in which case df1 is not cleaned again.
+        threshold (int): Threshold of the name fallback stage only (default 75); see
+            stage_thresholds for the other stages.
+        scoring (str): 'batch' scores whole blocks with rapidfuzz cdist matrices (default),
+            'loop' uses the per-row extractOne loop in fuzzy_match.
+        workers (int): Number of threads rapidfuzz uses for cdist scoring (-1 uses all cores).
+        id_col (str): The id column in df1 returned as customer_id (default 'CUSTOMER_ID').
+        tie_break (str): How customers sharing the same cleaned key resolve to an id:
+            'first' (default), 'all' (list of ids) or 'priority' (highest priority_col value).
+        priority_col (str): Column in df1 ranking duplicates when tie_break is 'priority'.
+        n_jobs (int): Number of parallel jobs used to match postal-code blocks (default 1, serial;
+            -1 uses all cores).
+        executor (str or concurrent.futures.Executor): 'process' (default) or 'thread' pool used
+            when n_jobs is not 1, or an existing Executor instance to submit block chunks to.
+        radius_m (float): If set, the lat/long stage matches df2 points against every df1 point
+            within this distance in metres (grid index per postal block) instead of requiring
+            equal rounded coordinates. Coordinates are then not rounded during cleaning.
+        vectorized (bool): Clean columns with vectorized Series operations (default True) instead
+            of applying the scalar clean_* helpers row by row. Both give identical results.
+        cache (MatchCache): Optional memo cache for normalized strings (vectorized cleaning of
+            string columns) and best matches of serial block scoring. Off by default.
+        name_fallback (bool): After the postal-code blocks, match the remaining df2 rows on
+            customer name alone against all of df1 (match_type 'name-fallback'), using a
+            character trigram index to shortlist candidates. Off by default.
+        fallback_top_k (int): Number of shortlisted df1 names scored per df2 name in the
+            name fallback (default 20).
+        block_levels (sequence): Wider blocks to retry rows that stay unmatched in their own
+            postal block, in order: 'zip3' (df1 postal codes sharing the first 3 digits, nearest
+            codes first) and/or 'neighbour' (df1 postal blocks whose coordinate centroid lies
+            within neighbour_radius_m of the row's block centroid, nearest first). Default none.
+        level_thresholds (dict): Threshold per block level (defaults in BLOCK_LEVEL_THRESHOLDS).
+        neighbour_radius_m (float): Centroid distance in metres for the 'neighbour' level (default 10 km).
+        max_level_candidates (int): Maximum number of df1 rows scored per df2 postal code at each
+            block level (default 5000); the nearest blocks are kept.
+        geohash_precision (int): If set, df2 rows with coordinates but a missing postal code (or
+            one df1 has no block for) are blocked on geohash cells of this precision plus their
+            8 neighbours and matched on customer name (match_type 'geohash'). Off by default.
+        geohash_threshold (int): Name threshold of the geohash stage (default 85).
+        compact (bool): Lean memory mode. process() cleans projections of the matching columns
+            instead of the input frames, which are left untouched (no defensive copies needed),
+            equal strings in the working columns share one object, match() attaches its results to
+            df2 by position instead of merging, and score matrices and radius candidate pairs are
+            processed in smaller chunks, trading some speed for a lower peak. Output values are
+            those of the default mode; the index of the result is the df2 labels. Off by default.
+        max_block_size (int): If set, postal blocks with more df1 rows are split into sub-blocks
+            on the secondary keys in sub_block_keys before matching (see sub_blocks). Off by default.
+        sub_block_keys (sequence): Secondary keys tried in order while a (sub-)block is still
+            too large: 'name_token' (first word of the cleaned name, default), 'street_number'
+            (leading number of the address) and/or 'grid' (coordinate cell of sub_block_grid_m).
+        sub_block_grid_m (float): Cell size in metres of the 'grid' key (default 500).
+        sub_block_audit (int): Number of df2 rows of split blocks to rematch against their whole
+            postal block, to estimate the recall lost by sub-blocking (default 0, no audit).
+        stage_scorers (dict): Scorer per stage ('lat_long', 'address_zip', 'name_fallback',
+            'geohash', 'block_levels'), one of 'ratio', 'token_set_ratio' and 'WRatio' (defaults
+            in STAGE_SCORERS, all 'ratio').
+        stage_thresholds (dict): Threshold per stage ('lat_long', 'address_zip', 'name_fallback').
+            The lat-long and address stages default to their fixed thresholds in STAGE_THRESHOLDS
+            (80 and 85), not to threshold; the name fallback defaults to threshold.
+        prefilter (bool): Skip candidate pairs whose cheap score bound (length ratio, shared
+            tokens) shows they cannot reach the stage threshold before running the scorer
+            (default True). The bounds are exact, so results do not change.
         """
-        self.df1 = df1
+        if scoring not in ('batch', 'loop'):
+            raise ValueError(f"Unknown scoring mode '{scoring}'. Expected 'batch' or 'loop'.")
+        if tie_break not in TIE_BREAK_RULES:
+            raise ValueError(f"Unknown tie_break '{tie_break}'. Expected one of {TIE_BREAK_RULES}.")
+        if not isinstance(executor, Executor) and executor not in ('process', 'thread'):
+            raise ValueError(f"Unknown executor '{executor}'. Expected 'process', 'thread' or an Executor.")
+        unknown_levels = [level for level in block_levels if level not in BLOCK_LEVEL_THRESHOLDS]
+        if unknown_levels:
+            raise ValueError(f"Unknown block levels {unknown_levels}. Expected any of {tuple(BLOCK_LEVEL_THRESHOLDS)}.")
+        unknown_stages = [stage for stage in stage_scorers or {} if stage not in STAGE_SCORERS]
+        if unknown_stages:
+            raise ValueError(f"Unknown stages {unknown_stages}. Expected any of {tuple(STAGE_SCORERS)}.")
+        threshold_stages = (*STAGE_THRESHOLDS, 'name_fallback')
+        unknown_stages = [stage for stage in stage_thresholds or {} if stage not in threshold_stages]
+        if unknown_stages:
+            raise ValueError(f"Unknown stage thresholds {unknown_stages}. Expected any of {threshold_stages}.")
+        unknown_scorers = [scorer for scorer in (stage_scorers or {}).values() if scorer not in SCORERS]
+        if unknown_scorers:
+            raise ValueError(f"Unknown scorers {unknown_scorers}. Expected any of {tuple(SCORERS)}.")
+        thresholds = [threshold, geohash_threshold, *(level_thresholds or {}).values(), *(stage_thresholds or {}).values()]
+        out_of_range = [value for value in thresholds if not 0 <= value <= 100]
+        if out_of_range:
+            raise ValueError(f"Thresholds must be between 0 and 100, got {out_of_range}.")
+        unknown_keys = [key for key in sub_block_keys if key not in SUB_BLOCK_KEYS]
+        if unknown_keys:
+            raise ValueError(f"Unknown sub-block keys {unknown_keys}. Expected any of {tuple(SUB_BLOCK_KEYS)}.")
+        self.customer_index = df1 if isinstance(df1, CustomerIndex) else None
+        self.df1 = df1.frame if self.customer_index is not None else df1
         self.df2 = df2
         self.zip_col1 = zip_col1
         self.zip_col2 = zip_col2
@@ -31,6 +204,50 @@ class FuzzyMatcher:
         self.long_col2 = long_col2
         self.threshold = threshold
         self.lat_long_tolerance = lat_long_tolerance
+        self.scoring = scoring
+        self.workers = workers
+        self.id_col = id_col
+        self.tie_break = tie_break
+        self.priority_col = priority_col
+        self.n_jobs = resolve_n_jobs(n_jobs)
+        self.executor = executor
+        self.radius_m = radius_m
+        self.vectorized = vectorized
+        self.cache = cache
+        self.name_fallback = name_fallback
+        self.fallback_top_k = fallback_top_k
+        if geohash_precision is not None and not 1 <= geohash_precision <= MAX_GEOHASH_PRECISION:
+            raise ValueError(f"geohash_precision must be between 1 and {MAX_GEOHASH_PRECISION}, got {geohash_precision}.")
+        self.block_levels = tuple(block_levels)
+        self.level_thresholds = {**BLOCK_LEVEL_THRESHOLDS, **(level_thresholds or {})}
+        self.neighbour_radius_m = neighbour_radius_m
+        self.max_level_candidates = max_level_candidates
+        self.geohash_precision = geohash_precision
+        self.geohash_threshold = geohash_threshold
+        self.compact = compact
+        self.max_cells = COMPACT_SCORE_CELLS if compact else MAX_SCORE_CELLS
+        self.max_radius_pairs = COMPACT_RADIUS_PAIRS if compact else MAX_RADIUS_PAIRS
+        self.max_block_size = max_block_size
+        self.sub_block_keys = tuple(sub_block_keys)
+        self.sub_block_grid_m = sub_block_grid_m
+        self.sub_block_audit = sub_block_audit
+        self.stage_scorers = {**STAGE_SCORERS, **(stage_scorers or {})}
+        self.stage_thresholds = {**STAGE_THRESHOLDS, 'name_fallback': threshold, **(stage_thresholds or {})}
+        self.prefilter = prefilter
+        if max_block_size:
+            for key in self.sub_block_keys:
+                if not all(getattr(self, col) for col in SUB_BLOCK_KEYS[key]):
+                    raise ValueError(f"Sub-block key '{key}' needs {', '.join(SUB_BLOCK_KEYS[key])}.")
+        # Untouched df2 the compact mode attaches its results to (df2 itself is then a projection)
+        self.df2_input = df2
+        # Query/scorer call counts of the last match() run, see dedup_ratio
+        self.stats = Counter()
+        # Candidates kept per df2 row by the running match(), see its top_k
+        self.top_k = None
+        # Whether process() already cleaned the dataframes
+        self.processed = False
+        if self.customer_index is not None:
+            self._check_customer_index()
 
     @staticmethod
     def clean_zip_code(zip_code):
@@ -42,12 +259,93 @@ class FuzzyMatcher:
         cleaned = ''.join(filter(str.isdigit, str(zip_code)))
         return cleaned.zfill(5)[:5]
 
+    @staticmethod
+    def _as_text(series):
+        """
+        Convert the non-missing values of a Series to Python strings (object dtype), split into
+        an ASCII part handled by vectorized operations and a mask of non-ASCII rows.
+        """
+        text = pd.Series(np.asarray(series.astype(str), dtype=object), index=series.index)
+        # str.isascii per value rather than Series.str.isascii, which needs pandas 3
+        return text, np.fromiter(map(str.isascii, text), dtype=bool, count=len(text))
+
+    @staticmethod
+    def _from_cleaned(values, series):
+        """
+        Wrap an object array of cleaned values (None for missing) like Series.apply would.
+        """
+        return pd.Series(values, index=series.index, name=series.name)
+
+    @staticmethod
+    def clean_zip_code_series(zip_codes):
+        """
+        Vectorized clean_zip_code for a whole Series.
+
+        ASCII values are cleaned with str.replace/zfill; the rare non-ASCII values fall back to
+        clean_zip_code, since str.isdigit also accepts non-ASCII digits.
+
+        Parameters:
+        zip_codes (pd.Series): Raw zip codes.
+
+        Returns:
+        pd.Series: Cleaned zip codes, identical to zip_codes.apply(clean_zip_code).
+        """
+        cleaned = np.full(len(zip_codes), None, dtype=object)
+        present = zip_codes.notna().to_numpy(dtype=bool)
+        text, ascii_mask = FuzzyMatcher._as_text(zip_codes[present])
+
+        positions = np.flatnonzero(present)
+        cleaned[positions[ascii_mask]] = (
+            text[ascii_mask].str.replace(r'[^0-9]', '', regex=True).str.zfill(5).str[:5].to_numpy(dtype=object)
+        )
+        cleaned[positions[~ascii_mask]] = [FuzzyMatcher.clean_zip_code(value) for value in text[~ascii_mask]]
+        return FuzzyMatcher._from_cleaned(cleaned, zip_codes)
+
+    def _cached_clean(self, values, namespace, clean_series, keep_dtype=False):
+        """
+        Run a vectorized cleaner through the match cache: each distinct string is normalized at
+        most once and only when the cache does not hold it yet. Without a cache, compact mode
+        still cleans each distinct string once, so equal values share one cleaned object. Columns
+        that are not purely strings are cleaned directly, since e.g. 1234 and 1234.0 clean
+        differently.
+
+        Parameters:
+        values (pd.Series): Raw column.
+        namespace (str): Cache namespace of the cleaner.
+        clean_series (callable): The vectorized cleaner.
+        keep_dtype (bool): Whether clean_series returns the dtype of its input (string methods)
+            rather than inferring one from the cleaned values.
+
+        Returns:
+        pd.Series: Identical to clean_series(values).
+        """
+        if (self.cache is None and not self.compact) or pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            return clean_series(values)
+        present = values.notna().to_numpy(dtype=bool)
+        codes, uniques = pd.factorize(values[present])
+        if self.cache is None:
+            cleaned_uniques = clean_series(pd.Series(uniques, dtype=object)).tolist()
+        else:
+            cleaned_uniques = self.cache.lookup(
+                namespace, list(uniques),
+                lambda missing: clean_series(pd.Series(missing, dtype=object)).tolist()
+            )
+        cleaned = np.empty(len(values), dtype=object)
+        unique_cleaned = np.empty(len(uniques), dtype=object)
+        unique_cleaned[:] = cleaned_uniques
+        cleaned[present] = unique_cleaned[codes]
+        cleaned[~present] = clean_series(values[~present]).to_numpy(dtype=object)
+        return pd.Series(cleaned, index=values.index, name=values.name, dtype=values.dtype if keep_dtype else None)
+
     def zip_code_cleaner(self):
         """
         Clean zip code columns in both dataframes.
         """
-        self.df1[self.zip_col1] = self.df1[self.zip_col1].apply(self.clean_zip_code)
-        self.df2[self.zip_col2] = self.df2[self.zip_col2].apply(self.clean_zip_code)
+        for df, zip_col in self._clean_targets(self.zip_col1, self.zip_col2):
+            if self.vectorized:
+                df[zip_col] = self._cached_clean(df[zip_col], 'normalize:zip', self.clean_zip_code_series)
+            else:
+                df[zip_col] = df[zip_col].apply(self.clean_zip_code)
 
     @staticmethod
     def clean_customer_name(name):
@@ -60,12 +358,38 @@ class FuzzyMatcher:
         # Convert to string and remove punctuation
         return name.translate(str.maketrans('', '', string.punctuation)).strip().lower()
     
+    @staticmethod
+    def clean_customer_name_series(names):
+        """
+        Vectorized clean_customer_name for a whole Series.
+
+        ASCII values go through a single translate (punctuation removal and lowercasing) and a
+        strip; non-ASCII values fall back to clean_customer_name for full Unicode lowercasing.
+
+        Parameters:
+        names (pd.Series): Raw customer names.
+
+        Returns:
+        pd.Series: Cleaned names, identical to names.apply(clean_customer_name).
+        """
+        cleaned = np.full(len(names), None, dtype=object)
+        present = names.notna().to_numpy(dtype=bool)
+        text, ascii_mask = FuzzyMatcher._as_text(names[present])
+
+        positions = np.flatnonzero(present)
+        cleaned[positions[ascii_mask]] = text[ascii_mask].str.translate(NAME_TRANSLATION).str.strip().to_numpy(dtype=object)
+        cleaned[positions[~ascii_mask]] = [FuzzyMatcher.clean_customer_name(value) for value in text[~ascii_mask]]
+        return FuzzyMatcher._from_cleaned(cleaned, names)
+
     def customer_name_cleaner(self):
         """
         Clean customer name columns in both dataframes.
         """
-        self.df1[self.name_col1] = self.df1[self.name_col1].apply(self.clean_customer_name)
-        self.df2[self.name_col2] = self.df2[self.name_col2].apply(self.clean_customer_name)
+        for df, name_col in self._clean_targets(self.name_col1, self.name_col2):
+            if self.vectorized:
+                df[name_col] = self._cached_clean(df[name_col], 'normalize:name', self.clean_customer_name_series)
+            else:
+                df[name_col] = df[name_col].apply(self.clean_customer_name)
     
     @staticmethod
     def clean_lat_long(lat, long, decimal_places=5):
@@ -75,7 +399,7 @@ class FuzzyMatcher:
         Parameters:
         lat (float): Latitude value.
         long (float): Longitude value.
-        decimal_places (int): Number of decimal places to round to (default is 5).
+        decimal_places (int): Number of decimal places to round to (default is 5); None skips rounding.
 
         Returns:
         tuple: Cleaned (lat, long) values rounded to the specified precision, or (None, None) if invalid.
@@ -87,11 +411,94 @@ class FuzzyMatcher:
             return None, None
 
         # Round latitude and longitude to the specified number of decimal places
-        lat = round(lat, decimal_places)
-        long = round(long, decimal_places)
+        if decimal_places is not None:
+            lat = round(lat, decimal_places)
+            long = round(long, decimal_places)
 
         return lat, long
 
+    @staticmethod
+    def round_like_python(values, decimal_places):
+        """
+        Round a float array exactly like the built-in round(value, decimal_places).
+
+        np.round scales, rounds and unscales, which only differs from the built-in (correctly
+        rounded) result when the scaled value lands within rounding error of a half; those
+        values are re-rounded with the built-in.
+
+        Parameters:
+        values (np.ndarray): Float values.
+        decimal_places (int): Number of decimal places.
+
+        Returns:
+        np.ndarray: Rounded values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not 0 <= decimal_places <= 15:
+            return np.array([round(float(value), decimal_places) for value in values], dtype=np.float64)
+
+        with np.errstate(over='ignore', invalid='ignore'):
+            scaled = values * 10.0 ** decimal_places
+            rounded = np.round(values, decimal_places)
+            near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= 4 * np.spacing(np.abs(scaled))
+        suspect = np.flatnonzero(near_half | (np.isfinite(values) & ~np.isfinite(scaled)))
+        rounded[suspect] = [round(float(value), decimal_places) for value in values[suspect]]
+        return rounded
+
+    @staticmethod
+    def _to_float(series):
+        """
+        Convert a Series to float64 like float() per value; values float() rejects become NaN,
+        along with a mask of the rows whose conversion failed or needs the scalar path.
+        """
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+            return series.to_numpy(dtype=np.float64, na_value=np.nan), np.zeros(len(series), dtype=bool)
+        try:
+            return np.asarray(series, dtype=object).astype(np.float64), np.zeros(len(series), dtype=bool)
+        except (ValueError, TypeError):
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            # NaN is a valid float; anything else that came out as NaN needs float() to decide
+            raw = series.to_numpy(dtype=object)
+            is_float_nan = np.array([isinstance(value, float) and value != value for value in raw[np.isnan(values)]], dtype=bool)
+            fallback = np.zeros(len(series), dtype=bool)
+            fallback[np.flatnonzero(np.isnan(values))[~is_float_nan]] = True
+            return values, fallback
+
+    @staticmethod
+    def clean_lat_long_series(lat, long, decimal_places=5):
+        """
+        Vectorized clean_lat_long for whole latitude and longitude Series.
+
+        Values are converted with float semantics and rounded with round_like_python; the rows
+        where a value could not be converted go through clean_lat_long, which blanks both values.
+
+        Parameters:
+        lat (pd.Series): Latitude values.
+        long (pd.Series): Longitude values.
+        decimal_places (int): Number of decimal places to round to (default is 5); None skips rounding.
+
+        Returns:
+        tuple: (lat, long) Series identical to applying clean_lat_long row by row.
+        """
+        lat_values, lat_fallback = FuzzyMatcher._to_float(lat)
+        long_values, long_fallback = FuzzyMatcher._to_float(long)
+        if decimal_places is not None:
+            lat_values = FuzzyMatcher.round_like_python(lat_values, decimal_places)
+            long_values = FuzzyMatcher.round_like_python(long_values, decimal_places)
+
+        fallback = np.flatnonzero(lat_fallback | long_fallback)
+        if len(fallback):
+            lat_values, long_values = lat_values.astype(object), long_values.astype(object)
+            cleaned = [
+                FuzzyMatcher.clean_lat_long(lat_value, long_value, decimal_places=decimal_places)
+                for lat_value, long_value in zip(lat.to_numpy(dtype=object)[fallback], long.to_numpy(dtype=object)[fallback])
+            ]
+            lat_values[fallback] = [value[0] for value in cleaned]
+            long_values[fallback] = [value[1] for value in cleaned]
+            return (pd.Series(lat_values, index=lat.index, name=lat.name).infer_objects(),
+                    pd.Series(long_values, index=long.index, name=long.name).infer_objects())
+        return pd.Series(lat_values, index=lat.index, name=lat.name), pd.Series(long_values, index=long.index, name=long.name)
+
     @staticmethod
     def get_decimal_places(value):
         """
@@ -111,51 +518,200 @@ class FuzzyMatcher:
             return 0
 
 
+    def _configured(self, cols1, cols2):
+        """
+        Whether a cleaning/matching step has its columns configured: on df1 only when there is
+        no df2 (building a customer index), otherwise on both dataframes.
+        """
+        cols1 = cols1 if isinstance(cols1, tuple) else (cols1,)
+        cols2 = cols2 if isinstance(cols2, tuple) else (cols2,)
+        return all(cols1) and (self.df2 is None or all(cols2))
+
+    def _clean_targets(self, cols1, cols2):
+        """
+        List the (dataframe, columns) pairs a cleaner should process: df1 unless it comes from a
+        prebuilt CustomerIndex (already clean), and df2 unless there is none.
+        """
+        targets = []
+        if self.customer_index is None:
+            targets.append((self.df1, cols1))
+        if self.df2 is not None:
+            targets.append((self.df2, cols2))
+        return targets
+
     def lat_long_cleaner(self):
         """
         Clean latitude and longitude columns in both dataframes by rounding to a consistent decimal precision.
         """
-        if not (self.lat_col1 and self.long_col1 and self.lat_col2 and self.long_col2):
+        if not self._configured((self.lat_col1, self.long_col1), (self.lat_col2, self.long_col2)):
             return
 
-        # Apply cleaning to df1
-        self.df1[[self.lat_col1, self.long_col1]] = self.df1[[self.lat_col1, self.long_col1]].apply(
-            lambda row: self.clean_lat_long(row[self.lat_col1], row[self.long_col1], decimal_places=int(self.lat_long_tolerance)),
-            axis=1, result_type='expand'
-        )
+        decimal_places = self.lat_long_decimal_places()
+        for df, (lat_col, long_col) in self._clean_targets((self.lat_col1, self.long_col1), (self.lat_col2, self.long_col2)):
+            if self.vectorized:
+                df[lat_col], df[long_col] = self.clean_lat_long_series(df[lat_col], df[long_col], decimal_places=decimal_places)
+            else:
+                df[[lat_col, long_col]] = df[[lat_col, long_col]].apply(
+                    lambda row: self.clean_lat_long(row[lat_col], row[long_col], decimal_places=decimal_places),
+                    axis=1, result_type='expand'
+                )
 
-        # Apply cleaning to df2
-        self.df2[[self.lat_col2, self.long_col2]] = self.df2[[self.lat_col2, self.long_col2]].apply(
-            lambda row: self.clean_lat_long(row[self.lat_col2], row[self.long_col2], decimal_places=int(self.lat_long_tolerance)),
-            axis=1, result_type='expand'
-        )
+    def lat_long_decimal_places(self):
+        """
+        Decimal places coordinates are rounded to during cleaning; None in radius mode, which
+        compares true distances and keeps full precision.
+        """
+        return None if self.radius_m else int(self.lat_long_tolerance)
+
+    @staticmethod
+    def resolve_customer_ids(df1, key1, id_col='CUSTOMER_ID', tie_break='first', priority_col=None):
+        """
+        Resolve the customer id for every row of df1 once, so that a scored candidate position
+        maps to its id with a single array lookup.
+
+        Rows sharing the same key value (e.g. two customers with the same cleaned name) are
+        indistinguishable to the scorer, so they all resolve to the same id according to tie_break:
+        'first' takes the id of the first row in df1 order, 'priority' takes the id of the row
+        with the highest priority_col value (first row wins on equal priority), and 'all' returns
+        the list of every id sharing the key, in df1 order.
+
+        Parameters:
+        df1 (pd.DataFrame): The DataFrame holding the candidates.
+        key1 (str): The column name in df1 being matched on.
+        id_col (str): The id column in df1 (default 'CUSTOMER_ID').
+        tie_break (str): One of 'first', 'all' or 'priority' (default 'first').
+        priority_col (str): Column used to rank duplicates when tie_break is 'priority'.
+
+        Returns:
+        np.ndarray: Object array with the resolved id for each row position of df1.
+        """
+        if tie_break not in TIE_BREAK_RULES:
+            raise ValueError(f"Unknown tie_break '{tie_break}'. Expected one of {TIE_BREAK_RULES}.")
+        if tie_break == 'priority' and not priority_col:
+            raise ValueError("tie_break='priority' requires priority_col.")
+
+        ids = df1[id_col].to_numpy(dtype=object)
+        codes, _ = pd.factorize(df1[key1])
+        present = codes >= 0
+        resolved = ids.copy()
+        if not present.any():
+            return resolved
+
+        positions = np.flatnonzero(present)
+        group_codes = codes[present]
+        if tie_break == 'priority':
+            priority = pd.to_numeric(df1[priority_col], errors='coerce').to_numpy(dtype=np.float64)[present]
+            # Missing priorities rank last; lexsort is stable so df1 order breaks remaining ties
+            order = np.lexsort((-np.nan_to_num(priority, nan=-np.inf), group_codes))
+        else:
+            order = np.argsort(group_codes, kind='stable')
+        sorted_codes = group_codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+
+        if tie_break == 'all':
+            # Group members in df1 order, independent of any priority
+            order = np.argsort(group_codes, kind='stable')
+            groups = np.split(ids[positions[order]], starts[1:])
+            group_ids = np.empty(len(groups), dtype=object)
+            group_ids[:] = [list(group) for group in groups]
+        else:
+            group_ids = ids[positions[order[starts]]]
+        resolved[positions] = group_ids[np.searchsorted(sorted_codes[starts], group_codes)]
+        return resolved
+
+    @staticmethod
+    def unique_values(values):
+        """
+        Factorize the non-missing values of an array so that each distinct value is scored once.
+
+        Parameters:
+        values (np.ndarray): Object array of keys, possibly with missing values.
+
+        Returns:
+        tuple: (positions of the present values, code of each present value into the uniques,
+            list of unique values in order of first appearance, position of each unique's first
+            occurrence).
+        """
+        positions = np.flatnonzero(pd.notna(values))
+        codes, uniques = pd.factorize(values[positions])
+        first_positions = positions[np.unique(codes, return_index=True)[1]]
+        return positions, codes, list(uniques), first_positions
 
     @staticmethod
-    def fuzzy_match(df1, df2, key1, key2, threshold=95):
+    def _count_scoring(stats, query_rows, unique_queries, choice_rows, unique_choices):
+        """
+        Record how many scorer calls a queries x choices comparison took with and without deduplication.
+        """
+        if stats is not None:
+            stats['query_rows'] += query_rows
+            stats['unique_queries'] += unique_queries
+            stats['scorer_calls'] += unique_queries * unique_choices
+            stats['scorer_calls_without_dedup'] += query_rows * choice_rows
+
+    @staticmethod
+    def fuzzy_match(df1, df2, key1, key2, threshold=95, id_col='CUSTOMER_ID', tie_break='first', priority_col=None,
+                    stats=None, cache=None, top_k=None, scorer='ratio'):
         """
         Perform fuzzy matching between two DataFrame columns and return the best match for each row in df2.
 
+        Each distinct df2 value is scored once against the distinct df1 values; the best choice
+        maps back to its first position in df1, which is where extractOne over all of df1 would
+        stop too.
+
         Parameters:
         df1 (pd.DataFrame): The first DataFrame.
         df2 (pd.DataFrame): The second DataFrame.
         key1 (str): The column name in df1 to match.
         key2 (str): The column name in df2 to match.
         threshold (int): The minimum score for a match to be considered valid.
+        id_col (str): The id column in df1 (default 'CUSTOMER_ID').
+        tie_break (str): How duplicate key values in df1 resolve to an id, see resolve_customer_ids.
+        priority_col (str): Column used to rank duplicates when tie_break is 'priority'.
+        stats (collections.Counter): Optional counter updated with query and scorer call counts.
+        cache (MatchCache): Optional cache of best matches per (scorer, threshold, query, choice set).
+        top_k (int): If set, also return a candidates column, see batch_fuzzy_match. The cache,
+            which only holds best matches, is then not used.
+        scorer (str): Scorer name, see scorers.SCORERS (default 'ratio'). The threshold is
+            passed as score_cutoff, so rapidfuzz skips choices as soon as they cannot reach it.
 
         Returns:
         pd.DataFrame: A DataFrame containing the best match for each row in df2.
         """
-        s = df1[key1].tolist()
+        scorer_func = get_scorer(scorer)
+        _, _, choices, choice_pos = FuzzyMatcher.unique_values(df1[key1].to_numpy(dtype=object))
+        customer_ids = FuzzyMatcher.resolve_customer_ids(df1, key1, id_col, tie_break, priority_col)
+        if top_k:
+            cache = None
 
         # Apply fuzzy matching
         match_results = []
+        best_matches = {}
+        top_matches = {}
+        if cache is not None and choices:
+            version = choice_set_version(choices)
+            _, _, queries, _ = FuzzyMatcher.unique_values(df2[key2].to_numpy(dtype=object))
+            for query, hit in zip(queries, cache.get_many('best_match', [
+                    (scorer, threshold, query, version) for query in queries])):
+                if hit is not None:
+                    best_matches[query] = (choices[hit[0]], hit[1], hit[0])
+            cached_queries = set(best_matches)
+        query_rows = 0
         for idx, value in df2[key2].items():
             if pd.notna(value):
-                # Compare the current value in df2 against all values in df1
-                best_match = process.extractOne(value, s, scorer=fuzz.ratio)
+                query_rows += 1
+                # Compare each distinct value in df2 against all distinct values in df1
+                if value not in best_matches and top_k:
+                    # extract ranks equal scores by choice order, so its first result is extractOne's
+                    top_matches[value] = process.extract(
+                        value, choices, scorer=scorer_func, limit=top_k, score_cutoff=threshold
+                    )
+                    best_matches[value] = top_matches[value][0] if top_matches[value] else None
+                elif value not in best_matches:
+                    best_matches[value] = process.extractOne(value, choices, scorer=scorer_func, score_cutoff=threshold)
+                best_match = best_matches[value]
                 if best_match and best_match[1] >= threshold:
-                    # Find the corresponding customer_id from df1
-                    customer_id = df1.loc[df1[key1] == best_match[0], 'CUSTOMER_ID'].iloc[0]
+                    # extractOne returns the position of the best choice among the distinct values
+                    customer_id = customer_ids[choice_pos[best_match[2]]]
                     match_results.append({
                         'df2_index': idx,
                         'best_match': best_match[0],  # Best match from df1
@@ -180,25 +736,337 @@ class FuzzyMatcher:
                     'is_matched': False
                 })
 
+        FuzzyMatcher._count_scoring(stats, query_rows, len(best_matches), len(df1), len(choices))
+        if cache is not None and choices:
+            scored = [query for query in best_matches if query not in cached_queries]
+            # Queries without a choice reaching the threshold are cached as a zero score
+            cache.put_many('best_match', [(scorer, threshold, query, version) for query in scored],
+                           [(best_matches[query][2], best_matches[query][1]) if best_matches[query] else (0, 0)
+                            for query in scored])
+
         # Convert match results to a DataFrame
         match_df = pd.DataFrame(match_results)
+        if top_k:
+            top_candidates = {
+                value: [(customer_ids[choice_pos[match[2]]], match[0], match[1]) for match in matches if match[1] >= threshold]
+                for value, matches in top_matches.items()
+            }
+            match_df['candidates'] = [top_candidates.get(value, []) if pd.notna(value) else [] for value in df2[key2]]
 
         return match_df
 
+    @staticmethod
+    def batch_fuzzy_match(df1, df2, key1, key2, threshold=95, id_col='CUSTOMER_ID', tie_break='first',
+                          priority_col=None, workers=-1, max_cells=MAX_SCORE_CELLS, stats=None, cache=None,
+                          top_k=None, scorer='ratio', prefilter=True):
+        """
+        Vectorized equivalent of fuzzy_match: score a whole block of df2 against df1 with
+        rapidfuzz cdist and take the argmax per row.
+
+        Only distinct df2 values are scored, against distinct df1 values, and the best match is
+        broadcast back to every row sharing the value. With prefilter, each query is only scored
+        against the choices whose cheap score bound (see scorers.ScorePrefilter) reaches the
+        threshold. The score matrices are built in row chunks so that no single matrix exceeds
+        max_cells entries. Ties resolve to the first choice in df1 order, like extractOne.
+
+        Parameters:
+        df1 (pd.DataFrame): The first DataFrame.
+        df2 (pd.DataFrame): The second DataFrame.
+        key1 (str): The column name in df1 to match.
+        key2 (str): The column name in df2 to match.
+        threshold (int): The minimum score for a match to be considered valid.
+        id_col (str): The id column in df1 (default 'CUSTOMER_ID').
+        tie_break (str): How duplicate key values in df1 resolve to an id, see resolve_customer_ids.
+        priority_col (str): Column used to rank duplicates when tie_break is 'priority'.
+        workers (int): Number of threads used by cdist (-1 uses all cores).
+        max_cells (int): Maximum number of cells in a single score matrix.
+        stats (collections.Counter): Optional counter updated with query and scorer call counts.
+        cache (MatchCache): Optional cache of best matches per (scorer, threshold, query, choice set);
+            only queries it does not hold are scored.
+        top_k (int): If set, also return a candidates column holding, per row, the (customer_id,
+            best_match, match_score) tuples of its top_k best choices at or above threshold, best
+            first, taken from the same score matrices. The cache is then not used.
+        scorer (str): Scorer name, see scorers.SCORERS (default 'ratio').
+        prefilter (bool): Skip the (query, choice) pairs that cannot reach the threshold
+            (default True). The skipped pairs are counted in stats['prefilter_pruned'].
+
+        Returns:
+        pd.DataFrame: A DataFrame containing the best match for each row in df2,
+            identical to the output of fuzzy_match.
+        """
+        scorer_func = get_scorer(scorer)
+        if top_k:
+            cache = None
+        n = len(df2)
+        best_pos = np.zeros(n, dtype=np.int64)
+        best_score = np.zeros(n, dtype=np.float64)
+        matched = np.zeros(n, dtype=bool)
+
+        # extractOne skips missing choices, so only score against present ones; a distinct
+        # choice stands for its first position in df1
+        _, _, choices, choice_pos = FuzzyMatcher.unique_values(df1[key1].to_numpy(dtype=object))
+        query_rows, query_codes, queries, _ = FuzzyMatcher.unique_values(df2[key2].to_numpy(dtype=object))
+        FuzzyMatcher._count_scoring(stats, len(query_rows), len(queries), len(df1), len(choices))
+
+        candidates = None
+        if top_k:
+            candidates = np.empty(n, dtype=object)
+            candidates[:] = [[] for _ in range(n)]
+        if choices and queries:
+            score_prefilter = ScorePrefilter(scorer, choices) if prefilter else None
+            top_choices = [None] * len(queries)
+
+            def best_choices(batch_queries):
+                # Position among the distinct choices and score of each query's best match
+                best_choice = np.zeros(len(batch_queries), dtype=np.int64)
+                best_choice_score = np.zeros(len(batch_queries), dtype=np.float64)
+                if score_prefilter is None:
+                    groups = [(np.arange(len(batch_queries)), np.arange(len(choices)))]
+                else:
+                    groups = score_prefilter.groups(batch_queries, threshold)
+                for positions, columns in groups:
+                    if stats is not None:
+                        stats['prefilter_pruned'] += len(positions) * (len(choices) - len(columns))
+                    if not len(columns):
+                        if top_k:
+                            for position in positions.tolist():
+                                top_choices[position] = (columns, np.empty(0, dtype=np.float64))
+                        continue
+                    # Columns stay in df1 order, so argmax still picks the first best choice
+                    group_choices = [choices[column] for column in columns.tolist()]
+                    chunk = max(1, max_cells // len(columns))
+                    for start in range(0, len(positions), chunk):
+                        rows = positions[start:start + chunk]
+                        scores = process.cdist(
+                            [batch_queries[row] for row in rows.tolist()], group_choices,
+                            scorer=scorer_func, score_cutoff=threshold,
+                            dtype=np.float64, workers=workers
+                        )
+                        argmax = scores.argmax(axis=1)
+                        best_choice[rows] = columns[argmax]
+                        best_choice_score[rows] = scores[np.arange(len(scores)), argmax]
+                        if top_k:
+                            for row, (top_columns, top_scores) in zip(
+                                    rows.tolist(), FuzzyMatcher.top_k_columns(scores, top_k, threshold)):
+                                top_choices[row] = (columns[top_columns], top_scores)
+                return best_choice, best_choice_score
+
+            if cache is None:
+                unique_choice, unique_score = best_choices(queries)
+            else:
+                version = choice_set_version(choices)
+                results = cache.lookup(
+                    'best_match', [(scorer, threshold, query, version) for query in queries],
+                    lambda missing: list(zip(*(values.tolist() for values in best_choices([key[2] for key in missing]))))
+                )
+                unique_choice = np.array([result[0] for result in results], dtype=np.int64)
+                unique_score = np.array([result[1] for result in results], dtype=np.float64)
+            unique_pos = choice_pos[unique_choice]
+            # Broadcast each distinct query's result to all of its rows
+            best_pos[query_rows] = unique_pos[query_codes]
+            best_score[query_rows] = unique_score[query_codes]
+            matched[query_rows] = best_score[query_rows] >= threshold
+
+        customer_ids = FuzzyMatcher.resolve_customer_ids(df1, key1, id_col, tie_break, priority_col)
+        if top_k and choices and queries:
+            unique_candidates = [
+                [(customer_ids[choice_pos[column]], choices[column], score)
+                 for column, score in zip(columns.tolist(), column_scores.tolist())]
+                for columns, column_scores in top_choices
+            ]
+            for row, code in zip(query_rows.tolist(), query_codes.tolist()):
+                candidates[row] = unique_candidates[code]
+
+        return FuzzyMatcher._build_match_frame(
+            df2.index.to_numpy(), df1[key1].to_numpy(dtype=object), customer_ids,
+            best_pos, best_score, matched, candidates
+        )
+
+    @staticmethod
+    def top_k_columns(scores, k, threshold):
+        """
+        The k best columns of every row of a score matrix that score at least threshold.
+
+        Returns:
+        list: (column positions, scores) arrays per row, best first; equal scores keep column order.
+        """
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        top_scores = np.take_along_axis(scores, order, axis=1)
+        keep = top_scores >= threshold
+        return [(columns[row_keep], row_scores[row_keep]) for columns, row_scores, row_keep in zip(order, top_scores, keep)]
+
+    @staticmethod
+    def _build_match_frame(df2_index, choices, customer_ids, best_pos, best_score, matched, candidates=None):
+        """
+        Assemble the df2_index/best_match/match_score/customer_id/is_matched frame from arrays.
+        Unmatched rows carry None, and dtypes are inferred the same way as for per-row records.
+        A candidates array (see batch_fuzzy_match) is added as a column when given.
+        """
+        n = len(df2_index)
+        best_match = np.full(n, None, dtype=object)
+        match_score = np.full(n, None, dtype=object)
+        customer_id = np.full(n, None, dtype=object)
+        best_match[matched] = choices[best_pos[matched]]
+        match_score[matched] = best_score[matched]
+        customer_id[matched] = customer_ids[best_pos[matched]]
+
+        match_df = pd.DataFrame({
+            'df2_index': df2_index,
+            'best_match': best_match,
+            'match_score': match_score,
+            'customer_id': customer_id,
+            'is_matched': matched
+        }).infer_objects()
+        if candidates is not None:
+            match_df['candidates'] = candidates
+        return match_df
+
+    @staticmethod
+    def pairwise_fuzzy_match(df1, df2, key1, key2, pairs, threshold=95, id_col='CUSTOMER_ID', tie_break='first',
+                             priority_col=None, workers=-1, stats=None, cache=None, top_k=None, scorer='ratio',
+                             prefilter=True):
+        """
+        Score explicit candidate pairs (e.g. from a spatial index) and return the best candidate
+        for every df2 row that has at least one pair.
+
+        The best candidate has the highest score, then the lowest df1 position. Candidates of the
+        same df2 row sharing the best candidate's key and score are resolved with tie_break.
+        Each distinct (query, choice) string pair is scored once, unless prefilter shows it
+        cannot reach the threshold (see scorers.pair_mask).
+
+        Parameters:
+        df1 (pd.DataFrame): The first DataFrame.
+        df2 (pd.DataFrame): The second DataFrame.
+        key1 (str): The column name in df1 to match.
+        key2 (str): The column name in df2 to match.
+        pairs (tuple): (df2 positions, df1 positions) arrays of candidate pairs.
+        threshold (int): The minimum score for a match to be considered valid.
+        id_col (str): The id column in df1 (default 'CUSTOMER_ID').
+        tie_break (str): 'first', 'all' or 'priority', see resolve_customer_ids.
+        priority_col (str): Column used to rank duplicates when tie_break is 'priority'.
+        workers (int): Number of threads used by cpdist (-1 uses all cores).
+        stats (collections.Counter): Optional counter updated with scorer call counts.
+        cache (MatchCache): Optional cache of scores per (scorer, threshold, query, choice).
+        top_k (int): If set, also return a candidates column with the top_k best pairs of each row
+            at or above threshold, see batch_fuzzy_match.
+        scorer (str): Scorer name, see scorers.SCORERS (default 'ratio').
+        prefilter (bool): Skip the pairs that cannot reach the threshold (default True), counted
+            in stats['prefilter_pruned'].
+
+        Returns:
+        pd.DataFrame: Best match per df2 row with candidates, in df2 order, in the same layout as fuzzy_match.
+        """
+        scorer_func = get_scorer(scorer)
+        rows2 = np.asarray(pairs[0], dtype=np.int64)
+        rows1 = np.asarray(pairs[1], dtype=np.int64)
+        queries = df2[key2].to_numpy(dtype=object)[rows2]
+        choices = df1[key1].to_numpy(dtype=object)[rows1]
+        valid = pd.notna(queries) & pd.notna(choices)
+
+        scores = np.zeros(len(rows2), dtype=np.float64)
+        if valid.any():
+            query_codes, query_uniques = pd.factorize(queries[valid])
+            choice_codes, choice_uniques = pd.factorize(choices[valid])
+            pair_codes = query_codes.astype(np.int64) * len(choice_uniques) + choice_codes
+            _, first, inverse = np.unique(pair_codes, return_index=True, return_inverse=True)
+            if stats is not None:
+                stats['scorer_calls'] += len(first)
+                stats['scorer_calls_without_dedup'] += len(pair_codes)
+            unique_queries, unique_choices = queries[valid][first].tolist(), choices[valid][first].tolist()
+
+            def pair_scores(batch_queries, batch_choices):
+                # Pruned pairs score 0, as score_cutoff would report them
+                batch_scores = np.zeros(len(batch_queries), dtype=np.float64)
+                keep = np.ones(len(batch_queries), dtype=bool)
+                if prefilter:
+                    keep = pair_mask(scorer, batch_queries, batch_choices, threshold)
+                    if stats is not None:
+                        stats['prefilter_pruned'] += int((~keep).sum())
+                kept = np.flatnonzero(keep).tolist()
+                if kept:
+                    batch_scores[keep] = process.cpdist(
+                        [batch_queries[pair] for pair in kept], [batch_choices[pair] for pair in kept],
+                        scorer=scorer_func, score_cutoff=threshold, dtype=np.float64, workers=workers
+                    )
+                return batch_scores
+
+            if cache is None:
+                unique_scores = pair_scores(unique_queries, unique_choices)
+            else:
+                unique_scores = np.array(cache.lookup(
+                    'pair_score',
+                    [(scorer, threshold, query, choice) for query, choice in zip(unique_queries, unique_choices)],
+                    lambda missing: pair_scores([key[2] for key in missing], [key[3] for key in missing]).tolist()
+                ), dtype=np.float64)
+            scores[valid] = unique_scores[inverse.ravel()]
+
+        # Per df2 row: valid pairs first, then highest score, then lowest df1 position
+        order = np.lexsort((rows1, -scores, ~valid, rows2))
+        rows2, rows1, scores, valid, choices = rows2[order], rows1[order], scores[order], valid[order], choices[order]
+        first = np.r_[True, rows2[1:] != rows2[:-1]]
+        group = np.cumsum(first) - 1
+        best = np.flatnonzero(first)
+        matched = valid[best] & (scores[best] >= threshold)
+
+        ids = df1[id_col].to_numpy(dtype=object)
+        customer_ids = ids[rows1[best]]
+        if tie_break != 'first':
+            tied = first | (valid & (scores == scores[best][group]) & (choices == choices[best][group]))
+            tied_groups, tied_rows1 = group[tied], rows1[tied]
+            if tie_break == 'priority':
+                priority = pd.to_numeric(df1[priority_col], errors='coerce').to_numpy(dtype=np.float64)[tied_rows1]
+                pick = np.lexsort((tied_rows1, -np.nan_to_num(priority, nan=-np.inf), tied_groups))
+                pick = pick[np.r_[True, tied_groups[pick][1:] != tied_groups[pick][:-1]]]
+                customer_ids = ids[tied_rows1[pick]]
+            else:
+                starts = np.flatnonzero(np.r_[True, tied_groups[1:] != tied_groups[:-1]])
+                customer_ids = np.empty(len(best), dtype=object)
+                customer_ids[:] = [list(group_ids) for group_ids in np.split(ids[tied_rows1], starts[1:])]
+
+        candidates = None
+        if top_k:
+            # Pairs are sorted best first within each row; the best one carries the resolved id
+            rank = np.arange(len(rows2)) - best[group]
+            candidate_ids = ids[rows1].astype(object)
+            candidate_ids[best] = customer_ids
+            candidates = np.empty(len(best), dtype=object)
+            candidates[:] = [[] for _ in range(len(best))]
+            for pair in np.flatnonzero(valid & (scores >= threshold) & (rank < top_k)).tolist():
+                candidates[group[pair]].append((candidate_ids[pair], choices[pair], float(scores[pair])))
+
+        return FuzzyMatcher._build_match_frame(
+            df2.index.to_numpy()[rows2[best]], choices[best], customer_ids,
+            np.arange(len(best)), scores[best], matched, candidates
+        )
+
+    def _fuzzy_match(self, df1, df2, key1, key2, threshold, scorer='ratio'):
+        """
+        Dispatch to the configured scoring engine.
+        """
+        id_kwargs = dict(id_col=self.id_col, tie_break=self.tie_break, priority_col=self.priority_col,
+                         stats=self.stats, cache=self.cache, top_k=self.top_k, scorer=scorer)
+        if self.scoring == 'loop':
+            return self.fuzzy_match(df1, df2, key1, key2, threshold=threshold, **id_kwargs)
+        return self.batch_fuzzy_match(df1, df2, key1, key2, threshold=threshold, workers=self.workers,
+                                      max_cells=self.max_cells, prefilter=self.prefilter, **id_kwargs)
+
+    @staticmethod
+    def clean_address_series(addresses):
+        """
+        Clean addresses: missing values become '', punctuation is removed, text is lowercased
+        and stripped.
+        """
+        return addresses.fillna('').str.translate(ADDRESS_TRANSLATION).str.lower().str.strip()
+
     def address_cleaner(self):
         """
         Clean address columns in both dataframes.
         """
-        if self.address_col1 and self.address_col2:
-            self.df1[self.address_col1] = self.df1[self.address_col1].fillna('')
-            self.df2[self.address_col2] = self.df2[self.address_col2].fillna('')
-
-            # Remove punctuation and convert to lowercase
-            self.df1[self.address_col1] = self.df1[self.address_col1].str.translate(str.maketrans('', '', string.punctuation)).str.lower()
-            self.df2[self.address_col2] = self.df2[self.address_col2].str.translate(str.maketrans('', '', string.punctuation)).str.lower()
-            # Remove leading and trailing whitespace
-            self.df1[self.address_col1] = self.df1[self.address_col1].str.strip()
-            self.df2[self.address_col2] = self.df2[self.address_col2].str.strip()
+        if self._configured(self.address_col1, self.address_col2):
+            for df, address_col in self._clean_targets(self.address_col1, self.address_col2):
+                df[address_col] = self._cached_clean(
+                    df[address_col], 'normalize:address', self.clean_address_series, keep_dtype=True
+                )
             # Only log once for address cleaning
             logging.warning(f"Address columns '{self.address_col1}' and '{self.address_col2}' cleaned.")
         else:
@@ -209,130 +1077,1123 @@ class FuzzyMatcher:
         Process the dataframes by cleaning zip codes, customer names, and optionally latitude/longitude.
         """
         logging.warning("Starting fuzzy matching preprocessing...")
-        if self.zip_col1 and self.zip_col2:
+        if self.compact:
+            self._project_inputs()
+        if self._configured(self.zip_col1, self.zip_col2):
             self.zip_code_cleaner()
-        if self.name_col1 and self.name_col2:
+        if self._configured(self.name_col1, self.name_col2):
             self.customer_name_cleaner()
-        if self.lat_col1 and self.long_col1 and self.lat_col2 and self.long_col2:
+        if self._configured((self.lat_col1, self.long_col1), (self.lat_col2, self.long_col2)):
             self.lat_long_cleaner()
-        if self.address_col1 and self.address_col2:
+        if self._configured(self.address_col1, self.address_col2):
             self.address_cleaner()
+        if self.compact:
+            for df, cols in self._clean_targets((self.zip_col1, self.name_col1, self.address_col1),
+                                                (self.zip_col2, self.name_col2, self.address_col2)):
+                for col in cols:
+                    if col:
+                        df[col] = self.share_strings(df[col])
+        self.processed = True
         logging.warning("Preprocessing complete.")
 
-    def match(self, keep_all=False):
+    def _project_inputs(self):
         """
-        Perform optimized fuzzy matching:
-        1. Match by postal code.
-        2. Check for exact latitude/longitude matches and run fuzzy matcher at a high threshold on customer names.
-        3. Handle remaining matches by combining address and customer description columns.
-        4. Run remaining unmatched records through fuzzy matcher on customer names.
+        Compact mode: replace df1 and df2 by projections of their matching columns, so that
+        cleaning never writes to (or copies) the caller's frames.
+        """
+        if self.customer_index is None:
+            cols1 = [self.zip_col1, self.name_col1, self.address_col1, self.lat_col1, self.long_col1,
+                     self.id_col, self.priority_col]
+            self.df1 = pd.DataFrame({c: self.df1[c] for c in dict.fromkeys(cols1) if c and c in self.df1})
+        if self.df2 is not None:
+            self.df2_input = self.df2
+            cols2 = [self.zip_col2, self.name_col2, self.address_col2, self.lat_col2, self.long_col2]
+            self.df2 = pd.DataFrame({c: self.df2[c] for c in dict.fromkeys(cols2) if c})
+
+    @staticmethod
+    def share_strings(series):
+        """
+        Make equal strings of an object or string-dtype Series one shared object, so that repeated
+        values (postal codes, chain names) are stored once. The result has object dtype, with
+        missing values as None. Other dtypes are returned unchanged.
 
         Parameters:
-        keep_all (bool): If True, return all rows from df2 with match info (default: False, only matched rows).
+        series (pd.Series): Column to compact.
 
         Returns:
-        pd.DataFrame: Dataframe with matches for each entry.
+        pd.Series: Series with the same values.
         """
-        logging.warning("Starting fuzzy matching process...")
-        # Step 1: Clean and prepare the dataframes
-        self.process()
+        if not pd.api.types.is_string_dtype(series.dtype):
+            return series
+        codes, uniques = pd.factorize(series)
+        values = np.full(len(series), None, dtype=object)
+        present = codes >= 0
+        values[present] = np.asarray(uniques, dtype=object)[codes[present]]
+        # object dtype explicitly, as pandas' string inference would store the values again
+        return pd.Series(values, index=series.index, name=series.name, dtype=object)
 
-        # Add a column to track matched rows
-        self.df2['is_matched'] = False
+    def build_blocks(self):
+        """
+        Partition both dataframes by postal code in a single pass.
 
-        # Initialize a list to store results
-        result_dfs = []
+        Returns:
+        list: (postal_code, df1_positions, df2_positions) tuples for every postal code present
+            in both dataframes, in df1 order. Positions are integer row positions.
+        """
+        df1_groups = self.df1_blocks()
+        df2_groups = self.df2.groupby(self.zip_col2, sort=False).indices
+        if len(df2_groups) < len(df1_groups):
+            # Few df2 postal codes (e.g. single-record lookups): look them up instead of scanning
+            # every df1 block; ordering by first df1 row keeps df1 order
+            shared = sorted((postal_code for postal_code in df2_groups if postal_code in df1_groups),
+                            key=lambda postal_code: df1_groups[postal_code][0])
+        else:
+            shared = [postal_code for postal_code in df1_groups if postal_code in df2_groups]
+        return [(postal_code, df1_groups[postal_code], df2_groups[postal_code]) for postal_code in shared]
+
+    def sub_block_key(self, key, work, side):
+        """
+        Secondary blocking key of every row of a working frame.
 
-        # Step 2: Match by postal code
-        postal_codes = self.df1[self.zip_col1].unique()
-        # Use tqdm for progress bar if available
-        if tqdm:
-            postal_iter = tqdm(postal_codes, desc="Matching by postal code")
+        Parameters:
+        key (str): One of SUB_BLOCK_KEYS.
+        work (pd.DataFrame): df1 or df2 working columns.
+        side (int): 1 for df1, 2 for df2.
+
+        Returns:
+        np.ndarray: Object array of keys, None where the row has none.
+        """
+        cols = {name[:-1]: getattr(self, name) for name in SUB_BLOCK_KEYS[key] if name.endswith(str(side))}
+        if key == 'name_token':
+            values = work[cols['name_col']].str.split(n=1).str[0]
+        elif key == 'street_number':
+            values = work[cols['address_col']].str.extract(r'^\s*(\d+)', expand=False)
         else:
-            postal_iter = postal_codes
+            lat = pd.to_numeric(work[cols['lat_col']], errors='coerce').to_numpy(dtype=np.float64)
+            long = pd.to_numeric(work[cols['long_col']], errors='coerce').to_numpy(dtype=np.float64)
+            cell_deg = self.sub_block_grid_m / 111_320
+            with np.errstate(invalid='ignore'):
+                cells = np.floor(lat / cell_deg) * 10_000_000 + np.floor(long * np.cos(np.radians(lat)) / cell_deg)
+            values = pd.Series(cells)
+        keys = values.to_numpy(dtype=object)
+        keys[values.isna().to_numpy(dtype=bool)] = None
+        return keys
 
-        for postal_code in postal_iter:
-            df1_subset = self.df1[self.df1[self.zip_col1] == postal_code]
-            df2_subset = self.df2[(self.df2[self.zip_col2] == postal_code) & (~self.df2['is_matched'])]
+    def sub_blocks(self, blocks, df1_work, df2_work):
+        """
+        Split postal blocks with more than max_block_size df1 rows on the secondary keys of
+        sub_block_keys, trying the next key while a sub-block is still too large.
 
-            if df2_subset.empty:
-                continue
+        A df2 row is then only compared with the df1 rows of its block that share its key, so
+        all-pairs work drops from block² to the sum of sub-block²; a df2 row whose key differs
+        from that of its true customer (e.g. a typo in the first word) can no longer match it
+        in this stage (see sub_block_audit). df2 rows without a key are compared with the whole
+        block.
 
-            # Step 3: Exact Latitude/Longitude Matches
-            if self.lat_col1 and self.long_col1 and self.lat_col2 and self.long_col2:
-                for (lat, long), df1_latlong_group in df1_subset.groupby([self.lat_col1, self.long_col1]):
+        Returns:
+        tuple: (blocks with the large ones replaced by their sub-blocks, list of the blocks that
+            were split).
+        """
+        if not self.max_block_size:
+            return blocks, []
+        key_values = {}
 
-                    df2_latlong_group = df2_subset[
-                        (df2_subset[self.lat_col2] == lat) & (df2_subset[self.long_col2] == long)
-                    ]
+        def keys_of(key):
+            if key not in key_values:
+                key_values[key] = (self.sub_block_key(key, df1_work, 1), self.sub_block_key(key, df2_work, 2))
+            return key_values[key]
 
-                    if df2_latlong_group.empty:
-                        continue
+        def split(block, level):
+            label, df1_positions, df2_positions = block
+            if len(df1_positions) <= self.max_block_size or level == len(self.sub_block_keys):
+                return [block]
+            keys1, keys2 = keys_of(self.sub_block_keys[level])
+            codes, _ = pd.factorize(np.concatenate([keys1[df1_positions], keys2[df2_positions]]))
+            codes1, codes2 = codes[:len(df1_positions)], codes[len(df1_positions):]
+            groups1 = pd.Series(codes1).groupby(codes1).indices
+            parts = []
+            no_key = df2_positions[codes2 < 0]
+            if len(no_key):
+                parts.append(((label, None), df1_positions, no_key))
+            for code, rows2 in pd.Series(codes2).groupby(codes2).indices.items():
+                if code >= 0 and code in groups1:
+                    parts.extend(split(((label, code), df1_positions[groups1[code]], df2_positions[rows2]), level + 1))
+            return parts
+
+        result, split_blocks = [], []
+        for block in blocks:
+            parts = split(block, 0)
+            if len(parts) != 1 or parts[0] is not block:
+                split_blocks.append(block)
+                self.stats['sub_blocks'] += len(parts)
+                self.stats['sub_block_pairs_before'] += len(block[1]) * len(block[2])
+                self.stats['sub_block_pairs_after'] += sum(len(part[1]) * len(part[2]) for part in parts)
+            result.extend(parts)
+        self.stats['sub_blocked_blocks'] += len(split_blocks)
+        return result, split_blocks
+
+    def _audit_sub_blocks(self, split_blocks, df1_work, df2_work, matched, use_lat_long):
+        """
+        Rematch a sample of sub_block_audit df2 rows of the split blocks against their whole
+        postal block and count the matches sub-blocking lost, as an estimate of its recall.
+        """
+        candidates = np.concatenate([df2_positions for _, _, df2_positions in split_blocks])
+        sample = np.random.default_rng(0).choice(candidates, size=min(self.sub_block_audit, len(candidates)), replace=False)
+        auditor = copy.copy(self)
+        auditor.stats, auditor.cache, auditor.top_k = Counter(), None, None
+        full_matches = lost = 0
+        for _, df1_positions, df2_positions in split_blocks:
+            rows = df2_positions[np.isin(df2_positions, sample)]
+            if len(rows):
+                _, block_matched = auditor._match_block(df1_work.iloc[df1_positions], df2_work.iloc[rows], False, use_lat_long)
+                full_matches += int(block_matched.sum())
+                lost += int((block_matched & ~matched[rows]).sum())
+        self.stats['sub_block_audit_rows'] += len(sample)
+        self.stats['sub_block_audit_matches'] += full_matches
+        self.stats['sub_block_audit_lost'] += lost
+        recall = 1 - lost / full_matches if full_matches else 1.0
+        logging.warning(
+            f"Sub-blocking audit: {lost} of {full_matches} whole-block matches of {len(sample)} sampled rows lost "
+            f"(estimated recall {recall:.1%})."
+        )
+
+    def shard(self, num_shards, shard_id):
+        """
+        Restrict the matcher to the postal blocks whose stable hash maps to shard_id, cleaning the
+        dataframes first if needed.
+
+        df2 keeps only the rows of the shard's postal codes, plus a SHARD_POSITION_COL column with
+        their position in the full df2, so that merge_partials can put the shard results back in
+        single-node order. df1 keeps only the shard's postal blocks too, unless a stage looks
+        beyond a row's own block (block_levels, geohash_precision, name_fallback) or df1 is a
+        prebuilt index; the shard's rows are then matched against all of df1. Either way, the
+        merged shard results equal those of a single match() run.
+
+        Parameters:
+        num_shards (int): Number of shards.
+        shard_id (int): Shard to keep, 0 to num_shards - 1.
+        """
+        if not 0 <= shard_id < num_shards:
+            raise ValueError(f"shard_id must be between 0 and {num_shards - 1}, got {shard_id}.")
+        if not self.processed:
+            self.process()
+        positions = np.flatnonzero(shard_of(self.df2[self.zip_col2], num_shards) == shard_id)
+        self.df2 = self.df2.iloc[positions].copy()
+        self.df2[SHARD_POSITION_COL] = positions
+        if self.compact:
+            self.df2_input = self.df2_input.iloc[positions].copy()
+            self.df2_input[SHARD_POSITION_COL] = positions
+        if self.customer_index is None and not (self.block_levels or self.geohash_precision or self.name_fallback):
+            self.df1 = self.df1[shard_of(self.df1[self.zip_col1], num_shards) == shard_id]
+        logging.warning(f"Shard {shard_id} of {num_shards}: {len(self.df1)} df1 rows, {len(self.df2)} df2 rows.")
+
+    def df1_blocks(self):
+        """
+        Returns:
+        dict: Postal code -> integer positions of its df1 rows, with postal codes in df1 order.
+        """
+        if self.customer_index is not None:
+            # Prebuilt blocks are contiguous slices, already in df1 order
+            return self.customer_index.blocks()
+        groups = self.df1.groupby(self.zip_col1, sort=False).indices
+        return {postal_code: groups[postal_code] for postal_code in self.df1[self.zip_col1].dropna().unique()}
+
+    def _working_frames(self):
+        """
+        Build positional (RangeIndex) copies of the columns used for scoring, including the
+        combined address and customer description key when addresses are configured.
+        """
+        cols1 = [self.zip_col1, self.name_col1, self.lat_col1, self.long_col1, self.address_col1,
+                 self.id_col, self.priority_col]
+        cols2 = [self.zip_col2, self.name_col2, self.lat_col2, self.long_col2, self.address_col2]
+        use_address = self._configured(self.address_col1, self.address_col2)
+        if self.customer_index is not None:
+            # The index already holds the cleaned working columns
+            df1_work = self.df1
+        else:
+            df1_work = self.df1[list(dict.fromkeys(c for c in cols1 if c))].reset_index(drop=True)
+            if use_address:
+                df1_work['address_customer_desc'] = (
+                    df1_work[self.name_col1].fillna('') + ' ' + df1_work[self.address_col1].fillna('')
+                )
+                if self.compact:
+                    df1_work['address_customer_desc'] = self.share_strings(df1_work['address_customer_desc'])
+        if self.df2 is None:
+            return df1_work, None
+
+        df2_work = self.df2[list(dict.fromkeys(c for c in cols2 if c))].reset_index(drop=True)
+        if use_address:
+            df2_work['address_customer_desc'] = (
+                df2_work[self.name_col2].fillna('') + ' ' + df2_work[self.address_col2].fillna('')
+            )
+            if self.compact:
+                df2_work['address_customer_desc'] = self.share_strings(df2_work['address_customer_desc'])
+        return df1_work, df2_work
+
+    @classmethod
+    def build_customer_index(cls, df1, zip_col1, name_col1, address_col1=None, lat_col1=None, long_col1=None,
+                             id_col='CUSTOMER_ID', priority_col=None, lat_long_tolerance=0.01, radius_m=None,
+                             vectorized=True):
+        """
+        Clean the customer master once and package its working columns as a CustomerIndex,
+        which can be saved with CustomerIndex.save and reused by from_index in later runs.
+
+        Parameters:
+        df1 (pd.DataFrame): Raw customer master; cleaned in place like in match().
+        lat_long_tolerance (float): Decimal places coordinates are rounded to, as in __init__.
+        radius_m (float): Build for radius matching (coordinates are not rounded).
+        Other parameters are the df1 column names, as in __init__.
+
+        Returns:
+        CustomerIndex: The cleaned, postal-code grouped customer master.
+        """
+        matcher = cls(
+            df1, None, zip_col1, None, name_col1, None,
+            address_col1=address_col1, lat_col1=lat_col1, long_col1=long_col1,
+            lat_long_tolerance=lat_long_tolerance, id_col=id_col, priority_col=priority_col,
+            radius_m=radius_m, vectorized=vectorized
+        )
+        matcher.process()
+        df1_work, _ = matcher._working_frames()
+        config = {
+            'zip_col1': zip_col1,
+            'name_col1': name_col1,
+            'address_col1': address_col1,
+            'lat_col1': lat_col1 if lat_col1 and long_col1 else None,
+            'long_col1': long_col1 if lat_col1 and long_col1 else None,
+            'id_col': id_col,
+            'priority_col': priority_col,
+            'lat_long_tolerance': lat_long_tolerance,
+            'radius_m': radius_m,
+            'lat_long_decimal_places': matcher.lat_long_decimal_places(),
+        }
+        return CustomerIndex.from_cleaned(df1_work, config)
+
+    @classmethod
+    def from_index(cls, customer_index, df2, zip_col2, name_col2, **kwargs):
+        """
+        Create a matcher for df2 against a prebuilt CustomerIndex, taking the df1 column names
+        and coordinate settings from the index.
+
+        Parameters:
+        customer_index (CustomerIndex): Index built by build_customer_index (or loaded from disk).
+        df2 (pd.DataFrame): Rows to match.
+        zip_col2 (str): Zip code column in df2.
+        name_col2 (str): Customer name column in df2.
+        **kwargs: Other FuzzyMatcher arguments (df2 columns, threshold, n_jobs, ...).
+
+        Returns:
+        FuzzyMatcher: The matcher; only df2 is cleaned by match().
+        """
+        config = customer_index.config
+        for key in ('address_col1', 'lat_col1', 'long_col1', 'id_col', 'priority_col', 'lat_long_tolerance', 'radius_m'):
+            kwargs.setdefault(key, config[key])
+        return cls(customer_index, df2, config['zip_col1'], zip_col2, config['name_col1'], name_col2, **kwargs)
+
+    @classmethod
+    def match_chunks(cls, customer_index, chunks, zip_col2, name_col2, keep_all=False, top_k=None, stats=None,
+                     **kwargs):
+        """
+        Stream df2 chunks against a resident CustomerIndex, yielding the match result of each
+        chunk as soon as it is ready.
+
+        Every df2 row is scored only against its own postal block, independently of the other
+        df2 rows, so chunking does not change which customer a row is matched to. Memory stays
+        bounded by the index plus one chunk.
+
+        Parameters:
+        customer_index (CustomerIndex): Index built by build_customer_index (or loaded from disk).
+        chunks (iterable): DataFrames of df2 rows, e.g. pd.read_csv(..., chunksize=n).
+        zip_col2 (str): Zip code column in df2.
+        name_col2 (str): Customer name column in df2.
+        keep_all (bool): Passed to match().
+        top_k (int): Passed to match().
+        stats (collections.Counter): If given, the stats of every chunk's run are added to it, see
+            profile().
+        **kwargs: Other FuzzyMatcher arguments, as for from_index.
+
+        Yields:
+        pd.DataFrame: The match() result of each chunk.
+        """
+        for chunk in chunks:
+            matcher = cls.from_index(customer_index, chunk, zip_col2, name_col2, **kwargs)
+            result = matcher.match(keep_all=keep_all, top_k=top_k)
+            if stats is not None:
+                stats.update(matcher.stats)
+            yield result
 
-                    # Perform fuzzy matching on customer names for exact matches
-                    exact_matches_result = self.fuzzy_match(
-                        df1_latlong_group, df2_latlong_group,
-                        self.name_col1, self.name_col2,
-                        threshold=80
+    @classmethod
+    def dedupe(cls, df1, zip_col1, name_col1, address_col1=None, lat_col1=None, long_col1=None, threshold=90,
+               id_col='CUSTOMER_ID', geohash_precision=None, workers=-1, max_cells=MAX_SCORE_CELLS,
+               vectorized=True, stats=None):
+        """
+        Cluster duplicate customers within a single customer master.
+
+        Rows are only compared within their postal block (or geohash cell), and each unordered
+        pair of distinct keys in a block is scored once, never against itself, so the work is
+        the sum of block² / 2 rather than N². Rows with equal keys are duplicates outright.
+        Matching pairs are merged into clusters with a union-find.
+
+        Parameters:
+        df1 (pd.DataFrame): Customer master; cleaned in place like in match().
+        threshold (int): Minimum score for two customers to be duplicates (default 90).
+        geohash_precision (int): If set, block on the geohash cell of lat_col1/long_col1 at this
+            precision instead of on postal code.
+        workers (int): Number of threads used by cdist (-1 uses all cores).
+        max_cells (int): Maximum number of cells in a single score matrix.
+        stats (collections.Counter): Optional counter updated with the 'dedupe' stage timings and
+            scorer calls, see instrumentation.timed_stage.
+        Other parameters are the df1 column names, as in __init__.
+
+        Returns:
+        pd.DataFrame: id_col, cluster_id (id of the cluster's first row in df1 order) and
+            cluster_size of every df1 row, in df1 order.
+        """
+        if geohash_precision is not None and not (lat_col1 and long_col1):
+            raise ValueError("Geohash blocking needs lat_col1 and long_col1.")
+        matcher = cls(
+            df1, None, zip_col1, None, name_col1, None,
+            address_col1=address_col1, threshold=threshold, workers=workers, id_col=id_col, vectorized=vectorized
+        )
+        stats = Counter() if stats is None else stats
+        with timed_stage(stats, 'dedupe', rows_in=len(df1)):
+            matcher.process()
+            df1_work, _ = matcher._working_frames()
+            key = 'address_customer_desc' if address_col1 else name_col1
+            keys = df1_work[key].to_numpy(dtype=object, copy=True)
+            # Customers without a name are never duplicates, whatever their address
+            keys[df1_work[name_col1].isna().to_numpy(dtype=bool)] = None
+            if geohash_precision is not None:
+                block_keys = geohash(
+                    pd.to_numeric(df1[lat_col1], errors='coerce'), pd.to_numeric(df1[long_col1], errors='coerce'),
+                    geohash_precision
+                )
+            else:
+                block_keys = df1_work[zip_col1].to_numpy(dtype=object)
+
+            clusters = UnionFind(len(df1_work))
+            for positions in pd.Series(block_keys).groupby(block_keys, sort=False).indices.values():
+                positions = positions[pd.notna(keys[positions])]
+                codes, uniques = pd.factorize(keys[positions])
+                first_positions = positions[np.unique(codes, return_index=True)[1]]
+                # Rows sharing a key join the first row with that key
+                clusters.union_many(positions, first_positions[codes])
+
+                uniques = list(uniques)
+                start = 0
+                while start < len(uniques) - 1:
+                    # A chunk scores at most chunk * (keys from start on) cells, see below
+                    end = min(len(uniques), start + max(1, max_cells // (len(uniques) - start)))
+                    # Keys of the chunk against every later key
+                    if end < len(uniques):
+                        scores = process.cdist(
+                            uniques[start:end], uniques[end:],
+                            scorer=fuzz.ratio, score_cutoff=threshold, dtype=np.float64, workers=workers
+                        )
+                        stats['scorer_calls'] += scores.size
+                        rows, cols = np.nonzero(scores >= threshold)
+                        clusters.union_many(first_positions[start + rows], first_positions[end + cols])
+                    # The strict upper triangle of the chunk against itself
+                    if end - start > 1:
+                        rows, cols = np.triu_indices(end - start, 1)
+                        scores = process.cpdist(
+                            [uniques[start + row] for row in rows.tolist()],
+                            [uniques[start + col] for col in cols.tolist()],
+                            scorer=fuzz.ratio, score_cutoff=threshold, dtype=np.float64, workers=workers
+                        )
+                        stats['scorer_calls'] += len(scores)
+                        hits = scores >= threshold
+                        clusters.union_many(first_positions[start + rows[hits]], first_positions[start + cols[hits]])
+                    start = end
+
+            roots = clusters.roots()
+            ids = df1_work[id_col].to_numpy()
+            result = pd.DataFrame({
+                id_col: ids,
+                'cluster_id': ids[roots],
+                'cluster_size': np.bincount(roots, minlength=len(roots))[roots],
+            })
+            stats[('dedupe', 'rows_out')] += len(result)
+            return result
+
+    def _check_customer_index(self):
+        """
+        Validate that a prebuilt CustomerIndex is compatible with this matcher's configuration.
+        """
+        config = self.customer_index.config
+        if config['lat_long_decimal_places'] != self.lat_long_decimal_places():
+            raise ValueError(
+                f"Customer index coordinates were cleaned with {config['lat_long_decimal_places']} decimal places "
+                f"but this matcher uses {self.lat_long_decimal_places()}. Rebuild the index with the same "
+                "lat_long_tolerance/radius_m."
+            )
+        for key in ('zip_col1', 'name_col1', 'address_col1', 'lat_col1', 'long_col1', 'id_col', 'priority_col'):
+            value = getattr(self, key)
+            if value and value != config[key]:
+                raise ValueError(f"{key}='{value}' is not available in the customer index (built with '{config[key]}').")
+
+    def _match_block(self, df1_subset, df2_subset, keep_all, use_lat_long):
+        """
+        Run the lat/long and address stages for a single postal-code block.
+
+        Candidates and matched state never leave the block: a df2 row can only be matched to a
+        df1 row with the same postal code.
+
+        Parameters:
+        df1_subset (pd.DataFrame): df1 working rows of the block.
+        df2_subset (pd.DataFrame): df2 working rows of the block, indexed by df2 position.
+        keep_all (bool): If True, keep unmatched rows of the lat/long stage in the results.
+        use_lat_long (bool): Whether the lat/long stage runs.
+
+        Returns:
+        tuple: (list of result DataFrames, boolean matched array aligned with df2_subset).
+        """
+        result_dfs = []
+        df2_positions = df2_subset.index.to_numpy()
+        block_matched = np.zeros(len(df2_subset), dtype=bool)
+
+        def mark_matched(result):
+            matched_positions = result['df2_index'][result['is_matched']].to_numpy(dtype=np.int64)
+            block_matched[np.searchsorted(df2_positions, matched_positions)] = True
+
+        if use_lat_long:
+            with self._matched_stage('lat_long', block_matched, len(df2_subset)):
+                # Step 3: Latitude/Longitude Matches within radius_m
+                if self.radius_m:
+                    index = GridIndex(
+                        pd.to_numeric(df1_subset[self.lat_col1], errors='coerce'),
+                        pd.to_numeric(df1_subset[self.long_col1], errors='coerce'),
+                        self.radius_m
                     )
-                    exact_matches_result['match_type'] = 'lat-long'
+                    lat2 = np.asarray(pd.to_numeric(df2_subset[self.lat_col2], errors='coerce'), dtype=np.float64)
+                    long2 = np.asarray(pd.to_numeric(df2_subset[self.long_col2], errors='coerce'), dtype=np.float64)
+                    # A df2 row has at most one pair per df1 row, so row chunks bound the pair arrays
+                    # of a dense block, which otherwise dominate peak memory
+                    step = max(1, self.max_radius_pairs // max(len(df1_subset), 1))
+                    for start in range(0, len(df2_subset), step):
+                        pairs2, pairs1, _ = index.query_radius(lat2[start:start + step], long2[start:start + step])
+                        if not len(pairs2):
+                            continue
+                        radius_matches_result = self.pairwise_fuzzy_match(
+                            df1_subset, df2_subset.iloc[start:start + step], self.name_col1, self.name_col2,
+                            (pairs2, pairs1), threshold=self.stage_thresholds['lat_long'], id_col=self.id_col,
+                            tie_break=self.tie_break,
+                            priority_col=self.priority_col, workers=self.workers, stats=self.stats,
+                            cache=self.cache, top_k=self.top_k, scorer=self.stage_scorers['lat_long'],
+                            prefilter=self.prefilter
+                        )
+                        radius_matches_result['match_type'] = 'lat-long'
+
+                        # if keep_all keep all rows if not only keep matched rows
+                        if not keep_all:
+                            radius_matches_result = radius_matches_result[radius_matches_result['is_matched']]
 
-                    # if keep_all keep all rows if not only keep matched rows
-                    if not keep_all:
-                        exact_matches_result = exact_matches_result[exact_matches_result['is_matched']]
+                        result_dfs.append(radius_matches_result)
+                        mark_matched(radius_matches_result)
 
-                    result_dfs.append(exact_matches_result)
+                # Step 3: Exact Latitude/Longitude Matches
+                else:
+                    df2_latlong_groups = df2_subset.groupby([self.lat_col2, self.long_col2]).indices
+                    for (lat, long), df1_latlong_group in df1_subset.groupby([self.lat_col1, self.long_col1]):
+                        if (lat, long) not in df2_latlong_groups:
+                            continue
+                        df2_latlong_group = df2_subset.iloc[df2_latlong_groups[(lat, long)]]
 
-                    # Mark matched rows in df2 using df2_index
-                    matched_ids = exact_matches_result['df2_index'][exact_matches_result['is_matched']].tolist()
-                    self.df2.loc[matched_ids, 'is_matched'] = True
+                        # Perform fuzzy matching on customer names for exact matches
+                        exact_matches_result = self._fuzzy_match(
+                            df1_latlong_group, df2_latlong_group,
+                            self.name_col1, self.name_col2,
+                            threshold=self.stage_thresholds['lat_long'], scorer=self.stage_scorers['lat_long']
+                        )
+                        exact_matches_result['match_type'] = 'lat-long'
 
-            # Step 4: Address and Customer Name Matching
-            if self.address_col1 and self.address_col2:
-                # Filter df2_subset to include only unmatched rows
-                df2_subset = self.df2[(~self.df2['is_matched'])]
+                        # if keep_all keep all rows if not only keep matched rows
+                        if not keep_all:
+                            exact_matches_result = exact_matches_result[exact_matches_result['is_matched']]
 
-                # Create combined address and customer description columns for fuzzy matching
-                df1_subset['address_customer_desc'] = (
-                    df1_subset[self.name_col1].fillna('') + ' ' + df1_subset[self.address_col1].fillna('')
+                        result_dfs.append(exact_matches_result)
+                        mark_matched(exact_matches_result)
+
+        # Step 4: Address and Customer Name Matching
+        if self.address_col1 and self.address_col2:
+            # Only the block's rows that are still unmatched
+            df2_remaining = df2_subset[~block_matched]
+            with self._matched_stage('address_zip', block_matched, len(df2_remaining)):
+                if not df2_remaining.empty:
+                    # Perform fuzzy matching
+                    address_matches_result = self._fuzzy_match(
+                        df1_subset, df2_remaining, 'address_customer_desc', 'address_customer_desc',
+                        threshold=self.stage_thresholds['address_zip'], scorer=self.stage_scorers['address_zip']
+                    )
+                    address_matches_result['match_type'] = 'address-zip'
+
+                    # Only keep matched rows
+                    address_matches_result = address_matches_result[address_matches_result['is_matched']]
+                    result_dfs.append(address_matches_result)
+                    mark_matched(address_matches_result)
+
+        return result_dfs, block_matched
+
+    def dedup_ratio(self):
+        """
+        Share of scorer calls the last match() run saved by scoring each distinct string once.
+
+        Returns:
+        float: 1 - scorer_calls / scorer_calls_without_dedup (0.0 if nothing was scored).
+        """
+        without_dedup = self.stats['scorer_calls_without_dedup']
+        if not without_dedup:
+            return 0.0
+        return 1 - self.stats['scorer_calls'] / without_dedup
+
+    @staticmethod
+    def balanced_chunks(costs, n_chunks):
+        """
+        Split blocks into n_chunks groups of similar total cost, assigning the most expensive
+        blocks first to the currently cheapest group.
+
+        Parameters:
+        costs (list): Estimated cost of each block.
+        n_chunks (int): Number of groups to build.
+
+        Returns:
+        list: Lists of block numbers, one per non-empty group, each in ascending block order.
+        """
+        heap = [(0, chunk) for chunk in range(max(1, n_chunks))]
+        chunks = [[] for _ in heap]
+        for block in sorted(range(len(costs)), key=lambda block: -costs[block]):
+            total, chunk = heapq.heappop(heap)
+            chunks[chunk].append(block)
+            heapq.heappush(heap, (total + costs[block], chunk))
+        return [sorted(chunk) for chunk in chunks if chunk]
+
+    def _run_blocks(self, blocks, df1_work, df2_work, keep_all, use_lat_long):
+        """
+        Match every block, serially or on a pool of n_jobs workers.
+
+        Serial runs visit the blocks largest first. In parallel mode blocks are grouped into
+        size-balanced chunks, submitted largest first, and each worker only receives the
+        working columns of its own blocks. Each df2 row belongs to a single block and match()
+        assembles the results by df2 row, so the visiting order does not change the output.
+
+        Yields:
+        tuple: (list of result DataFrames, matched array, df2 positions) for each block.
+        """
+        costs = [len(df1_positions) * len(df2_positions) for _, df1_positions, df2_positions in blocks]
+        if self.n_jobs == 1 or len(blocks) <= 1:
+            # Largest blocks first, so that they don't stall the end of the run
+            largest_first = [blocks[block] for block in sorted(range(len(blocks)), key=lambda block: -costs[block])]
+            block_iter = tqdm(largest_first, desc="Matching by postal code") if tqdm else largest_first
+            for _, df1_positions, df2_positions in block_iter:
+                block_results, block_matched = self._match_block(
+                    df1_work.iloc[df1_positions], df2_work.iloc[df2_positions], keep_all, use_lat_long
+                )
+                yield block_results, block_matched, df2_positions
+            return
+
+        # Workers get a frame-less copy of the matcher and score single-threaded
+        worker = copy.copy(self)
+        worker.df1 = worker.df2 = worker.df2_input = worker.customer_index = worker.executor = worker.cache = None
+        if self.cache is not None:
+            logging.warning("The match cache is not used for parallel block matching (n_jobs != 1); only cleaning is cached.")
+        worker.workers = 1 if self.executor != 'thread' else self.workers
+
+        chunks = self.balanced_chunks(costs, self.n_jobs * CHUNKS_PER_JOB)
+        # Submit the most expensive chunks first, so that a giant block does not start last
+        chunks.sort(key=lambda chunk: -sum(costs[block] for block in chunk))
+
+        if isinstance(self.executor, Executor):
+            pool = self.executor
+        elif self.executor == 'thread':
+            pool = ThreadPoolExecutor(max_workers=self.n_jobs)
+        else:
+            pool = ProcessPoolExecutor(max_workers=self.n_jobs)
+
+        block_outputs = [None] * len(blocks)
+        try:
+            futures = {
+                pool.submit(
+                    _match_block_chunk, worker,
+                    [(df1_work.iloc[blocks[block][1]], df2_work.iloc[blocks[block][2]]) for block in chunk],
+                    keep_all, use_lat_long
+                ): chunk
+                for chunk in chunks
+            }
+            done_iter = as_completed(futures)
+            if tqdm:
+                done_iter = tqdm(done_iter, total=len(futures), desc=f"Matching by postal code ({self.n_jobs} jobs)")
+            for future in done_iter:
+                chunk_outputs, chunk_stats = future.result()
+                self.stats.update(chunk_stats)
+                for block, output in zip(futures[future], chunk_outputs):
+                    block_outputs[block] = output
+        finally:
+            if pool is not self.executor:
+                pool.shutdown()
+
+        for (_, _, df2_positions), (block_results, block_matched) in zip(blocks, block_outputs):
+            yield block_results, block_matched, df2_positions
+
+    def block_centroids(self, df1_work, df1_groups):
+        """
+        Mean df1 coordinate of every postal block, kept on the customer index (if any).
+
+        Parameters:
+        df1_work (pd.DataFrame): df1 working columns.
+        df1_groups (dict): df1 postal blocks, see df1_blocks.
+
+        Returns:
+        tuple: (postal codes, latitudes, longitudes) arrays of the blocks with at least one
+            valid coordinate.
+        """
+        key = ('block_centroids', self.lat_col1, self.long_col1)
+        if self.customer_index is not None and key in self.customer_index.derived:
+            return self.customer_index.derived[key]
+
+        postal_codes = np.empty(len(df1_groups), dtype=object)
+        postal_codes[:] = list(df1_groups)
+        sizes = [len(group) for group in df1_groups.values()]
+        positions = np.concatenate([np.asarray(group, dtype=np.int64) for group in df1_groups.values()] or [np.empty(0, dtype=np.int64)])
+        block_numbers = np.repeat(np.arange(len(postal_codes)), sizes)
+        lat = pd.to_numeric(df1_work[self.lat_col1], errors='coerce').to_numpy(dtype=np.float64)[positions]
+        long = pd.to_numeric(df1_work[self.long_col1], errors='coerce').to_numpy(dtype=np.float64)[positions]
+        valid = ~(np.isnan(lat) | np.isnan(long))
+
+        counts = np.bincount(block_numbers[valid], minlength=len(postal_codes))
+        lat_sums = np.bincount(block_numbers[valid], weights=lat[valid], minlength=len(postal_codes))
+        long_sums = np.bincount(block_numbers[valid], weights=long[valid], minlength=len(postal_codes))
+        located = counts > 0
+        centroids = (postal_codes[located], lat_sums[located] / counts[located], long_sums[located] / counts[located])
+        if self.customer_index is not None:
+            self.customer_index.derived[key] = centroids
+        return centroids
+
+    def level_blocks(self, level, postal_codes, df1_groups, df1_work):
+        """
+        Candidate df1 blocks of each df2 postal code at a block level, nearest first. A postal
+        code's own block is never a candidate, since it was already scored.
+
+        Parameters:
+        level (str): 'zip3' or 'neighbour', see __init__.
+        postal_codes (list): df2 postal codes to find candidate blocks for.
+        df1_groups (dict): df1 postal blocks, see df1_blocks.
+        df1_work (pd.DataFrame): df1 working columns (coordinates for the 'neighbour' level).
+
+        Returns:
+        dict: df2 postal code -> list of df1 postal codes.
+        """
+        candidates = {postal_code: [] for postal_code in postal_codes}
+        if level == 'zip3':
+            by_prefix = {}
+            for code in df1_groups:
+                by_prefix.setdefault(code[:3], []).append(code)
+            for postal_code in postal_codes:
+                # Nearby postal codes are numerically close; equal distances keep df1 order
+                candidates[postal_code] = sorted(
+                    (code for code in by_prefix.get(postal_code[:3], []) if code != postal_code),
+                    key=lambda code: abs(int(code) - int(postal_code)) if (code + postal_code).isdecimal() else np.inf
                 )
-                df2_subset['address_customer_desc'] = (
-                    df2_subset[self.name_col2].fillna('') + ' ' + df2_subset[self.address_col2].fillna('')
+            return candidates
+
+        codes, lat, long = self.block_centroids(df1_work, df1_groups)
+        code_numbers = {code: number for number, code in enumerate(codes)}
+        anchors = [postal_code for postal_code in postal_codes if postal_code in code_numbers]
+        if not anchors:
+            return candidates
+        anchor_numbers = np.array([code_numbers[postal_code] for postal_code in anchors], dtype=np.int64)
+        queries, points, distances = GridIndex(lat, long, self.neighbour_radius_m).query_radius(
+            lat[anchor_numbers], long[anchor_numbers]
+        )
+        order = np.lexsort((points, distances, queries))
+        for query, point in zip(queries[order].tolist(), points[order].tolist()):
+            if point != anchor_numbers[query]:
+                candidates[anchors[query]].append(codes[point])
+        return candidates
+
+    def _match_block_levels(self, df1_work, df2_work, matched):
+        """
+        Retry the df2 rows their own postal block left unmatched against wider blocks, one
+        block level at a time.
+
+        At each level the remaining rows of a df2 postal code are scored against the df1 rows of
+        its candidate blocks, nearest blocks first and at most max_level_candidates rows, on the
+        combined address and customer description (customer name without addresses).
+
+        Parameters:
+        df1_work (pd.DataFrame): df1 working columns.
+        df2_work (pd.DataFrame): df2 working columns, indexed by df2 position.
+        matched (np.ndarray): Matched flag per df2 position; updated in place.
+
+        Returns:
+        list: Result DataFrames of matched rows, in the layout of fuzzy_match.
+        """
+        if 'neighbour' in self.block_levels and not (
+                self.lat_col1 in df1_work.columns and self.long_col1 in df1_work.columns):
+            raise ValueError("The 'neighbour' block level needs df1 coordinates (lat_col1 and long_col1).")
+        if self._configured(self.address_col1, self.address_col2):
+            key1 = key2 = 'address_customer_desc'
+        else:
+            key1, key2 = self.name_col1, self.name_col2
+
+        df1_groups = self.df1_blocks()
+        zip_codes = df2_work[self.zip_col2].to_numpy(dtype=object)
+        result_dfs = []
+        for level in self.block_levels:
+            remaining = np.flatnonzero(~matched & pd.notna(zip_codes))
+            if not len(remaining):
+                break
+            df2_groups = df2_work.iloc[remaining].groupby(self.zip_col2, sort=False).indices
+            level_blocks = self.level_blocks(level, list(df2_groups), df1_groups, df1_work)
+            for postal_code, group in df2_groups.items():
+                # Take whole blocks, nearest first, until the candidate budget is spent
+                candidate_blocks, n_candidates = [], 0
+                for code in level_blocks[postal_code]:
+                    if n_candidates >= self.max_level_candidates:
+                        break
+                    candidate_blocks.append(df1_groups[code])
+                    n_candidates += len(df1_groups[code])
+                if not candidate_blocks:
+                    continue
+                df1_positions = np.concatenate(candidate_blocks)[:self.max_level_candidates]
+
+                level_result = self._fuzzy_match(
+                    df1_work.iloc[df1_positions], df2_work.iloc[remaining[group]], key1, key2,
+                    threshold=self.level_thresholds[level], scorer=self.stage_scorers['block_levels']
                 )
+                level_result['match_type'] = BLOCK_LEVEL_MATCH_TYPES[level]
+                level_result = level_result[level_result['is_matched']]
+                matched[level_result['df2_index'].to_numpy(dtype=np.int64)] = True
+                result_dfs.append(level_result)
+        return result_dfs
+
+    def geohash_index(self, df1_work):
+        """
+        Geohash index over the df1 coordinates, kept on the customer index (if any).
+        """
+        key = ('geohash', self.lat_col1, self.long_col1, self.geohash_precision)
+        if self.customer_index is not None and key in self.customer_index.derived:
+            return self.customer_index.derived[key]
+        index = GeohashIndex(
+            pd.to_numeric(df1_work[self.lat_col1], errors='coerce'),
+            pd.to_numeric(df1_work[self.long_col1], errors='coerce'),
+            self.geohash_precision
+        )
+        if self.customer_index is not None:
+            self.customer_index.derived[key] = index
+        return index
+
+    def _match_geohash_blocks(self, df1_work, df2_work, matched):
+        """
+        Block the unmatched df2 rows without a usable postal code (missing, or not a df1 block)
+        on geohash cells and match them on customer name.
+
+        Each row is paired with the df1 rows in its own geohash cell and the 8 cells around it,
+        and the pairs are scored like the radius stage.
+
+        Parameters:
+        df1_work (pd.DataFrame): df1 working columns.
+        df2_work (pd.DataFrame): df2 working columns, indexed by df2 position.
+        matched (np.ndarray): Matched flag per df2 position; updated in place.
+
+        Returns:
+        pd.DataFrame: Matched rows in the layout of fuzzy_match, or None if there were none.
+        """
+        usable = df2_work[self.zip_col2].isin(list(self.df1_blocks())).to_numpy(dtype=bool)
+        candidates = np.flatnonzero(~matched & ~usable)
+        if not len(candidates):
+            return None
+        queries, pairs1 = self.geohash_index(df1_work).query_neighbours(
+            pd.to_numeric(df2_work[self.lat_col2], errors='coerce').to_numpy(dtype=np.float64)[candidates],
+            pd.to_numeric(df2_work[self.long_col2], errors='coerce').to_numpy(dtype=np.float64)[candidates]
+        )
+        recovered = 0
+        geohash_result = None
+        if len(queries):
+            geohash_result = self.pairwise_fuzzy_match(
+                df1_work, df2_work, self.name_col1, self.name_col2, (candidates[queries], pairs1),
+                threshold=self.geohash_threshold, id_col=self.id_col, tie_break=self.tie_break,
+                priority_col=self.priority_col, workers=self.workers, stats=self.stats, cache=self.cache,
+                top_k=self.top_k, scorer=self.stage_scorers['geohash'], prefilter=self.prefilter
+            )
+            geohash_result['match_type'] = 'geohash'
+            geohash_result = geohash_result[geohash_result['is_matched']]
+            matched[geohash_result['df2_index'].to_numpy(dtype=np.int64)] = True
+            recovered = len(geohash_result)
 
-                # Perform fuzzy matching
-                address_matches_result = self.fuzzy_match(
-                    df1_subset, df2_subset, 'address_customer_desc', 'address_customer_desc', threshold=85
+        self.stats['geohash_recovered'] += recovered
+        logging.warning(
+            f"Geohash blocking recovered {recovered} of {len(candidates)} unmatched rows without a usable postal code."
+        )
+        return geohash_result
+
+    def name_ngram_index(self, df1_work):
+        """
+        Trigram index over the df1 names, kept on the customer index (if any) so that repeat
+        runs against it only build it once.
+        """
+        if self.customer_index is None:
+            return NgramIndex(df1_work[self.name_col1].to_numpy(dtype=object))
+        key = ('name_ngrams', self.name_col1)
+        if key not in self.customer_index.derived:
+            self.customer_index.derived[key] = NgramIndex(df1_work[self.name_col1].to_numpy(dtype=object))
+        return self.customer_index.derived[key]
+
+    def _match_name_fallback(self, df1_work, df2_work, matched):
+        """
+        Match the still unmatched df2 rows on customer name against all of df1, regardless of
+        postal code.
+
+        Each distinct df2 name is looked up in the df1 trigram index once; only its
+        fallback_top_k shortlisted names are scored with the stage's scorer, so the stage costs
+        about one index lookup per name instead of a scan of df1.
+
+        Parameters:
+        df1_work (pd.DataFrame): df1 working columns.
+        df2_work (pd.DataFrame): df2 working columns, indexed by df2 position.
+        matched (np.ndarray): Matched flag per df2 position; updated in place.
+
+        Returns:
+        pd.DataFrame: Matched rows in the layout of fuzzy_match, or None if there were none.
+        """
+        remaining = np.flatnonzero(~matched)
+        rows, codes, queries, _ = self.unique_values(df2_work[self.name_col2].to_numpy(dtype=object)[remaining])
+        if not queries:
+            return None
+        query_numbers, positions1 = self.name_ngram_index(df1_work).shortlist_many(queries, self.fallback_top_k)
+        if not len(positions1):
+            return None
+
+        # Expand each distinct name's shortlist to every df2 row carrying that name
+        counts = np.bincount(query_numbers, minlength=len(queries))
+        starts = np.r_[0, np.cumsum(counts)[:-1]]
+        row_counts = counts[codes]
+        pairs2 = np.repeat(remaining[rows], row_counts)
+        offsets = np.arange(row_counts.sum()) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        pairs1 = positions1[np.repeat(starts[codes], row_counts) + offsets]
+
+        fallback_result = self.pairwise_fuzzy_match(
+            df1_work, df2_work, self.name_col1, self.name_col2, (pairs2, pairs1),
+            threshold=self.stage_thresholds['name_fallback'], id_col=self.id_col, tie_break=self.tie_break,
+            priority_col=self.priority_col, workers=self.workers, stats=self.stats, cache=self.cache,
+            top_k=self.top_k, scorer=self.stage_scorers['name_fallback'], prefilter=self.prefilter
+        )
+        fallback_result['match_type'] = 'name-fallback'
+        fallback_result = fallback_result[fallback_result['is_matched']]
+        matched[fallback_result['df2_index'].to_numpy(dtype=np.int64)] = True
+        return fallback_result
+
+    @staticmethod
+    def explode_candidates(result):
+        """
+        Expand the candidates column of a match result into one row per candidate (long layout).
+
+        Candidate rows repeat the df2 columns and carry candidate_rank (1 for the match itself)
+        with the candidate's customer_id, best_match and match_score; match_type is that of the
+        stage that scored them. Rows without candidates are kept once, without a rank.
+
+        Parameters:
+        result (pd.DataFrame): Merged match result with a candidates column.
+
+        Returns:
+        pd.DataFrame: The long layout result.
+        """
+        candidates = [value if isinstance(value, list) else [] for value in result['candidates']]
+        repeats = np.array([max(len(value), 1) for value in candidates], dtype=np.int64)
+        has_candidate = np.repeat([len(value) > 0 for value in candidates], repeats)
+        rank = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats) + 1
+
+        exploded = result.iloc[np.repeat(np.arange(len(result)), repeats)].drop(columns='candidates')
+        flat = [candidate for value in candidates for candidate in value]
+        for column, field in (('customer_id', 0), ('best_match', 1), ('match_score', 2)):
+            values = exploded[column].to_numpy(dtype=object, copy=True)
+            # Assign one by one, since ids can be lists (tie_break 'all')
+            for position, candidate in zip(np.flatnonzero(has_candidate).tolist(), flat):
+                values[position] = candidate[field]
+            exploded[column] = pd.Series(values, index=exploded.index).infer_objects()
+        exploded['candidate_rank'] = pd.arrays.IntegerArray(rank, ~has_candidate)
+        return exploded
+
+    def match(self, keep_all=False, top_k=None):
+        """
+        Perform optimized fuzzy matching:
+        1. Match by postal code.
+        2. Check for exact latitude/longitude matches and run fuzzy matcher at a high threshold on customer names.
+        3. Handle remaining matches in the same postal code by combining address and customer description columns.
+        4. If geohash_precision is set, block records without a usable postal code on geohash
+           cells of their coordinates and run fuzzy matcher on customer names.
+        5. Retry remaining unmatched records against the wider blocks listed in block_levels
+           (same ZIP3 prefix, neighbouring postal codes).
+        6. If name_fallback is set, run remaining unmatched records through fuzzy matcher on customer
+           names across all postal codes.
+
+        Parameters:
+        keep_all (bool): If True, return all rows from df2 with match info (default: False, only matched rows).
+        top_k (int): If set, return up to top_k candidates per matched df2 row in long layout, see
+            explode_candidates. Candidates are the choices at or above the threshold of the stage
+            that matched the row, collected while scoring it.
+
+        Wall and CPU time, rows in and out, comparisons and scorer calls of every stage are kept
+        in stats under (stage, metric) keys; profile() reports them.
+
+        Returns:
+        pd.DataFrame: Dataframe with matches for each entry.
+        """
+        logging.warning("Starting fuzzy matching process...")
+        self.stats = Counter()
+        self.top_k = top_k
+        with timed_stage(self.stats, 'total', rows_in=len(self.df2)):
+            merged_result = self._match(keep_all, top_k)
+            self.stats[('total', 'rows_out')] += len(merged_result)
+        return merged_result
+
+    def profile(self):
+        """
+        Structured instrumentation of the last match() run: wall and CPU time, df2 rows in and
+        out, candidate comparisons and scorer calls per stage, postal block size histograms,
+        scorer counters and peak RSS. See instrumentation.match_profile.
+
+        Returns:
+        dict: The profile, ready to be written as JSON.
+        """
+        profile = match_profile(self.stats)
+        profile['dedup_ratio'] = self.dedup_ratio()
+        return profile
+
+    @contextmanager
+    def _matched_stage(self, stage, matched, rows_in):
+        """
+        Time a stage that flags newly matched df2 rows in matched, counting them as its rows out.
+        """
+        before = int(matched.sum())
+        with timed_stage(self.stats, stage, rows_in=rows_in):
+            yield
+        self.stats[(stage, 'rows_out')] += int(matched.sum()) - before
+
+    def _match(self, keep_all, top_k):
+        """
+        Body of match(), timed as its 'total' stage.
+        """
+        # Step 1: Clean and prepare the dataframes (once; an incremental run cleans them beforehand)
+        if not self.processed:
+            with timed_stage(self.stats, 'clean', rows_in=len(self.df2)):
+                self.process()
+
+        with timed_stage(self.stats, 'blocking', rows_in=len(self.df2)):
+            df1_work, df2_work = self._working_frames()
+            use_lat_long = self.lat_col1 and self.long_col1 and self.lat_col2 and self.long_col2
+            if self.geohash_precision and not use_lat_long:
+                raise ValueError("Geohash blocking needs latitude/longitude columns on both dataframes.")
+
+            # Track matched rows by df2 position
+            matched = np.zeros(len(self.df2), dtype=bool)
+
+            # Initialize a list to store results
+            result_dfs = []
+
+            # Step 2: Match by postal code, visiting only blocks present in both dataframes
+            blocks = self.build_blocks()
+            count_sizes(self.stats, 'block_sizes_df1', [len(df1_positions) for _, df1_positions, _ in blocks])
+            count_sizes(self.stats, 'block_sizes_df2', [len(df2_positions) for _, _, df2_positions in blocks])
+            # Split giant postal blocks on secondary keys
+            blocks, split_blocks = self.sub_blocks(blocks, df1_work, df2_work)
+            if split_blocks:
+                logging.warning(
+                    f"Split {len(split_blocks)} postal blocks above {self.max_block_size} customers into "
+                    f"{self.stats['sub_blocks']} sub-blocks ({self.stats['sub_block_pairs_after']} of "
+                    f"{self.stats['sub_block_pairs_before']} pairs left)."
                 )
-                address_matches_result['match_type'] = 'address-zip'
+            block_rows = sum(len(df2_positions) for _, _, df2_positions in blocks)
+            self.stats[('blocking', 'rows_out')] += block_rows
 
-                # if keep_all keep all rows if not only keep matched rows
-                if not keep_all:
-                    address_matches_result = address_matches_result[address_matches_result['is_matched']]
-                
-                # Only keep matched rows
-                address_matches_result = address_matches_result[address_matches_result['is_matched']]
-                result_dfs.append(address_matches_result)
+        with self._matched_stage('postal_blocks', matched, block_rows):
+            pending = []
+            for block_results, block_matched, df2_positions in self._run_blocks(
+                    blocks, df1_work, df2_work, keep_all, use_lat_long):
+                pending.extend(block_results)
+                matched[df2_positions] = block_matched
+                # Thousands of small block frames take more memory than their rows, and
+                # concatenating them all at once doubles that: collapse them as they come
+                if len(pending) >= RESULT_FRAME_BATCH:
+                    result_dfs.append(pd.concat(pending, ignore_index=True))
+                    pending = []
+            result_dfs.extend(pending)
+
+        if split_blocks and self.sub_block_audit:
+            with timed_stage(self.stats, 'sub_block_audit'):
+                self._audit_sub_blocks(split_blocks, df1_work, df2_work, matched, use_lat_long)
+
+        # Step 5: Geohash blocks for rows without a usable postal code
+        if self.geohash_precision:
+            with self._matched_stage('geohash', matched, int((~matched).sum())):
+                geohash_result = self._match_geohash_blocks(df1_work, df2_work, matched)
+                if geohash_result is not None:
+                    result_dfs.append(geohash_result)
+
+        # Step 6: Wider blocks for rows their own postal block left unmatched
+        if self.block_levels:
+            with self._matched_stage('block_levels', matched, int((~matched).sum())):
+                result_dfs.extend(self._match_block_levels(df1_work, df2_work, matched))
+
+        # Step 7: Name-only fallback for rows the postal-code blocks left unmatched
+        if self.name_fallback:
+            with self._matched_stage('name_fallback', matched, int((~matched).sum())):
+                fallback_result = self._match_name_fallback(df1_work, df2_work, matched)
+                if fallback_result is not None:
+                    result_dfs.append(fallback_result)
+
+        if self.stats['scorer_calls_without_dedup']:
+            logging.warning(
+                f"Scored {self.stats['unique_queries']} distinct queries for {self.stats['query_rows']} rows; "
+                f"deduplication removed {self.dedup_ratio():.1%} of scorer calls."
+            )
+        if self.stats['prefilter_pruned']:
+            logging.warning(
+                f"Prefilter skipped {self.stats['prefilter_pruned']} of {self.stats['scorer_calls']} scorer calls."
+            )
 
-                # Mark matched rows in df2 using df2_index
-                matched_ids = address_matches_result['df2_index'][address_matches_result['is_matched']].tolist()
-                self.df2.loc[matched_ids, 'is_matched'] = True
+        with timed_stage(self.stats, 'merge', rows_in=len(self.df2)):
+            merged_result = self._merge_results(result_dfs, matched, keep_all, top_k)
+            self.stats[('merge', 'rows_out')] += len(merged_result)
+        return merged_result
 
+    def _merge_results(self, result_dfs, matched, keep_all, top_k):
+        """
+        Combine the stage results and merge them onto df2, see match().
+        """
         # Combine all results into a single dataframe
         if result_dfs:
             final_result = pd.concat(result_dfs, ignore_index=True)
+            # Release the stage results, which would otherwise stay alive next to their concatenation
+            result_dfs.clear()
         else:
             final_result = pd.DataFrame()
 
         # Ensure customer_id and df2_index are included in the final output
         expected_cols = ['df2_index', 'best_match', 'match_score', 'customer_id', 'is_matched', 'match_type']
-        if not final_result.empty:
-            final_result = final_result[expected_cols]
-        else:
+        if top_k:
+            expected_cols.append('candidates')
+        if final_result.empty:
             final_result = pd.DataFrame(columns=expected_cols)
+        final_result = final_result[expected_cols]
 
-        # Merge final_result with df2 to retain all rows from df2
-        merged_result = self.df2.merge(final_result, how='left', left_index=True, right_on='df2_index')
+        if self.compact:
+            merged_result = self._attach_results(final_result, matched, keep_all)
+        else:
+            # Record the matched state on df2 once
+            self.df2['is_matched'] = matched
+            if len(final_result):
+                # Map df2 positions back to df2 index labels
+                final_result['df2_index'] = self.df2.index.to_numpy()[final_result['df2_index'].to_numpy(dtype=np.int64)]
+
+            # Merge final_result with df2 to retain all rows from df2
+            merged_result = self.df2.merge(final_result, how='left', left_index=True, right_on='df2_index')
+        if top_k:
+            merged_result = self.explode_candidates(merged_result)
+
+        # Keep integer customer ids integer whether or not some rows are unmatched, so that
+        # results of separate runs or chunks are written identically
+        if pd.api.types.is_integer_dtype(self.df1[self.id_col]) and self.tie_break != 'all':
+            merged_result['customer_id'] = merged_result['customer_id'].astype('Int64')
 
         logging.warning(f"Fuzzy matching complete. Returning {len(merged_result) if keep_all else merged_result['customer_id'].notna().sum()} matched rows.")
 
@@ -341,3 +2202,188 @@ class FuzzyMatcher:
         else:
             # Only keep rows with a match (customer_id not null)
             return merged_result[merged_result['customer_id'].notna()]
+
+
+    def _attach_results(self, final_result, matched, keep_all):
+        """
+        Compact counterpart of the df2 merge in match(): gather df2 rows and their result rows
+        by position, in df2 order (result rows of a df2 row in stage order).
+
+        df2 rows without a result row appear once, with empty match columns, only when keep_all
+        is set (the caller drops them otherwise). The matching columns hold their cleaned values
+        and the columns are named like those of the merge.
+        """
+        positions = final_result['df2_index'].to_numpy(dtype=np.int64)
+        result_rows = np.arange(len(final_result))
+        if keep_all:
+            missing = np.setdiff1d(np.arange(len(self.df2)), positions)
+            positions = np.concatenate([positions, missing])
+            result_rows = np.concatenate([result_rows, np.full(len(missing), -1)])
+        order = np.argsort(positions, kind='stable')
+        positions, result_rows = positions[order], result_rows[order]
+
+        # Gather every output column once; a row copy of df2_input would be built only to have
+        # its matching columns replaced
+        columns = {}
+        for col in self.df2_input.columns:
+            source = self.df2[col].to_numpy() if col in self.df2.columns else self.df2_input[col].array
+            columns[col] = source.take(positions)
+        for col in self.df2.columns.difference(self.df2_input.columns, sort=False):
+            columns[col] = self.df2[col].to_numpy()[positions]
+        columns['is_matched_x'] = matched[positions]
+        # Unmatched rows (result row -1) get missing values, as in a left merge; final_result
+        # has a RangeIndex, so result rows are its labels
+        match_columns = final_result.reindex(result_rows)
+        match_columns['df2_index'] = self.df2.index.to_numpy()[positions]
+        for col in match_columns.columns:
+            columns['is_matched_y' if col == 'is_matched' else col] = match_columns[col].to_numpy()
+        # copy=False also skips consolidating the columns into blocks, which would copy them all
+        return pd.DataFrame(columns, index=self.df2_input.index[positions], copy=False)
+
+    def _incremental_signature(self, keep_all, top_k):
+        """
+        The settings an incremental state must have been produced with to be reused.
+        """
+        return repr((
+            self.zip_col1, self.zip_col2, self.name_col1, self.name_col2, self.address_col1, self.address_col2,
+            self.lat_col1, self.long_col1, self.lat_col2, self.long_col2, self.id_col, self.tie_break,
+            self.priority_col, self.threshold, self.lat_long_decimal_places(), self.radius_m, self.name_fallback,
+            self.fallback_top_k, self.block_levels, sorted(self.level_thresholds.items()), self.neighbour_radius_m,
+            self.max_level_candidates, self.geohash_precision, self.geohash_threshold, self.max_block_size,
+            self.sub_block_keys, self.sub_block_grid_m, sorted(self.stage_scorers.items()),
+            sorted(self.stage_thresholds.items()), keep_all, top_k,
+        ))
+
+    def match_incremental(self, state=None, keep_all=False, top_k=None):
+        """
+        Match only the df2 rows that may match differently than in the run that produced state,
+        and patch that run's output with them.
+
+        A df2 row is reused when a row with the same fingerprint (hash of its cleaned zip, name,
+        address and coordinates) was matched last time and the df1 postal block of its zip is
+        unchanged. With stages that look beyond a row's own block (block_levels, geohash_precision,
+        name_fallback), rows that were not matched inside their own block are also rematched as
+        soon as any df1 row changed. A state produced with other settings is ignored.
+
+        Parameters:
+        state (IncrementalState): State returned by the previous run, or None to match everything.
+        keep_all (bool): Passed to match().
+        top_k (int): Passed to match().
+
+        Returns:
+        tuple: (result in the layout of match() plus a row_fingerprint column, in df2 order with a
+            fresh RangeIndex; IncrementalState for the next run).
+        """
+        if self.compact:
+            raise ValueError("Incremental matching is not available in compact mode.")
+        if not self.processed:
+            self.process()
+        df1_work, _ = self._working_frames()
+        df1_hashes = row_fingerprints(df1_work, df1_work.columns)
+        block_fingerprints = {
+            postal_code: sequence_fingerprint(df1_hashes[positions])
+            for postal_code, positions in self.df1_blocks().items()
+        }
+        df1_fingerprint = sequence_fingerprint(df1_hashes)
+        fingerprints = row_fingerprints(
+            self.df2, [col for col in (self.zip_col2, self.name_col2, self.address_col2, self.lat_col2, self.long_col2) if col]
+        )
+        signature = self._incremental_signature(keep_all, top_k)
+
+        reuse = np.zeros(len(self.df2), dtype=bool)
+        if state is not None and state.signature == signature:
+            same_block = np.array([
+                block_fingerprints.get(postal_code) == state.block_fingerprints.get(postal_code)
+                for postal_code in self.df2[self.zip_col2].to_numpy(dtype=object)
+            ], dtype=bool)
+            reuse = np.isin(fingerprints, state.seen) & same_block
+            if (self.block_levels or self.geohash_precision or self.name_fallback) and df1_fingerprint != state.df1_fingerprint:
+                own_block = state.results['match_type'].isin(OWN_BLOCK_MATCH_TYPES).to_numpy(dtype=bool)
+                reuse &= np.isin(fingerprints, state.results['row_fingerprint'].to_numpy(dtype=np.uint64)[own_block])
+        logging.warning(f"Incremental matching reuses {reuse.sum()} of {len(reuse)} rows.")
+
+        input_columns = list(self.df2.columns)
+        parts = []
+        rematch = np.flatnonzero(~reuse)
+        if len(rematch):
+            matcher = copy.copy(self)
+            matcher.df2 = self.df2.iloc[rematch].copy()
+            matcher.df2[ROW_POSITION_COL] = rematch
+            parts.append(matcher.match(keep_all=keep_all, top_k=top_k))
+            self.stats = matcher.stats
+        else:
+            self.stats = Counter()
+        self.stats['incremental_reused_rows'] = int(reuse.sum())
+
+        reused = np.flatnonzero(reuse)
+        if len(reused):
+            previous = state.results
+            groups = previous.groupby('row_fingerprint', sort=False).indices
+            previous_rows = [groups.get(fingerprint, np.empty(0, dtype=np.int64)) for fingerprint in fingerprints[reused]]
+            # Rows that were not in the previous output (unmatched without keep_all) give no rows
+            counts = np.array([len(rows) for rows in previous_rows], dtype=np.int64)
+            positions = np.repeat(reused, counts)
+            patched = self.df2.iloc[positions].reset_index(drop=True)
+            patched[ROW_POSITION_COL] = positions
+            if counts.sum():
+                previous_match = previous.iloc[np.concatenate(previous_rows)].drop(columns='row_fingerprint').reset_index(drop=True)
+                for column in previous_match.columns:
+                    patched[column] = previous_match[column]
+                # Matched rows point at today's df2 labels, in the dtype match() writes them with
+                has_index = patched['df2_index'].notna().to_numpy(dtype=bool)
+                df2_index = pd.Series(self.df2.index.to_numpy()[positions], dtype=self.df2.index.dtype)
+                if not has_index.all():
+                    if pd.api.types.is_integer_dtype(df2_index):
+                        df2_index = df2_index.astype('Int64')
+                    df2_index = df2_index.where(has_index)
+                patched['df2_index'] = df2_index
+            parts.append(patched)
+
+        result = _concat_parts(parts) if parts else self.df2.iloc[:0].copy()
+        if ROW_POSITION_COL not in result:
+            result[ROW_POSITION_COL] = np.empty(0, dtype=np.int64)
+        result = result.sort_values(ROW_POSITION_COL, kind='stable').reset_index(drop=True)
+        row_positions = result[ROW_POSITION_COL].to_numpy(dtype=np.int64)
+        result['row_fingerprint'] = fingerprints[row_positions]
+
+        # One df2 row per fingerprint stands for all rows sharing it in the next run
+        first_rows = np.zeros(len(self.df2), dtype=bool)
+        first_rows[np.unique(fingerprints, return_index=True)[1]] = True
+        match_columns = ['row_fingerprint'] + [
+            column for column in result.columns if column not in input_columns + [ROW_POSITION_COL, 'row_fingerprint']
+        ]
+        next_state = IncrementalState(
+            signature, df1_fingerprint, block_fingerprints, np.unique(fingerprints),
+            result.loc[first_rows[row_positions], match_columns].reset_index(drop=True)
+        )
+        return result.drop(columns=ROW_POSITION_COL), next_state
+
+
+def _concat_parts(parts):
+    """
+    Concatenate the rematched and reused parts of an incremental run. Columns a part holds no
+    values in (e.g. the match columns when no rematched row matched) are left out of that part,
+    so that they take the dtype of the other parts, as in a single match() over all rows.
+    """
+    columns = list(dict.fromkeys(column for part in parts for column in part.columns))
+    typed = {column for part in parts for column in part.columns if part[column].notna().any()}
+    parts = [
+        part.drop(columns=[column for column in part.columns if column in typed and part[column].isna().all()])
+        for part in parts
+    ]
+    return pd.concat(parts, ignore_index=True)[columns]
+
+
+def _match_block_chunk(matcher, block_frames, keep_all, use_lat_long):
+    """
+    Pool entry point: match a chunk of (df1_subset, df2_subset) blocks with a frame-less matcher.
+    Returns the block outputs and the chunk's scoring stats.
+    """
+    # Own counter per chunk, so that threads sharing the worker matcher don't race on it
+    matcher = copy.copy(matcher)
+    matcher.stats = Counter()
+    outputs = [
+        matcher._match_block(df1_subset, df2_subset, keep_all, use_lat_long)
+        for df1_subset, df2_subset in block_frames
+    ]
+    return outputs, matcher.stats
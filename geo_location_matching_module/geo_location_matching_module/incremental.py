@@ -0,0 +1,84 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+# Bumped whenever the layout of the persisted state changes.
+STATE_FORMAT_VERSION = 1
+
+
+def row_fingerprints(frame, columns):
+    """
+    Fingerprint of every row over the given (cleaned) columns.
+
+    Returns:
+    np.ndarray: uint64 hash per row; equal values in the columns give equal hashes.
+    """
+    return pd.util.hash_pandas_object(frame[list(columns)], index=False).to_numpy(dtype=np.uint64)
+
+
+def sequence_fingerprint(hashes):
+    """
+    Order-sensitive fingerprint of a sequence of row fingerprints.
+    """
+    return hashlib.blake2b(np.ascontiguousarray(hashes, dtype=np.uint64).tobytes(), digest_size=16).hexdigest()
+
+
+class IncrementalState:
+    """
+    What an incremental match run needs to know about the previous run.
+
+    Holds the fingerprint of every df1 postal block and of the whole of df1, the fingerprints of
+    all df2 rows that were matched, and the match columns of the output rows of one df2 row per
+    fingerprint. A state only applies to runs with the same matcher settings (signature).
+    """
+
+    def __init__(self, signature, df1_fingerprint, block_fingerprints, seen, results):
+        """
+        Parameters:
+        signature (str): Matcher settings the state was produced with.
+        df1_fingerprint (str): Fingerprint of all cleaned df1 rows, in order.
+        block_fingerprints (dict): Postal code -> fingerprint of its cleaned df1 rows.
+        seen (np.ndarray): Sorted distinct fingerprints of the df2 rows of the run.
+        results (pd.DataFrame): row_fingerprint plus the match columns of the output rows.
+        """
+        self.signature = signature
+        self.df1_fingerprint = df1_fingerprint
+        self.block_fingerprints = block_fingerprints
+        self.seen = seen
+        self.results = results
+
+    def save(self, path):
+        """
+        Write the state to the file at path.
+        """
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'format_version': STATE_FORMAT_VERSION,
+                'signature': self.signature,
+                'df1_fingerprint': self.df1_fingerprint,
+                'block_fingerprints': self.block_fingerprints,
+                'seen': self.seen,
+                'results': self.results,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a state written by save.
+
+        Returns:
+        IncrementalState: The state, or None if there is no file or it has an older layout (the
+            next run then matches everything).
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('format_version') != STATE_FORMAT_VERSION:
+            return None
+        return cls(data['signature'], data['df1_fingerprint'], data['block_fingerprints'], data['seen'], data['results'])
@@ -0,0 +1,123 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Metrics recorded per stage, in report order.
+STAGE_METRICS = ('calls', 'wall_s', 'cpu_s', 'rows_in', 'rows_out', 'comparisons', 'scorer_calls', 'pruned', 'scored')
+
+
+@contextmanager
+def timed_stage(stats, stage, rows_in=None):
+    """
+    Record the wall and CPU time of the with-block, and the scorer calls and candidate
+    comparisons it added to stats, under (stage, metric) keys of stats. Of the scorer calls,
+    'pruned' were skipped by the score prefilter and the other 'scored' ones were left to the
+    scorer (or the match cache).
+
+    Keys are summed across calls (e.g. one per postal block), so counters of parallel workers
+    merge with Counter.update; CPU time is that of the whole process.
+
+    Parameters:
+    stats (collections.Counter): Matcher stats, also holding the scorer call counts.
+    stage (str): Stage name.
+    rows_in (int): Number of df2 rows entering the stage, if known.
+    """
+    scorer_calls = stats['scorer_calls']
+    comparisons = stats['scorer_calls_without_dedup']
+    pruned = stats['prefilter_pruned']
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        stats[(stage, 'calls')] += 1
+        stats[(stage, 'wall_s')] += time.perf_counter() - wall
+        stats[(stage, 'cpu_s')] += time.process_time() - cpu
+        stats[(stage, 'scorer_calls')] += stats['scorer_calls'] - scorer_calls
+        stats[(stage, 'comparisons')] += stats['scorer_calls_without_dedup'] - comparisons
+        stats[(stage, 'pruned')] += stats['prefilter_pruned'] - pruned
+        stats[(stage, 'scored')] += (stats['scorer_calls'] - scorer_calls) - (stats['prefilter_pruned'] - pruned)
+        if rows_in is not None:
+            stats[(stage, 'rows_in')] += rows_in
+
+
+def size_bucket(size):
+    """
+    Power-of-two histogram bucket label of a size: '0', '1', '2-3', '4-7', ...
+    """
+    if size < 2:
+        return str(size)
+    low = 1 << (int(size).bit_length() - 1)
+    return f'{low}-{2 * low - 1}'
+
+
+def count_sizes(stats, histogram, sizes):
+    """
+    Add sizes to a power-of-two histogram kept under (histogram, bucket) keys of stats.
+    """
+    for size in sizes:
+        stats[(histogram, size_bucket(size))] += 1
+
+
+def peak_rss_mb(children=False):
+    """
+    Peak resident set size in MiB, or None where it cannot be read.
+
+    Parameters:
+    children (bool): Report the largest peak of this process's terminated child processes (e.g.
+        the workers of a process pool once it is shut down) instead of this process's own.
+        It is the peak of the biggest child, not the sum of concurrent ones.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def match_profile(stats):
+    """
+    Structured report of matcher stats.
+
+    Parameters:
+    stats (collections.Counter): Stats of one or more match() runs.
+
+    Returns:
+    dict: 'stages' (stage -> metric -> value, in first-recorded order), histograms by name
+        (bucket -> count, smallest first), plain 'counters', the current 'peak_rss_mb' of this
+        process and 'peak_rss_children_mb', the largest peak of its finished worker processes
+        (n_jobs > 1 or a chunked run's pool), where the scoring memory is then spent.
+    """
+    stages, histograms, counters = {}, {}, {}
+    for key, value in stats.items():
+        if not isinstance(key, tuple):
+            counters[key] = value
+        elif key[1] in STAGE_METRICS:
+            stages.setdefault(key[0], {})[key[1]] = value
+        else:
+            histograms.setdefault(key[0], {})[key[1]] = value
+    profile = {
+        'stages': {
+            stage: {metric: metrics[metric] for metric in STAGE_METRICS if metric in metrics}
+            for stage, metrics in stages.items()
+        },
+        'counters': counters,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_children_mb': peak_rss_mb(children=True),
+    }
+    for name, buckets in histograms.items():
+        profile[name] = dict(sorted(buckets.items(), key=lambda item: int(item[0].split('-')[0])))
+    return profile
+
+
+def write_profile(profile, path):
+    """
+    Write a match profile as JSON.
+    """
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2, default=float)
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import pickle
+import sys
+from collections import Counter, OrderedDict
+
+# Bumped whenever the layout of persisted entries changes.
+CACHE_FORMAT_VERSION = 1
+
+# Rough per-entry bookkeeping cost (OrderedDict node and key tuple) added to the key/value sizes.
+ENTRY_OVERHEAD_BYTES = 120
+
+
+def choice_set_version(choices):
+    """
+    Fingerprint of an ordered list of distinct choice strings. Cached best matches refer to
+    positions in this list, so they are only reused for exactly the same choices.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for choice in choices:
+        digest.update(choice.encode('utf-8', 'surrogatepass'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class MatchCache:
+    """
+    Bounded LRU memo cache shared by the cleaning and scoring steps of FuzzyMatcher.
+
+    Entries live in namespaces: normalized strings per cleaner (e.g. 'normalize:name') and
+    best-match results keyed by (scorer, threshold, query, choice set version). The least
+    recently used entries are evicted once either max_entries or max_bytes is exceeded. Hits and
+    misses are counted per namespace.
+
+    The cache can be saved to and loaded from a local file so that repeat runs over overlapping
+    feeds skip work done before.
+    """
+
+    def __init__(self, max_entries=1_000_000, max_bytes=256 * 1024 ** 2, path=None):
+        """
+        Parameters:
+        max_entries (int): Maximum number of cached entries.
+        max_bytes (int): Approximate maximum memory held by the cached keys and values.
+        path (str): File the cache is persisted to; loaded now if it exists.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = Counter()
+        self.misses = Counter()
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        if path and os.path.exists(path):
+            self._load_entries(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_bytes(key, value):
+        parts = key + (value if isinstance(value, tuple) else (value,))
+        return ENTRY_OVERHEAD_BYTES + sum(sys.getsizeof(part) for part in parts)
+
+    def get_many(self, namespace, keys):
+        """
+        Look up keys in a namespace, refreshing the hits.
+
+        Returns:
+        list: Cached value per key, or None for misses.
+        """
+        values = []
+        for key in keys:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                self.misses[namespace] += 1
+                values.append(None)
+            else:
+                self._entries.move_to_end((namespace, key))
+                self.hits[namespace] += 1
+                values.append(entry[0])
+        return values
+
+    def put_many(self, namespace, keys, values):
+        """
+        Store values for keys in a namespace, evicting least recently used entries as needed.
+        """
+        for key, value in zip(keys, values):
+            full_key = (namespace, key)
+            old = self._entries.pop(full_key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            size = self._entry_bytes(full_key, value)
+            self._entries[full_key] = (value, size)
+            self.nbytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+
+    def lookup(self, namespace, keys, compute):
+        """
+        Return the value for each key, computing only the missing ones.
+
+        Parameters:
+        namespace (str): Cache namespace.
+        keys (list): Hashable keys, without duplicates.
+        compute (callable): Maps the list of missing keys to the list of their values.
+
+        Returns:
+        list: Value per key.
+        """
+        values = self.get_many(namespace, keys)
+        missing = [number for number, value in enumerate(values) if value is None]
+        if missing:
+            computed = compute([keys[number] for number in missing])
+            for number, value in zip(missing, computed):
+                values[number] = value
+            self.put_many(namespace, [keys[number] for number in missing], computed)
+        return values
+
+    def stats(self):
+        """
+        Returns:
+        dict: Entries, bytes and hit/miss counts per namespace.
+        """
+        return {
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+        }
+
+    def save(self, path=None):
+        """
+        Write the cached entries, least recently used first, to path (default: the cache's path).
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("MatchCache.save needs a path.")
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'format_version': CACHE_FORMAT_VERSION,
+                'entries': [(key, entry[0]) for key, entry in self._entries.items()],
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _load_entries(self, path):
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('format_version') != CACHE_FORMAT_VERSION:
+            # Stale layouts are simply rebuilt
+            return
+        for key, value in data['entries']:
+            self.put_many(key[0], [key[1]], [value])
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from fuzzy_matching_module import ROW_POSITION_COL, FuzzyMatcher
+
+# Number of most recent request latencies the percentiles are computed over.
+LATENCY_WINDOW = 10_000
+
+
+class MatchService:
+    """
+    Long-running matcher for single records and small batches against a warm customer index.
+
+    The customer master is loaded and cleaned once into a CustomerIndex; its postal blocks and
+    lookup structures (n-gram, geohash and centroid indexes) are built on first use and kept
+    with the index. Every request runs the full FuzzyMatcher.match cascade on just the request's
+    rows. When the master changes on disk, reload() builds a new index and swaps it in; over
+    TCP this runs in a worker thread and requests keep being answered from the old index.
+    """
+
+    def __init__(self, load_index, matcher_kwargs, watch_path=None, top_k=None):
+        """
+        Parameters:
+        load_index (callable): Returns a freshly loaded CustomerIndex; called now and on reload.
+        matcher_kwargs (dict): FuzzyMatcher arguments for df2 (zip_col2, name_col2, ...) and the
+            cascade (threshold, name_fallback, block_levels, ...), as for from_index.
+        watch_path (str): Customer master file or index directory whose modification time
+            triggers a reload (see reload_if_changed).
+        top_k (int): Passed to match().
+        """
+        self.load_index = load_index
+        self.matcher_kwargs = {'n_jobs': 1, 'workers': 1, **matcher_kwargs}
+        self.watch_path = watch_path
+        self.top_k = top_k
+        self.customer_index = load_index()
+        self.loaded_mtime = self._mtime()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self._reloading = threading.Lock()
+
+    def _mtime(self):
+        if self.watch_path is None or not os.path.exists(self.watch_path):
+            return None
+        return os.path.getmtime(self.watch_path)
+
+    def match_batch(self, records):
+        """
+        Match a micro-batch of records in one match() run.
+
+        Parameters:
+        records (list): df2 rows as dicts.
+
+        Returns:
+        list: For every record, the list of its match() output rows as JSON-ready dicts (empty
+            when nothing matched; several with top_k or tie_break 'all').
+        """
+        start = time.perf_counter()
+        df2 = pd.DataFrame.from_records(records)
+        df2[ROW_POSITION_COL] = np.arange(len(df2))
+        matcher = FuzzyMatcher.from_index(self.customer_index, df2, **self.matcher_kwargs)
+        result = matcher.match(top_k=self.top_k)
+        rows = [[] for _ in records]
+        positions = result[ROW_POSITION_COL].to_numpy(dtype=np.int64)
+        for position, row in zip(positions, self._json_rows(result.drop(columns=ROW_POSITION_COL))):
+            rows[position].append(row)
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += len(records)
+        return rows
+
+    def match_one(self, record):
+        """
+        Match a single record, see match_batch.
+
+        Returns:
+        list: The record's match() output rows as dicts.
+        """
+        return self.match_batch([record])[0]
+
+    @staticmethod
+    def _json_rows(result):
+        """
+        Output rows as dicts of JSON-serializable values (missing values as None).
+        """
+        values = result.astype(object).where(result.notna(), None)
+        return [
+            {column: value.item() if isinstance(value, np.generic) else value for column, value in row.items()}
+            for row in values.to_dict('records')
+        ]
+
+    def latency_stats(self):
+        """
+        Returns:
+        dict: Number of records served and match() calls, and the p50/p99/max latency in
+            milliseconds of the most recent calls.
+        """
+        latencies = np.asarray(self.latencies) * 1000
+        stats = {'records': self.requests, 'calls': len(self.latencies)}
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, [50, 99])
+            stats.update(p50_ms=float(p50), p99_ms=float(p99), max_ms=float(latencies.max()))
+        return stats
+
+    def reload(self):
+        """
+        Load the customer master again and swap the new index in once it is ready.
+        """
+        with self._reloading:
+            mtime = self._mtime()
+            customer_index = self.load_index()
+            self.customer_index = customer_index
+            self.loaded_mtime = mtime
+        logging.warning(f"Reloaded customer index with {len(customer_index)} rows.")
+
+    def reload_if_changed(self):
+        """
+        Reload (in the calling thread) if watch_path changed since the last load.
+
+        Returns:
+        bool: Whether a reload ran.
+        """
+        if self._reloading.locked() or self._mtime() == self.loaded_mtime:
+            return False
+        self.reload()
+        return True
+
+    def handle(self, request):
+        """
+        Answer one JSON request: {"record": {...}}, {"records": [...]}, {"op": "stats"} or
+        {"op": "reload"}.
+        """
+        if 'record' in request:
+            return {'matches': self.match_one(request['record'])}
+        if 'records' in request:
+            return {'matches': self.match_batch(request['records'])}
+        if request.get('op') == 'stats':
+            return self.latency_stats()
+        if request.get('op') == 'reload':
+            self.reload()
+            return {'reloaded': True, 'rows': len(self.customer_index)}
+        return {'error': "Expected 'record', 'records' or 'op' (stats, reload)."}
+
+    def serve_lines(self, lines=None, out=None):
+        """
+        Serve JSON-lines requests from lines (default stdin), writing one JSON response line per
+        request to out (default stdout).
+        """
+        lines = sys.stdin if lines is None else lines
+        out = sys.stdout if out is None else out
+        for line in lines:
+            if not line.strip():
+                continue
+            self.reload_if_changed()
+            try:
+                response = self.handle(json.loads(line))
+            except Exception as error:
+                response = {'error': str(error)}
+            out.write(json.dumps(response, default=str) + '\n')
+            out.flush()
+
+    async def serve_socket(self, host='127.0.0.1', port=8765, batch_window_ms=2, max_batch=64, reload_interval_s=5):
+        """
+        Serve JSON-lines requests over TCP until cancelled.
+
+        Single-record requests arriving within batch_window_ms of each other are matched
+        together in one micro-batch of at most max_batch records. Matching runs in a worker
+        thread, so the event loop keeps accepting requests. watch_path is checked for changes
+        every reload_interval_s seconds.
+        """
+        queue = asyncio.Queue()
+
+        async def batcher():
+            loop = asyncio.get_running_loop()
+            while True:
+                pending = [await queue.get()]
+                deadline = loop.time() + batch_window_ms / 1000
+                while len(pending) < max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        pending.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                records = [record for record, _ in pending]
+                try:
+                    matches = await loop.run_in_executor(None, self.match_batch, records)
+                except Exception as error:
+                    for _, future in pending:
+                        future.set_exception(error)
+                    continue
+                for (_, future), record_matches in zip(pending, matches):
+                    future.set_result(record_matches)
+
+        async def watcher():
+            loop = asyncio.get_running_loop()
+            while True:
+                await asyncio.sleep(reload_interval_s)
+                await loop.run_in_executor(None, self.reload_if_changed)
+
+        async def client(reader, writer):
+            loop = asyncio.get_running_loop()
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if 'record' in request:
+                        future = loop.create_future()
+                        await queue.put((request['record'], future))
+                        response = {'matches': await future}
+                    else:
+                        response = await loop.run_in_executor(None, self.handle, request)
+                except Exception as error:
+                    response = {'error': str(error)}
+                writer.write((json.dumps(response, default=str) + '\n').encode())
+                await writer.drain()
+            writer.close()
+
+        tasks = [asyncio.create_task(batcher())]
+        if self.watch_path is not None:
+            tasks.append(asyncio.create_task(watcher()))
+        server = await asyncio.start_server(client, host, port)
+        logging.warning(f"Serving matches on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
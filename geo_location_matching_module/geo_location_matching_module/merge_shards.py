@@ -0,0 +1,25 @@
+import argparse
+import os
+from sharding import merge_partials
+from table_io import TABLE_FORMATS
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    # Partial results of run_fuzzy_matching.py --num_shards N --shard_id i, one per shard, or
+    # folders holding them
+    parser.add_argument('--partials', type=str, nargs='+', required=True)
+    parser.add_argument('--matched_results', type=str, required=True)
+    parser.add_argument('--format', type=str, default='auto', choices=['auto', *TABLE_FORMATS])
+    args = parser.parse_args(argv)
+
+    partials = []
+    for path in args.partials:
+        if os.path.isdir(path):
+            partials.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if not name.endswith('.json'))
+        else:
+            partials.append(path)
+    rows = merge_partials(partials, args.matched_results, args.format)
+    print(f"Merged {len(partials)} shards into {rows} rows in {args.matched_results}")
+
+if __name__ == "__main__":
+    main()
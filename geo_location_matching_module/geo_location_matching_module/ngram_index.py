@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Fewest names a fractional max_df may cut a gram's postings to, so small indexes keep every gram
+MIN_DF_LIMIT = 1000
+
+
+def char_ngrams(text, n=3):
+    """
+    Distinct character n-grams of text padded with one space on each side, so that word
+    boundaries count (e.g. ' al', 'alp', ..., 'fe ').
+    """
+    padded = f' {text} '
+    return {padded[start:start + n] for start in range(len(padded) - n + 1)}
+
+
+class NgramIndex:
+    """
+    Character n-gram inverted index over a column of names.
+
+    Postings are stored as one int64 array sorted by gram, with offsets per gram, so a lookup
+    gathers the postings of the query's grams and counts how many grams each name shares with
+    it. Only the top-K names by shared-gram count are returned, to be scored precisely.
+
+    Grams found in more names than max_df allows (e.g. ' ca', 'caf', 'afe' in a column of
+    cafes) are skipped at lookup: they barely rank the names, and gathering their postings
+    would cost a scan of most of the index per query.
+    """
+
+    def __init__(self, names, n=3, max_df=0.1):
+        """
+        Build the index.
+
+        Parameters:
+        names (array-like): Names to index; missing names are not indexed.
+        n (int): Gram length (default 3, trigrams).
+        max_df (float or int): Most names a gram may be found in to be used for lookups; a float
+            is a share of the indexed names (but never fewer than MIN_DF_LIMIT names), an int a
+            number of names (default 0.1).
+        """
+        self.n = n
+        names = np.asarray(names, dtype=object)
+        indexed = np.flatnonzero(pd.notna(names))
+        if isinstance(max_df, float):
+            self.df_limit = max(int(max_df * len(indexed)), MIN_DF_LIMIT)
+        else:
+            self.df_limit = max_df
+        self.vocabulary = {}
+        doc_ids, gram_ids = [], []
+        for position in indexed.tolist():
+            for gram in char_ngrams(names[position], n):
+                doc_ids.append(position)
+                gram_ids.append(self.vocabulary.setdefault(gram, len(self.vocabulary)))
+
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        gram_ids = np.asarray(gram_ids, dtype=np.int64)
+        order = np.argsort(gram_ids, kind='stable')
+        self.postings = doc_ids[order]
+        self.offsets = np.r_[0, np.cumsum(np.bincount(gram_ids, minlength=len(self.vocabulary)))].astype(np.int64)
+        self.doc_frequencies = np.diff(self.offsets)
+
+    def shortlist(self, query, k):
+        """
+        Positions of the (at most) k names sharing the most grams with query.
+
+        Only the query's grams found in at most df_limit names are counted; if all of them are
+        more common, the rarest one is used alone, so a query made of common grams still gets
+        a shortlist.
+
+        Parameters:
+        query (str): Name to look up.
+        k (int): Shortlist size.
+
+        Returns:
+        tuple: (name positions, shared-gram counts) arrays, best first; equal counts are ordered
+            by position.
+        """
+        ids = [self.vocabulary[gram] for gram in char_ngrams(query, self.n) if gram in self.vocabulary]
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        frequencies = self.doc_frequencies[ids]
+        rare = frequencies <= self.df_limit
+        ids = np.asarray(ids)[rare] if rare.any() else [ids[int(np.argmin(frequencies))]]
+        postings = np.concatenate([self.postings[self.offsets[gram]:self.offsets[gram + 1]] for gram in ids])
+        positions, counts = np.unique(postings, return_counts=True)
+        if len(positions) > k:
+            # Keep everything tied with the k-th best count, then cut by position
+            kth = -np.partition(-counts, k - 1)[k - 1]
+            keep = counts >= kth
+            positions, counts = positions[keep], counts[keep]
+        order = np.lexsort((positions, -counts))[:k]
+        return positions[order], counts[order]
+
+    def shortlist_many(self, queries, k):
+        """
+        Shortlist every query.
+
+        Parameters:
+        queries (list): Names to look up.
+        k (int): Shortlist size per query.
+
+        Returns:
+        tuple: (query numbers, name positions) arrays of all shortlisted pairs, grouped by query.
+        """
+        query_numbers, positions = [], []
+        for number, query in enumerate(queries):
+            shortlisted, _ = self.shortlist(query, k)
+            query_numbers.append(np.full(len(shortlisted), number, dtype=np.int64))
+            positions.append(shortlisted)
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(query_numbers), np.concatenate(positions)
@@ -1,14 +1,109 @@
 import argparse
-import pandas as pd
-from fuzzy_matching_module import FuzzyMatcher
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from fuzzy_matching_module import FuzzyMatcher, resolve_n_jobs
+from customer_index import CustomerIndex
+from incremental import IncrementalState
+from instrumentation import match_profile, write_profile
+from match_cache import MatchCache
+from scorers import SCORERS
+from table_io import TABLE_FORMATS, TableWriter, iter_table, read_table, table_columns, write_table
 
-def main():
+# df1 settings that a prebuilt customer index fixes at build time
+INDEX_SETTINGS = ('zip_col1', 'name_col1', 'address_col1', 'lat_col1', 'long_col1', 'id_col', 'priority_col',
+                  'lat_long_tolerance')
+
+# df1 columns read from --input_customers; everything else in the file is skipped
+CUSTOMER_COLUMNS = ('zip_col1', 'name_col1', 'address_col1', 'lat_col1', 'long_col1', 'id_col', 'priority_col')
+
+# File names of the match cache and incremental state inside a folder (pipeline input or output)
+MATCH_CACHE_FILE = 'match_cache.pkl'
+INCREMENTAL_STATE_FILE = 'incremental_state.pkl'
+
+def state_file(path, file_name):
+    """
+    The file a run's state is kept in: path itself, or file_name inside it when path is a
+    folder (a pipeline uri_folder input or output).
+    """
+    if path and os.path.isdir(path):
+        return os.path.join(path, file_name)
+    return path
+
+def read_customers(args):
+    """
+    Read --input_customers, loading only the configured df1 columns that the file has.
+    """
+    available = set(table_columns(args.input_customers, args.format))
+    columns = []
+    for key in CUSTOMER_COLUMNS:
+        column = getattr(args, key)
+        if column and column in available and column not in columns:
+            columns.append(column)
+    return read_table(args.input_customers, args.format, columns=columns)
+
+def load_customer_index(args):
+    """
+    Load the prebuilt customer index, or build one in memory from --input_customers.
+    """
+    if args.customer_index:
+        return CustomerIndex.load(args.customer_index)
+    # Only clean the df1 columns that have a df2 counterpart, like match() does
+    use_lat_long = args.lat_col2 and args.long_col2
+    return FuzzyMatcher.build_customer_index(
+        read_customers(args),
+        zip_col1=args.zip_col1,
+        name_col1=args.name_col1,
+        address_col1=args.address_col1 if args.address_col2 else None,
+        lat_col1=args.lat_col1 if use_lat_long else None,
+        long_col1=args.long_col1 if use_lat_long else None,
+        id_col=args.id_col,
+        priority_col=args.priority_col,
+        lat_long_tolerance=args.lat_long_tolerance,
+        radius_m=args.radius_m
+    )
+
+def save_match_cache(cache, args):
+    """
+    Persist the match cache for the next run (to --match_cache_out, else back to --match_cache)
+    and report its hit/miss counts.
+    """
+    if cache is not None:
+        cache.save(state_file(args.match_cache_out or args.match_cache, MATCH_CACHE_FILE))
+        print(f"Match cache: {cache.stats()}")
+
+def save_profile(args, profile):
+    """
+    Write the per-stage timings and counters of the run as a JSON sidecar of --matched_results.
+    Its peak_rss_mb is that of the main process; with --n_jobs > 1 the scoring runs in worker
+    processes, whose largest peak is peak_rss_children_mb.
+    """
+    stats_path = args.stats_path or f'{args.matched_results}.stats.json'
+    write_profile(profile, stats_path)
+    print(f"Wrote match stats to {stats_path}")
+
+def flag(value):
+    """
+    Parse the optional value of a boolean flag, so that '--flag', '--flag true' and '--flag False'
+    all work and pipeline boolean inputs can switch the flag either way.
+    """
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise argparse.ArgumentTypeError(f"expected true or false, got '{value}'")
+
+def main(argv=None):
     parser = argparse.ArgumentParser()
-    parser.add_argument('--input_customers', type=str, required=True)
-    parser.add_argument('--input_unmatched', type=str, required=True)
+    parser.add_argument('--input_customers', type=str, default=None)
+    # Prebuilt customer index (see build_customer_index.py), used instead of --input_customers
+    parser.add_argument('--customer_index', type=str, default=None)
+    parser.add_argument('--input_unmatched', type=str, default=None)
     parser.add_argument('--output_path', type=str, required=True)
     parser.add_argument('--matched_results', type=str, required=True)
-    parser.add_argument('--keep_all', action='store_true', default=False)
+    parser.add_argument('--keep_all', type=flag, nargs='?', const=True, default=False)
+    # Write the K best candidates per matched row (one row per candidate) instead of only the best
+    parser.add_argument('--top_k', type=int, default=None)
     # Required for df1 (matched to)
     parser.add_argument('--zip_col1', type=str, default='POSTAL_CODE')
     parser.add_argument('--name_col1', type=str, default='CUSTOMER_DESC')
@@ -21,13 +116,118 @@ def main():
     parser.add_argument('--long_col1', type=str, default='LONGITUDE_COORDINATE')
     parser.add_argument('--lat_col2', type=str, default=None)
     parser.add_argument('--long_col2', type=str, default=None)
-    parser.add_argument('--threshold', type=int, default=95)
+    parser.add_argument('--threshold', type=int, default=95,
+                        help='Threshold of the name fallback stage only (and of --dedupe); the lat-long and '
+                             'address stages use --lat_long_threshold and --address_threshold')
     parser.add_argument('--lat_long_tolerance', type=float, default=3)
-    args = parser.parse_args()
+    parser.add_argument('--id_col', type=str, default='CUSTOMER_ID')
+    parser.add_argument('--tie_break', type=str, default='first', choices=['first', 'all', 'priority'])
+    parser.add_argument('--priority_col', type=str, default=None)
+    parser.add_argument('--n_jobs', type=int, default=1)
+    parser.add_argument('--radius_m', type=float, default=None)
+    # Stream --input_unmatched in chunks of this many rows against a resident customer index
+    parser.add_argument('--chunksize', type=int, default=None)
+    # Input table format; 'auto' picks csv, parquet or arrow from the file extension
+    parser.add_argument('--format', type=str, default='auto', choices=['auto', *TABLE_FORMATS])
+    # Format of --matched_results (default: same as --format)
+    parser.add_argument('--output_format', type=str, default=None, choices=['auto', *TABLE_FORMATS])
+    # File or folder persisting normalized strings and best matches between runs (off when not set);
+    # loaded if present and saved back at the end unless --match_cache_out is set
+    parser.add_argument('--match_cache', type=str, default=None)
+    # File or folder to save the cache to instead (e.g. a pipeline output)
+    parser.add_argument('--match_cache_out', type=str, default=None)
+    # Use the cache without a previous one to load (first run of a pipeline)
+    parser.add_argument('--use_match_cache', type=flag, nargs='?', const=True, default=False)
+    parser.add_argument('--cache_max_entries', type=int, default=1_000_000)
+    parser.add_argument('--cache_max_mb', type=float, default=256)
+    # Match rows left unmatched by the postal-code blocks on customer name alone
+    parser.add_argument('--name_fallback', type=flag, nargs='?', const=True, default=False)
+    parser.add_argument('--fallback_top_k', type=int, default=20)
+    # Wider blocks to retry rows their own postal block left unmatched, in order
+    parser.add_argument('--block_levels', type=str, nargs='+', default=[], choices=['zip3', 'neighbour'])
+    parser.add_argument('--zip3_threshold', type=int, default=None)
+    parser.add_argument('--neighbour_threshold', type=int, default=None)
+    parser.add_argument('--neighbour_radius_m', type=float, default=10_000)
+    parser.add_argument('--max_level_candidates', type=int, default=5_000)
+    # Block rows without a usable postal code on geohash cells of this precision (off when not set)
+    parser.add_argument('--geohash_precision', type=int, default=None)
+    parser.add_argument('--geohash_threshold', type=int, default=85)
+    # Lean memory mode: clean projected matching columns only and attach results by position
+    parser.add_argument('--compact', type=flag, nargs='?', const=True, default=False)
+    # Split postal blocks with more customers than this on secondary keys (off when not set)
+    parser.add_argument('--max_block_size', type=int, default=None)
+    parser.add_argument('--sub_block_keys', type=str, nargs='+', default=['name_token'],
+                        choices=['name_token', 'street_number', 'grid'])
+    parser.add_argument('--sub_block_grid_m', type=float, default=500)
+    # Rematch this many rows of split blocks against the whole block to estimate the recall cost
+    parser.add_argument('--sub_block_audit', type=int, default=0)
+    # Scorer and threshold per stage (the name fallback uses --threshold)
+    parser.add_argument('--lat_long_scorer', type=str, default=None, choices=list(SCORERS))
+    parser.add_argument('--lat_long_threshold', type=int, default=None,
+                        help='Name threshold of the lat-long stage (default 80, independent of --threshold)')
+    parser.add_argument('--address_scorer', type=str, default=None, choices=list(SCORERS))
+    parser.add_argument('--address_threshold', type=int, default=None,
+                        help='Name and address threshold of the address stage (default 85, independent of --threshold)')
+    parser.add_argument('--fallback_scorer', type=str, default=None, choices=list(SCORERS))
+    parser.add_argument('--geohash_scorer', type=str, default=None, choices=list(SCORERS))
+    parser.add_argument('--level_scorer', type=str, default=None, choices=list(SCORERS))
+    # Score every candidate pair instead of skipping those whose length/token bound is below the threshold
+    parser.add_argument('--no_prefilter', type=flag, nargs='?', const=True, default=False)
+    # Cluster duplicates within --input_customers instead of matching --input_unmatched
+    parser.add_argument('--dedupe', type=flag, nargs='?', const=True, default=False)
+    # State file or folder of the previous run; only rows that may match differently are rematched.
+    # The new state is saved back to it unless --incremental_state_out is set
+    parser.add_argument('--incremental_state', type=str, default=None)
+    # File or folder to save the new state to instead (e.g. a pipeline output)
+    parser.add_argument('--incremental_state_out', type=str, default=None)
+    # Match incrementally without a previous state (first run of a pipeline: everything is matched)
+    parser.add_argument('--incremental', type=flag, nargs='?', const=True, default=False)
+    # Per-stage timings and counters of the run (default: --matched_results + '.stats.json')
+    parser.add_argument('--stats_path', type=str, default=None)
+    # Match only the postal blocks of shard --shard_id of --num_shards; --matched_results is then
+    # the shard's partial result, to be combined with merge_shards.py
+    parser.add_argument('--num_shards', type=int, default=1)
+    parser.add_argument('--shard_id', type=int, default=0)
+    args = parser.parse_args(argv)
+    if not (args.input_customers or args.customer_index):
+        parser.error('one of --input_customers or --customer_index is required')
+    if args.dedupe and not args.input_customers:
+        parser.error('--dedupe requires --input_customers')
+    if not (args.dedupe or args.input_unmatched):
+        parser.error('--input_unmatched is required unless --dedupe is set')
+    incremental = args.incremental or args.incremental_state is not None
+    if incremental and not (args.incremental_state or args.incremental_state_out):
+        parser.error('--incremental needs --incremental_state or --incremental_state_out')
+    if args.use_match_cache and not (args.match_cache or args.match_cache_out):
+        parser.error('--use_match_cache needs --match_cache or --match_cache_out')
+    if incremental and args.chunksize:
+        parser.error('--incremental_state cannot be combined with --chunksize')
+    if incremental and args.compact:
+        parser.error('--incremental_state cannot be combined with --compact')
+    if args.num_shards > 1 and (args.chunksize or incremental or args.dedupe):
+        parser.error('--num_shards cannot be combined with --chunksize, --incremental_state or --dedupe')
+    if not 0 <= args.shard_id < args.num_shards:
+        parser.error('--shard_id must be between 0 and --num_shards - 1')
+    output_format = args.output_format or args.format
 
-    # Load data
-    customers = pd.read_csv(args.input_customers)
-    unmatched_df = pd.read_csv(args.input_unmatched)
+    if args.dedupe:
+        stats = Counter()
+        clusters = FuzzyMatcher.dedupe(
+            read_customers(args),
+            zip_col1=args.zip_col1,
+            name_col1=args.name_col1,
+            address_col1=args.address_col1,
+            lat_col1=args.lat_col1,
+            long_col1=args.long_col1,
+            threshold=args.threshold,
+            id_col=args.id_col,
+            geohash_precision=args.geohash_precision,
+            stats=stats
+        )
+        print(clusters.head())
+        write_table(clusters, args.matched_results, output_format)
+        save_profile(args, match_profile(stats))
+        return
 
     # Prepare kwargs for optional columns
     matcher_kwargs = dict(
@@ -37,7 +237,42 @@ def main():
         lat_col1=args.lat_col1,
         long_col1=args.long_col1,
         threshold=args.threshold,
-        lat_long_tolerance=args.lat_long_tolerance
+        lat_long_tolerance=args.lat_long_tolerance,
+        id_col=args.id_col,
+        tie_break=args.tie_break,
+        priority_col=args.priority_col,
+        n_jobs=args.n_jobs,
+        radius_m=args.radius_m,
+        name_fallback=args.name_fallback,
+        fallback_top_k=args.fallback_top_k,
+        block_levels=args.block_levels,
+        level_thresholds={
+            level: threshold
+            for level, threshold in (('zip3', args.zip3_threshold), ('neighbour', args.neighbour_threshold))
+            if threshold is not None
+        },
+        neighbour_radius_m=args.neighbour_radius_m,
+        max_level_candidates=args.max_level_candidates,
+        geohash_precision=args.geohash_precision,
+        geohash_threshold=args.geohash_threshold,
+        compact=args.compact,
+        max_block_size=args.max_block_size,
+        sub_block_keys=args.sub_block_keys,
+        sub_block_grid_m=args.sub_block_grid_m,
+        sub_block_audit=args.sub_block_audit,
+        stage_scorers={
+            stage: scorer
+            for stage, scorer in (('lat_long', args.lat_long_scorer), ('address_zip', args.address_scorer),
+                                  ('name_fallback', args.fallback_scorer), ('geohash', args.geohash_scorer),
+                                  ('block_levels', args.level_scorer))
+            if scorer is not None
+        },
+        stage_thresholds={
+            stage: threshold
+            for stage, threshold in (('lat_long', args.lat_long_threshold), ('address_zip', args.address_threshold))
+            if threshold is not None
+        },
+        prefilter=not args.no_prefilter
     )
     # Only add optional df2 columns if provided
     if args.zip_col2:
@@ -50,15 +285,71 @@ def main():
         matcher_kwargs['lat_col2'] = args.lat_col2
     if args.long_col2:
         matcher_kwargs['long_col2'] = args.long_col2
+    cache = None
+    if args.match_cache or args.use_match_cache:
+        cache = MatchCache(
+            max_entries=args.cache_max_entries, max_bytes=int(args.cache_max_mb * 1024 ** 2),
+            path=state_file(args.match_cache, MATCH_CACHE_FILE)
+        )
+        matcher_kwargs['cache'] = cache
+
+    if args.chunksize or args.customer_index:
+        # Column names and coordinate cleaning come from the index
+        customer_index = load_customer_index(args)
+        for key in INDEX_SETTINGS:
+            matcher_kwargs.pop(key)
+        if args.radius_m is None:
+            matcher_kwargs.pop('radius_m')
+
+    if args.chunksize:
+        # Reuse one worker pool across chunks
+        n_jobs = resolve_n_jobs(args.n_jobs)
+        pool = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs != 1 else None
+        if pool:
+            matcher_kwargs['executor'] = pool
+        stats = Counter()
+        try:
+            chunks = iter_table(args.input_unmatched, args.chunksize, args.format)
+            with TableWriter(args.matched_results, output_format) as writer:
+                for result in FuzzyMatcher.match_chunks(
+                        customer_index, chunks, keep_all=args.keep_all, top_k=args.top_k, stats=stats,
+                        **matcher_kwargs):
+                    writer.write(result)
+            print(f"Wrote {writer.rows} rows to {args.matched_results}")
+        finally:
+            if pool:
+                pool.shutdown()
+        # Once the pool is shut down, so that its workers' peak memory is in the profile
+        save_profile(args, match_profile(stats))
+        save_match_cache(cache, args)
+        return
+
+    # Load data; every df2 column is carried through to the output, so none are projected away
+    unmatched_df = read_table(args.input_unmatched, args.format)
 
     # Run fuzzy matching
-    matcher = FuzzyMatcher(
-        customers, unmatched_df,
-        **matcher_kwargs
-    )
-    result = matcher.match(keep_all=args.keep_all)
+    if args.customer_index:
+        matcher = FuzzyMatcher.from_index(customer_index, unmatched_df, **matcher_kwargs)
+    else:
+        customers = read_customers(args)
+        matcher = FuzzyMatcher(
+            customers, unmatched_df,
+            **matcher_kwargs
+        )
+    if args.num_shards > 1:
+        matcher.shard(args.num_shards, args.shard_id)
+    if incremental:
+        previous = None
+        if args.incremental_state:
+            previous = IncrementalState.load(state_file(args.incremental_state, INCREMENTAL_STATE_FILE))
+        result, state = matcher.match_incremental(previous, keep_all=args.keep_all, top_k=args.top_k)
+        state.save(state_file(args.incremental_state_out or args.incremental_state, INCREMENTAL_STATE_FILE))
+    else:
+        result = matcher.match(keep_all=args.keep_all, top_k=args.top_k)
     print(result.head())
-    result.to_csv(args.matched_results, index=False)
+    write_table(result, args.matched_results, output_format)
+    save_profile(args, matcher.profile())
+    save_match_cache(cache, args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,36 @@
+"""
+Local stand-in for a sharded multi-node run: runs run_fuzzy_matching.py once per shard in a
+pool of processes, then merges the partial results like merge_shards.py.
+
+Takes --num_shards plus the run_fuzzy_matching.py arguments of a single-node run, e.g.
+    python run_local_shards.py --num_shards 4 --input_customers c.csv --input_unmatched u.csv ...
+"""
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import run_fuzzy_matching
+from sharding import merge_partials, partial_path
+
+def run_shard(argv):
+    run_fuzzy_matching.main(argv)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_shards', type=int, required=True)
+    parser.add_argument('--matched_results', type=str, required=True)
+    parser.add_argument('--output_format', type=str, default='auto')
+    args, run_args = parser.parse_known_args(argv)
+
+    partials = [partial_path(args.matched_results, shard_id) for shard_id in range(args.num_shards)]
+    shard_argv = [
+        run_args + ['--num_shards', str(args.num_shards), '--shard_id', str(shard_id),
+                    '--matched_results', partial, '--output_format', args.output_format]
+        for shard_id, partial in enumerate(partials)
+    ]
+    with ProcessPoolExecutor(max_workers=args.num_shards) as pool:
+        list(pool.map(run_shard, shard_argv))
+    rows = merge_partials(partials, args.matched_results, args.output_format)
+    print(f"Merged {args.num_shards} shards into {rows} rows in {args.matched_results}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,171 @@
+import numpy as np
+from rapidfuzz import fuzz
+
+# Scorers a matching stage can use, by name. The name is part of cached match keys.
+SCORERS = {'ratio': fuzz.ratio, 'token_set_ratio': fuzz.token_set_ratio, 'WRatio': fuzz.WRatio}
+
+# Margin below the threshold a bound must fall to prune, so float rounding never prunes a match.
+PRUNE_MARGIN = 1e-6
+
+
+def get_scorer(name):
+    """
+    The rapidfuzz scorer function called name, see SCORERS.
+    """
+    if name not in SCORERS:
+        raise ValueError(f"Unknown scorer '{name}'. Expected one of {tuple(SCORERS)}.")
+    return SCORERS[name]
+
+
+def text_lengths(values):
+    """
+    Length of every string of a sequence, as an int64 array.
+    """
+    return np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+
+
+def token_key(text):
+    """
+    The distinct whitespace tokens of text and the length of their sorted, space-joined form,
+    which is what token_set_ratio compares when two strings share no token.
+    """
+    tokens = set(text.split())
+    return tokens, len(' '.join(tokens))
+
+
+def length_bound(lengths1, lengths2):
+    """
+    Upper bound of fuzz.ratio for strings of the given lengths: at least the length difference
+    has to be inserted or deleted, so the score is at most 200 * shorter / (sum of lengths).
+    """
+    lengths1 = np.asarray(lengths1, dtype=np.float64)
+    lengths2 = np.asarray(lengths2, dtype=np.float64)
+    total = lengths1 + lengths2
+    # Two empty strings are equal
+    return np.divide(200 * np.minimum(lengths1, lengths2), total, out=np.full(total.shape, 100.0), where=total > 0)
+
+
+def wratio_bound(lengths1, lengths2):
+    """
+    Upper bound of fuzz.WRatio for strings of the given lengths. WRatio only reaches 100 for
+    lengths within a factor 1.5; beyond that its partial scores are scaled by 0.9 (up to a
+    factor 8) or 0.6, and its plain ratio is below either by the length bound.
+    """
+    shorter = np.minimum(lengths1, lengths2).astype(np.float64)
+    longer = np.maximum(lengths1, lengths2).astype(np.float64)
+    length_ratio = np.divide(longer, shorter, out=np.full(shorter.shape, np.inf), where=shorter > 0)
+    bound = np.where(length_ratio <= 1.5, 100.0, np.where(length_ratio <= 8, 90.0, 60.0))
+    return np.where(shorter > 0, bound, 0.0)
+
+
+def token_set_bound(lengths1, lengths2, overlap):
+    """
+    Upper bound of fuzz.token_set_ratio: 100 for strings sharing a token, otherwise the length
+    bound of their token_key lengths (0 if either has no token).
+    """
+    lengths1 = np.asarray(lengths1)
+    lengths2 = np.asarray(lengths2)
+    bound = np.where(np.minimum(lengths1, lengths2) > 0, length_bound(lengths1, lengths2), 0.0)
+    return np.where(overlap, 100.0, bound)
+
+
+class ScorePrefilter:
+    """
+    Cheap upper bounds on a scorer's score of a query against a fixed list of choices, to skip
+    the choices that cannot reach the threshold before the scorer runs.
+
+    The bounds are exact (see length_bound, wratio_bound and token_set_bound), so pruning never
+    changes a result: a pruned choice would have scored below the threshold, which score_cutoff
+    reports as 0 anyway.
+    """
+
+    def __init__(self, scorer, choices):
+        """
+        Parameters:
+        scorer (str): Scorer name, see SCORERS.
+        choices (list): Choice strings.
+        """
+        self.scorer = scorer
+        self.n_choices = len(choices)
+        if scorer == 'token_set_ratio':
+            keys = [token_key(choice) for choice in choices]
+            self.lengths = np.array([length for _, length in keys], dtype=np.int64)
+            postings = {}
+            for position, (tokens, _) in enumerate(keys):
+                for token in tokens:
+                    postings.setdefault(token, []).append(position)
+            self.postings = {token: np.asarray(positions, dtype=np.int64) for token, positions in postings.items()}
+        else:
+            self.lengths = text_lengths(choices)
+
+    def _bounds(self, length):
+        if self.scorer == 'WRatio':
+            return wratio_bound(np.full(self.n_choices, length), self.lengths)
+        return length_bound(np.full(self.n_choices, length), self.lengths)
+
+    def columns(self, query, threshold):
+        """
+        Positions of the choices whose bound reaches threshold, ascending.
+        """
+        if self.scorer != 'token_set_ratio':
+            return np.flatnonzero(self._bounds(len(query)) >= threshold - PRUNE_MARGIN)
+        tokens, length = token_key(query)
+        keep = token_set_bound(np.full(self.n_choices, length), self.lengths, False) >= threshold - PRUNE_MARGIN
+        for token in tokens:
+            if token in self.postings:
+                keep[self.postings[token]] = True
+        return np.flatnonzero(keep)
+
+    def groups(self, queries, threshold):
+        """
+        Split queries into groups scored against the same choices.
+
+        Returns:
+        list: (query positions, choice positions) array pairs. For ratio and WRatio, whose bounds
+            only depend on lengths, queries of neighbouring lengths keeping the same choices form
+            one group, so a block where nothing is pruned is still scored in one go; for
+            token_set_ratio every query is its own group.
+        """
+        if self.scorer == 'token_set_ratio':
+            return [(np.array([position]), self.columns(query, threshold)) for position, query in enumerate(queries)]
+        lengths = text_lengths(queries)
+        order = np.argsort(lengths, kind='stable')
+        unique_lengths, starts = np.unique(lengths[order], return_index=True)
+        groups = []
+        for length, positions in zip(unique_lengths.tolist(), np.split(order, starts[1:])):
+            columns = np.flatnonzero(self._bounds(length) >= threshold - PRUNE_MARGIN)
+            if groups and np.array_equal(groups[-1][1], columns):
+                groups[-1] = (np.concatenate([groups[-1][0], positions]), columns)
+            else:
+                groups.append((positions, columns))
+        return groups
+
+
+def pair_mask(scorer, queries, choices, threshold):
+    """
+    Whether each (query, choice) pair can reach threshold, see ScorePrefilter.
+
+    Parameters:
+    scorer (str): Scorer name, see SCORERS.
+    queries (list): Query strings.
+    choices (list): Choice strings, one per query.
+    threshold (float): Minimum score.
+
+    Returns:
+    np.ndarray: Boolean mask of the pairs worth scoring.
+    """
+    if scorer == 'token_set_ratio':
+        query_keys = [token_key(query) for query in queries]
+        choice_keys = [token_key(choice) for choice in choices]
+        overlap = np.array([not tokens1.isdisjoint(tokens2) for (tokens1, _), (tokens2, _) in zip(query_keys, choice_keys)],
+                           dtype=bool)
+        bounds = token_set_bound(
+            np.array([length for _, length in query_keys], dtype=np.int64),
+            np.array([length for _, length in choice_keys], dtype=np.int64),
+            overlap
+        )
+    elif scorer == 'WRatio':
+        bounds = wratio_bound(text_lengths(queries), text_lengths(choices))
+    else:
+        bounds = length_bound(text_lengths(queries), text_lengths(choices))
+    return bounds >= threshold - PRUNE_MARGIN
@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import logging
+import os
+from customer_index import META_FILE
+from match_service import MatchService
+from run_fuzzy_matching import load_customer_index
+from table_io import TABLE_FORMATS
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    # Customer master, as a prebuilt index (see build_customer_index.py) or a table cleaned at startup
+    parser.add_argument('--customer_index', type=str, default=None)
+    parser.add_argument('--input_customers', type=str, default=None)
+    parser.add_argument('--format', type=str, default='auto', choices=['auto', *TABLE_FORMATS])
+    parser.add_argument('--zip_col1', type=str, default='POSTAL_CODE')
+    parser.add_argument('--name_col1', type=str, default='CUSTOMER_DESC')
+    parser.add_argument('--address_col1', type=str, default='STREET_ADDRESS')
+    parser.add_argument('--lat_col1', type=str, default='LATITUDE_COORDINATE')
+    parser.add_argument('--long_col1', type=str, default='LONGITUDE_COORDINATE')
+    parser.add_argument('--id_col', type=str, default='CUSTOMER_ID')
+    parser.add_argument('--priority_col', type=str, default=None)
+    parser.add_argument('--lat_long_tolerance', type=float, default=3)
+    parser.add_argument('--radius_m', type=float, default=None)
+    # Fields of the records to match
+    parser.add_argument('--zip_col2', type=str, default='POSTAL_CODE')
+    parser.add_argument('--name_col2', type=str, default='CUSTOMER_DESC')
+    parser.add_argument('--address_col2', type=str, default=None)
+    parser.add_argument('--lat_col2', type=str, default=None)
+    parser.add_argument('--long_col2', type=str, default=None)
+    parser.add_argument('--threshold', type=int, default=95)
+    parser.add_argument('--tie_break', type=str, default='first', choices=['first', 'all', 'priority'])
+    parser.add_argument('--top_k', type=int, default=None)
+    parser.add_argument('--name_fallback', action='store_true', default=False)
+    parser.add_argument('--block_levels', type=str, nargs='+', default=[], choices=['zip3', 'neighbour'])
+    parser.add_argument('--geohash_precision', type=int, default=None)
+    # JSON lines over stdin/stdout, or over TCP when --port is set
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None)
+    # Single-record requests arriving within this window are matched together
+    parser.add_argument('--batch_window_ms', type=float, default=2)
+    parser.add_argument('--max_batch', type=int, default=64)
+    # How often the customer master is checked for changes (TCP mode; stdin mode checks per request)
+    parser.add_argument('--reload_interval_s', type=float, default=5)
+    args = parser.parse_args(argv)
+    if not (args.input_customers or args.customer_index):
+        parser.error('one of --input_customers or --customer_index is required')
+
+    logging.getLogger().setLevel(logging.ERROR)
+    matcher_kwargs = dict(
+        zip_col2=args.zip_col2,
+        name_col2=args.name_col2,
+        address_col2=args.address_col2,
+        lat_col2=args.lat_col2,
+        long_col2=args.long_col2,
+        threshold=args.threshold,
+        tie_break=args.tie_break,
+        name_fallback=args.name_fallback,
+        block_levels=args.block_levels,
+        geohash_precision=args.geohash_precision
+    )
+    if args.radius_m is not None:
+        matcher_kwargs['radius_m'] = args.radius_m
+    watch_path = os.path.join(args.customer_index, META_FILE) if args.customer_index else args.input_customers
+    service = MatchService(lambda: load_customer_index(args), matcher_kwargs, watch_path=watch_path, top_k=args.top_k)
+
+    if args.port is None:
+        service.serve_lines()
+    else:
+        asyncio.run(service.serve_socket(
+            args.host, args.port, batch_window_ms=args.batch_window_ms, max_batch=args.max_batch,
+            reload_interval_s=args.reload_interval_s
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from table_io import detect_format, read_table, write_table
+
+# Column carrying the df2 row position of every output row of a shard, so that merged partial
+# results come out in the order of a single-node run. Dropped by merge_partials.
+SHARD_POSITION_COL = '__row_position'
+
+
+def shard_of(postal_codes, num_shards):
+    """
+    Shard of every (cleaned) postal code.
+
+    The hash only depends on the postal code string, so it is the same in every process and on
+    every node, and df1 and df2 rows of a postal block always land on the same shard. Missing
+    postal codes all go to one shard.
+
+    Parameters:
+    postal_codes (array-like): Cleaned postal codes.
+    num_shards (int): Number of shards.
+
+    Returns:
+    np.ndarray: Shard id (0 to num_shards - 1) of every postal code.
+    """
+    codes = pd.Series(postal_codes, dtype=object).fillna('').astype(str).to_numpy(dtype=object)
+    return (pd.util.hash_array(codes) % np.uint64(num_shards)).astype(np.int64)
+
+
+def partial_path(matched_results, shard_id):
+    """
+    Path of the partial result of shard_id next to the final matched_results file.
+    """
+    root, ext = os.path.splitext(matched_results)
+    return f'{root}.shard{shard_id}{ext}'
+
+
+def merge_partials(partials, matched_results, fmt='auto'):
+    """
+    Combine the partial results of all shards into the file a single-node run would write.
+
+    Rows are put back in df2 order (rows of the same df2 row keep their order within their
+    shard) and the position column is dropped. CSV partials are merged as text, so values are
+    written exactly as the shards wrote them.
+
+    Parameters:
+    partials (list): Partial result files, one per shard.
+    matched_results (str): Final output file.
+    fmt (str): Table format of the partials and the output ('auto' detects it from the extensions).
+
+    Returns:
+    int: Number of rows written.
+    """
+    frames = []
+    for path in partials:
+        if detect_format(path, fmt) == 'csv':
+            frames.append(pd.read_csv(path, dtype=str, keep_default_na=False))
+        else:
+            frames.append(read_table(path, fmt))
+    # Shards without rows carry no column types
+    merged = pd.concat([frame for frame in frames if len(frame)] or frames[:1], ignore_index=True)
+    positions = merged[SHARD_POSITION_COL].astype(np.int64).to_numpy()
+    merged = merged.iloc[np.argsort(positions, kind='stable')].drop(columns=SHARD_POSITION_COL)
+    write_table(merged, matched_results, fmt)
+    return len(merged)
@@ -0,0 +1,239 @@
+import numpy as np
+
+# Mean Earth radius in metres (IUGG).
+EARTH_RADIUS_M = 6_371_008.8
+
+# Length of one degree of latitude in metres.
+METERS_PER_DEGREE = EARTH_RADIUS_M * np.pi / 180
+
+# Geohash digit alphabet.
+GEOHASH_BASE32 = np.array(list('0123456789bcdefghjkmnpqrstuvwxyz'))
+
+# Longest geohash whose bits fit an int64 key.
+MAX_GEOHASH_PRECISION = 12
+
+
+def haversine_m(lat1, long1, lat2, long2):
+    """
+    Vectorized great-circle distance in metres between two sets of points given in degrees.
+    """
+    lat1, long1, lat2, long2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, long1, lat2, long2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((long2 - long1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class GridIndex:
+    """
+    Lat/long grid hash for radius queries.
+
+    Points are bucketed into cells at least radius_m wide and stored sorted by cell key, so a
+    radius query only looks up the 3x3 cells around each query point with a binary search and
+    then filters the candidates by haversine distance.
+    """
+
+    def __init__(self, lat, long, radius_m):
+        """
+        Build the index.
+
+        Parameters:
+        lat (array-like): Latitudes in degrees; NaN points are not indexed.
+        long (array-like): Longitudes in degrees; NaN points are not indexed.
+        radius_m (float): Largest radius in metres that will be queried.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        long = np.asarray(long, dtype=np.float64)
+        self.radius_m = float(radius_m)
+        positions = np.flatnonzero(~(np.isnan(lat) | np.isnan(long)))
+
+        # Longitude degrees shrink towards the poles, so size cells for the most poleward point
+        max_abs_lat = np.abs(lat[positions]).max() if len(positions) else 0.0
+        self.lat_step = max(self.radius_m / METERS_PER_DEGREE, 1e-9)
+        self.long_step = self.lat_step / max(np.cos(np.radians(min(max_abs_lat + self.lat_step, 89.9))), 1e-3)
+
+        keys = self._cell_keys(self._cells(lat[positions], self.lat_step), self._cells(long[positions], self.long_step))
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.positions = positions[order]
+        self.lat = lat[self.positions]
+        self.long = long[self.positions]
+
+    @staticmethod
+    def _cells(values, step):
+        return np.floor(values / step).astype(np.int64)
+
+    @staticmethod
+    def _cell_keys(lat_cells, long_cells):
+        # Cells are small integers (|cell| < 2**31 for any radius above a millimetre)
+        return (lat_cells << 32) + long_cells
+
+    def query_radius(self, lat, long, radius_m=None):
+        """
+        Find all indexed points within radius_m of each query point.
+
+        Parameters:
+        lat (array-like): Query latitudes in degrees.
+        long (array-like): Query longitudes in degrees.
+        radius_m (float): Search radius in metres (default: the radius the index was built for).
+
+        Returns:
+        tuple: (query positions, indexed point positions, distances in metres) arrays of
+            all pairs within the radius, ordered by query then point position.
+        """
+        radius_m = self.radius_m if radius_m is None else float(radius_m)
+        if radius_m > self.radius_m:
+            raise ValueError(f"radius_m {radius_m} exceeds the index radius {self.radius_m}.")
+
+        lat = np.asarray(lat, dtype=np.float64)
+        long = np.asarray(long, dtype=np.float64)
+        queries = np.flatnonzero(~(np.isnan(lat) | np.isnan(long)))
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        if not len(queries) or not len(self.keys):
+            return empty
+
+        lat_cells = self._cells(lat[queries], self.lat_step)
+        long_cells = self._cells(long[queries], self.long_step)
+        pair_queries, pair_slots = [], []
+        for d_lat in (-1, 0, 1):
+            for d_long in (-1, 0, 1):
+                keys = self._cell_keys(lat_cells + d_lat, long_cells + d_long)
+                starts = np.searchsorted(self.keys, keys, side='left')
+                counts = np.searchsorted(self.keys, keys, side='right') - starts
+                # Expand each [start, start + count) range into explicit slots
+                pair_queries.append(np.repeat(queries, counts))
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                pair_slots.append(np.repeat(starts, counts) + offsets)
+
+        pair_queries = np.concatenate(pair_queries)
+        pair_slots = np.concatenate(pair_slots)
+        if not len(pair_slots):
+            return empty
+
+        distances = haversine_m(lat[pair_queries], long[pair_queries], self.lat[pair_slots], self.long[pair_slots])
+        within = distances <= radius_m
+        pair_queries, pair_points, distances = pair_queries[within], self.positions[pair_slots[within]], distances[within]
+        order = np.lexsort((pair_points, pair_queries))
+        return pair_queries[order], pair_points[order], distances[order]
+
+
+def geohash_cells(lat, long, precision):
+    """
+    Vectorized geohash cell of each point as separate latitude and longitude cell numbers.
+
+    A geohash of precision p halves the longitude range ceil(5p / 2) times and the latitude range
+    floor(5p / 2) times, so its cell is floor((long + 180) / 360 * 2**long_bits) by
+    floor((lat + 90) / 180 * 2**lat_bits).
+
+    Parameters:
+    lat (array-like): Latitudes in degrees.
+    long (array-like): Longitudes in degrees.
+    precision (int): Number of geohash characters (1 to MAX_GEOHASH_PRECISION).
+
+    Returns:
+    tuple: (latitude cells, longitude cells, mask of valid points) arrays; cells of invalid
+        (NaN or out of range) points are 0.
+    """
+    if not 1 <= precision <= MAX_GEOHASH_PRECISION:
+        raise ValueError(f"Geohash precision must be between 1 and {MAX_GEOHASH_PRECISION}, got {precision}.")
+    lat = np.asarray(lat, dtype=np.float64)
+    long = np.asarray(long, dtype=np.float64)
+    lat_bits, long_bits = 5 * precision // 2, (5 * precision + 1) // 2
+    valid = (np.abs(lat) <= 90) & (np.abs(long) <= 180)
+    lat_cells = np.zeros(len(lat), dtype=np.int64)
+    long_cells = np.zeros(len(long), dtype=np.int64)
+    lat_cells[valid] = np.minimum(np.floor((lat[valid] + 90) / 180 * 2.0 ** lat_bits), 2 ** lat_bits - 1)
+    long_cells[valid] = np.minimum(np.floor((long[valid] + 180) / 360 * 2.0 ** long_bits), 2 ** long_bits - 1)
+    return lat_cells, long_cells, valid
+
+
+def geohash_keys(lat_cells, long_cells, precision):
+    """
+    Interleave latitude and longitude cell numbers into int64 geohash keys (longitude bit first,
+    as in the geohash string).
+    """
+    lat_bits, long_bits = 5 * precision // 2, (5 * precision + 1) // 2
+    keys = np.zeros(len(lat_cells), dtype=np.int64)
+    for bit in range(lat_bits + long_bits):
+        if bit % 2 == 0:
+            cells, shift = long_cells, long_bits - 1 - bit // 2
+        else:
+            cells, shift = lat_cells, lat_bits - 1 - bit // 2
+        keys = (keys << 1) | ((cells >> shift) & 1)
+    return keys
+
+
+def geohash(lat, long, precision):
+    """
+    Vectorized geohash strings of points, None for invalid points.
+    """
+    lat_cells, long_cells, valid = geohash_cells(lat, long, precision)
+    keys = geohash_keys(lat_cells, long_cells, precision)
+    digits = GEOHASH_BASE32[(keys[:, None] >> (5 * np.arange(precision - 1, -1, -1))) & 31]
+    hashes = np.full(len(keys), None, dtype=object)
+    hashes[valid] = [''.join(row) for row in digits[valid]]
+    return hashes
+
+
+class GeohashIndex:
+    """
+    Geohash cell index for neighbourhood queries.
+
+    Points are stored sorted by their int64 geohash key, so a query looks up its own cell and
+    the 8 cells around it with a binary search each. Unlike GridIndex there is no distance
+    filter: the cells themselves are the blocking key.
+    """
+
+    def __init__(self, lat, long, precision):
+        """
+        Build the index.
+
+        Parameters:
+        lat (array-like): Latitudes in degrees; invalid points are not indexed.
+        long (array-like): Longitudes in degrees; invalid points are not indexed.
+        precision (int): Geohash precision of the cells.
+        """
+        self.precision = precision
+        lat_cells, long_cells, valid = geohash_cells(lat, long, precision)
+        keys = geohash_keys(lat_cells[valid], long_cells[valid], precision)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.positions = np.flatnonzero(valid)[order]
+
+    def query_neighbours(self, lat, long):
+        """
+        Find all indexed points in the cell of each query point or one of its 8 neighbours.
+
+        Parameters:
+        lat (array-like): Query latitudes in degrees.
+        long (array-like): Query longitudes in degrees.
+
+        Returns:
+        tuple: (query positions, indexed point positions) arrays of all pairs, ordered by query
+            then point position.
+        """
+        lat_cells, long_cells, valid = geohash_cells(lat, long, self.precision)
+        queries = np.flatnonzero(valid)
+        lat_cells, long_cells = lat_cells[queries], long_cells[queries]
+        lat_bits, long_bits = 5 * self.precision // 2, (5 * self.precision + 1) // 2
+
+        pair_queries, pair_slots = [], []
+        for d_lat in (-1, 0, 1):
+            neighbour_lat = lat_cells + d_lat
+            # Cells beyond the poles do not exist; longitude wraps around the antimeridian
+            inside = (neighbour_lat >= 0) & (neighbour_lat < 2 ** lat_bits)
+            for d_long in (-1, 0, 1):
+                neighbour_long = (long_cells + d_long) % (2 ** long_bits)
+                keys = geohash_keys(neighbour_lat[inside], neighbour_long[inside], self.precision)
+                starts = np.searchsorted(self.keys, keys, side='left')
+                counts = np.searchsorted(self.keys, keys, side='right') - starts
+                pair_queries.append(np.repeat(queries[inside], counts))
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                pair_slots.append(np.repeat(starts, counts) + offsets)
+
+        pair_queries = np.concatenate(pair_queries)
+        pair_slots = np.concatenate(pair_slots)
+        if not len(pair_slots):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pair_points = self.positions[pair_slots]
+        # Near the antimeridian with very coarse cells, two neighbours can be the same cell
+        pairs = np.unique(np.stack([pair_queries, pair_points]), axis=1)
+        return pairs[0], pairs[1]
@@ -0,0 +1,217 @@
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+TABLE_FORMATS = ('csv', 'parquet', 'arrow')
+
+# File extensions recognised when the format is 'auto'.
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.txt': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+
+def detect_format(path, fmt='auto'):
+    """
+    Resolve the table format of path: fmt itself unless it is 'auto', otherwise the format
+    implied by the file extension, falling back to CSV.
+    """
+    if fmt and fmt != 'auto':
+        if fmt not in TABLE_FORMATS:
+            raise ValueError(f"Unknown table format '{fmt}'. Expected one of {TABLE_FORMATS} or 'auto'.")
+        return fmt
+    return FORMAT_EXTENSIONS.get(os.path.splitext(str(path))[1].lower(), 'csv')
+
+
+def _require_pyarrow(fmt):
+    if pa is None:
+        raise ImportError(f"Reading or writing {fmt} files requires pyarrow. Install it with 'pip install pyarrow'.")
+
+
+def _arrow_strings(arrow_type):
+    """
+    types_mapper for Table.to_pandas: keep string columns Arrow-backed, everything else as usual.
+    """
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def _open_arrow(path):
+    """
+    Memory-map an Arrow IPC (Feather v2) file as a pyarrow Table without copying it.
+    """
+    return pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+
+def table_columns(path, fmt='auto'):
+    """
+    List the column names of a table without loading its rows.
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    _require_pyarrow(fmt)
+    if fmt == 'parquet':
+        return list(pq.read_schema(path).names)
+    return list(_open_arrow(path).schema.names)
+
+
+def _csv_kwargs(columns):
+    if columns is None:
+        return {}
+    wanted = set(columns)
+    return {'usecols': lambda column: column in wanted}
+
+
+def read_table(path, fmt='auto', columns=None):
+    """
+    Read a CSV, Parquet or Arrow IPC table into a DataFrame.
+
+    Parameters:
+    path (str): File to read.
+    fmt (str): 'csv', 'parquet', 'arrow' or 'auto' (detect from the extension).
+    columns (list): Only load these columns (all columns when None).
+
+    Returns:
+    pd.DataFrame: The table; Parquet/Arrow string columns are Arrow-backed.
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        return pd.read_csv(path, **_csv_kwargs(columns))
+    _require_pyarrow(fmt)
+    if fmt == 'parquet':
+        table = pq.read_table(path, columns=columns)
+    else:
+        table = _open_arrow(path)
+        if columns is not None:
+            table = table.select(columns)
+    return table.to_pandas(types_mapper=_arrow_strings)
+
+
+def iter_table(path, chunksize, fmt='auto', columns=None):
+    """
+    Read a table in chunks of at most chunksize rows.
+
+    Chunks keep a running RangeIndex, like pd.read_csv(chunksize=...), so row labels are
+    unique across the whole file.
+
+    Yields:
+    pd.DataFrame: Consecutive chunks of the table.
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize, **_csv_kwargs(columns))
+        return
+
+    _require_pyarrow(fmt)
+    if fmt == 'parquet':
+        tables = (pa.Table.from_batches([batch]) for batch in
+                  pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns))
+    else:
+        table = _open_arrow(path)
+        if columns is not None:
+            table = table.select(columns)
+        tables = (table.slice(start, chunksize) for start in range(0, table.num_rows, chunksize))
+
+    start = 0
+    for batch in tables:
+        chunk = batch.to_pandas(types_mapper=_arrow_strings)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def write_table(frame, path, fmt='auto'):
+    """
+    Write a DataFrame (without its index) as CSV, Parquet or Arrow IPC.
+    """
+    with TableWriter(path, fmt) as writer:
+        writer.write(frame)
+
+
+class TableWriter:
+    """
+    Incrementally write DataFrame chunks to a single CSV, Parquet or Arrow IPC file.
+
+    The schema is fixed by the first non-empty chunk; columns that are entirely null there are
+    stored as strings, and later chunks are cast to that schema.
+    """
+
+    def __init__(self, path, fmt='auto'):
+        self.path = path
+        self.fmt = detect_format(path, fmt)
+        if self.fmt != 'csv':
+            _require_pyarrow(self.fmt)
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._schema = None
+        self._pending_empty = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, frame):
+        """
+        Append a chunk.
+        """
+        self.rows += len(frame)
+        if self.fmt == 'csv':
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='')
+                frame.to_csv(self._file, index=False)
+            else:
+                frame.to_csv(self._file, header=False, index=False)
+            return
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            if not len(frame):
+                # Wait for rows before fixing the schema
+                self._pending_empty = table
+                return
+            self._open(table.schema)
+        self._writer.write_table(table.select(self._schema.names).cast(self._schema))
+
+    def _open(self, schema):
+        self._schema = pa.schema([
+            field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+            for field in schema
+        ])
+        if self.fmt == 'parquet':
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(str(self.path), self._schema)
+
+    def close(self):
+        """
+        Flush and close the output file; an output without rows still gets its header/schema.
+        """
+        if self.fmt == 'csv':
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            return
+        if self._writer is None and self._pending_empty is not None:
+            self._open(self._pending_empty.schema)
+            self._writer.write_table(self._pending_empty.cast(self._schema))
+            self._pending_empty = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
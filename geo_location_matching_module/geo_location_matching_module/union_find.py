@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class UnionFind:
+    """
+    Disjoint sets over the integers 0 to n - 1.
+
+    Every set is rooted at its smallest member, so the roots are stable cluster labels that do
+    not depend on the order of the unions. Lookups halve the path they walk.
+    """
+
+    def __init__(self, n):
+        """
+        Parameters:
+        n (int): Number of elements, each starting in its own set.
+        """
+        self.parent = list(range(n))
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, x):
+        """
+        Root (smallest member) of the set containing x.
+        """
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        """
+        Merge the sets containing a and b.
+        """
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            if b < a:
+                a, b = b, a
+            self.parent[b] = a
+
+    def union_many(self, a, b):
+        """
+        Merge the sets of every pair (a[i], b[i]).
+
+        Parameters:
+        a (array-like): First elements of the pairs.
+        b (array-like): Second elements of the pairs.
+        """
+        for x, y in zip(np.asarray(a).tolist(), np.asarray(b).tolist()):
+            self.union(x, y)
+
+    def roots(self):
+        """
+        Returns:
+        np.ndarray: Root of every element.
+        """
+        return np.array([self.find(x) for x in range(len(self.parent))], dtype=np.int64)
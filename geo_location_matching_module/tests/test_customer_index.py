@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+from customer_index import CustomerIndex
+from fuzzy_matching_module import FuzzyMatcher
+
+DF1_COLUMNS = dict(
+    zip_col1='POSTAL_CODE', name_col1='CUSTOMER_DESC', address_col1='STREET_ADDRESS',
+    lat_col1='LATITUDE_COORDINATE', long_col1='LONGITUDE_COORDINATE'
+)
+DF2_COLUMNS = dict(
+    address_col2='STREET_ADDRESS_LINE_1', lat_col2='LATITUDE', long_col2='LONGITUDE'
+)
+
+@pytest.fixture
+def customers():
+    return pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3, 4, 5],
+        'POSTAL_CODE': ['54321', '12345', '54321', None, '12345-1111'],
+        'CUSTOMER_DESC': ['Beta Bistro', 'Alpha Cafe', 'Gamma Grill', 'Delta Diner', 'Épicerie Zeta'],
+        'STREET_ADDRESS': ['200 Oak Ave', '100 Main St.', '300 Pine Rd', None, '5 Elm St'],
+        'LATITUDE_COORDINATE': [36.12, 34.05, 36.2, 35.0, 34.1],
+        'LONGITUDE_COORDINATE': [-115.17, -118.25, -115.3, -116.0, -118.3],
+        'REGION': ['CA'] * 5,
+    })
+
+@pytest.fixture
+def unmatched():
+    return pd.DataFrame({
+        'POSTAL_CODE': ['12345', '54321', '54321', '12345'],
+        'CUSTOMER_DESC': ['alpha cafe', 'gamma gril', 'beta bistro', 'epicerie zeta'],
+        'STREET_ADDRESS_LINE_1': ['100 main st', '300 pine road', '200 oak ave', '5 elm st'],
+        'LATITUDE': [34.05, 36.0, 36.12, 34.1],
+        'LONGITUDE': [-118.25, -115.0, -115.17, -118.3],
+    }, index=[7, 8, 9, 10])
+
+def test_customer_index_groups_blocks(customers):
+    index = FuzzyMatcher.build_customer_index(customers.copy(), lat_long_tolerance=2, **DF1_COLUMNS)
+    assert list(index.block_keys) == ['54321', '12345']
+    assert list(index.block_offsets) == [0, 2, 4]
+    assert index.frame['CUSTOMER_ID'].tolist() == [1, 3, 2, 5, 4]
+    assert 'REGION' not in index.frame.columns
+    assert index.frame['address_customer_desc'].iloc[0] == 'beta bistro 200 oak ave'
+
+def test_customer_index_round_trip(tmp_path, customers):
+    index = FuzzyMatcher.build_customer_index(customers.copy(), lat_long_tolerance=2, **DF1_COLUMNS)
+    index.save(str(tmp_path / 'index'))
+    loaded = CustomerIndex.load(str(tmp_path / 'index'))
+    assert isinstance(loaded.frame['LATITUDE_COORDINATE'].to_numpy(), np.ndarray)
+    assert loaded.config == index.config
+    assert list(loaded.block_keys) == list(index.block_keys)
+    assert list(loaded.block_offsets) == list(index.block_offsets)
+    # Numeric columns come back as np.memmap views of the index files; compare in-memory copies
+    pd.testing.assert_frame_equal(loaded.frame.copy(), index.frame, check_dtype=False)
+
+def test_loaded_columns_share_memory_with_memmap(tmp_path, monkeypatch, customers):
+    FuzzyMatcher.build_customer_index(customers.copy(), lat_long_tolerance=2, **DF1_COLUMNS).save(str(tmp_path / 'index'))
+    memmaps = []
+    load = np.load
+
+    def recording_load(*args, **kwargs):
+        array = load(*args, **kwargs)
+        if isinstance(array, np.memmap):
+            memmaps.append(array)
+        return array
+
+    monkeypatch.setattr(np, 'load', recording_load)
+    frame = CustomerIndex.load(str(tmp_path / 'index')).frame
+    for column in ('CUSTOMER_ID', 'LATITUDE_COORDINATE', 'LONGITUDE_COORDINATE'):
+        values = frame[column].to_numpy()
+        assert any(np.shares_memory(values, array) for array in memmaps), column
+
+def test_nullable_numeric_columns_round_trip(tmp_path, customers):
+    customers['CUSTOMER_ID'] = pd.array([1, 2, None, 4, 5], dtype='Int64')
+    index = FuzzyMatcher.build_customer_index(customers.copy(), lat_long_tolerance=2, **DF1_COLUMNS)
+    index.save(str(tmp_path / 'index'))
+    loaded = CustomerIndex.load(str(tmp_path / 'index'))
+    assert loaded.frame['CUSTOMER_ID'].dtype == 'Int64'
+    pd.testing.assert_series_equal(loaded.frame['CUSTOMER_ID'], index.frame['CUSTOMER_ID'])
+
+@pytest.mark.parametrize('keep_all', [False, True])
+def test_match_from_index_identical_to_raw(tmp_path, customers, unmatched, keep_all):
+    expected = FuzzyMatcher(
+        customers.copy(), unmatched.copy(), zip_col2='POSTAL_CODE', name_col2='CUSTOMER_DESC',
+        lat_long_tolerance=2, **DF1_COLUMNS, **DF2_COLUMNS
+    ).match(keep_all=keep_all)
+
+    FuzzyMatcher.build_customer_index(customers.copy(), lat_long_tolerance=2, **DF1_COLUMNS).save(str(tmp_path / 'index'))
+    matcher = FuzzyMatcher.from_index(
+        CustomerIndex.load(str(tmp_path / 'index')), unmatched.copy(), 'POSTAL_CODE', 'CUSTOMER_DESC', **DF2_COLUMNS
+    )
+    result = matcher.match(keep_all=keep_all)
+    assert expected['customer_id'].notna().sum() >= 3
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_index_rejects_different_coordinate_cleaning(customers, unmatched):
+    index = FuzzyMatcher.build_customer_index(customers.copy(), lat_long_tolerance=2, **DF1_COLUMNS)
+    with pytest.raises(ValueError):
+        FuzzyMatcher.from_index(index, unmatched, 'POSTAL_CODE', 'CUSTOMER_DESC', radius_m=50, **DF2_COLUMNS)
+
+def test_match_chunks_identical_to_single_run(customers, unmatched):
+    expected = FuzzyMatcher(
+        customers.copy(), unmatched.copy(), zip_col2='POSTAL_CODE', name_col2='CUSTOMER_DESC',
+        lat_long_tolerance=2, **DF1_COLUMNS, **DF2_COLUMNS
+    ).match(keep_all=True)
+
+    index = FuzzyMatcher.build_customer_index(customers.copy(), lat_long_tolerance=2, **DF1_COLUMNS)
+    chunks = (unmatched.iloc[start:start + 3].copy() for start in range(0, len(unmatched), 3))
+    results = list(FuzzyMatcher.match_chunks(
+        index, chunks, 'POSTAL_CODE', 'CUSTOMER_DESC', keep_all=True, **DF2_COLUMNS
+    ))
+    assert len(results) == 2
+    streamed = pd.concat(results)
+    pd.testing.assert_frame_equal(
+        streamed.reset_index(drop=True), expected.reset_index(drop=True)
+    )
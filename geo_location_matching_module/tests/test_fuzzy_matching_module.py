@@ -1,8 +1,12 @@
+import json
 import sys
 import os
 import pytest
+import numpy as np
+from collections import Counter
 import pandas as pd
-from fuzzy_matching_module import FuzzyMatcher
+import fuzzy_matching_module
+from fuzzy_matching_module import COMPACT_RADIUS_PAIRS, COMPACT_SCORE_CELLS, FuzzyMatcher
 
 @pytest.fixture
 def sample_data():
@@ -116,3 +120,538 @@ def test_match_with_different_threshold(sample_data):
         assert result['is_matched_y'].iloc[0] == True
         assert result['is_matched_y'].iloc[1] == True
 
+
+def test_batch_fuzzy_match_matches_loop():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [10, 11, 12, 13, 14],
+        'CUSTOMER_DESC': ['alpha cafe', 'beta bistro', None, 'alpha cafe', 'gamma grill house'],
+    })
+    df2 = pd.DataFrame({
+        'CUSTOMER_DESC': ['alpha cafe', 'alpha caffe', 'beta bistr', None, 'delta diner', 'gamma grill'],
+    }, index=[5, 7, 9, 11, 13, 15])
+    for threshold in (0, 60, 90, 100):
+        expected = FuzzyMatcher.fuzzy_match(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=threshold)
+        # A tiny max_cells forces one cdist call per row to exercise the chunking path
+        for max_cells in (1, 1000):
+            result = FuzzyMatcher.batch_fuzzy_match(
+                df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=threshold, max_cells=max_cells
+            )
+            pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.parametrize('scorer', ['ratio', 'token_set_ratio', 'WRatio'])
+def test_prefilter_does_not_change_batch_results(scorer):
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [10, 11, 12, 13, 14],
+        'CUSTOMER_DESC': ['alpha cafe', 'beta bistro', 'cafe alpha', 'a', 'gamma grill house and kitchen'],
+    })
+    df2 = pd.DataFrame({
+        'CUSTOMER_DESC': ['alpha cafe', 'cafe alpha inc', 'beta bistr', 'b', 'gamma grill'],
+    }, index=[5, 7, 9, 11, 13])
+    for threshold in (60, 90):
+        expected = FuzzyMatcher.fuzzy_match(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=threshold,
+                                            scorer=scorer)
+        stats = Counter()
+        result = FuzzyMatcher.batch_fuzzy_match(
+            df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=threshold, scorer=scorer, stats=stats
+        )
+        pd.testing.assert_frame_equal(result, expected)
+        unfiltered = FuzzyMatcher.batch_fuzzy_match(
+            df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=threshold, scorer=scorer, prefilter=False
+        )
+        pd.testing.assert_frame_equal(unfiltered, expected)
+    # At 90, 'b' cannot reach any of the longer names under ratio
+    if scorer == 'ratio':
+        assert stats['prefilter_pruned'] > 0
+
+def test_top_k_candidates_agree_between_engines():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [10, 11, 12, 13],
+        'CUSTOMER_DESC': ['alpha cafe', 'alpha cafes', None, 'alpha cafe'],
+    })
+    df2 = pd.DataFrame({'CUSTOMER_DESC': ['alpha cafe', 'beta bistro', None]}, index=[5, 7, 9])
+    expected = FuzzyMatcher.fuzzy_match(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=90, top_k=2)
+    result = FuzzyMatcher.batch_fuzzy_match(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=90, top_k=2)
+    pd.testing.assert_frame_equal(result, expected)
+    assert [candidate[:2] for candidate in result['candidates'].iloc[0]] == [(10, 'alpha cafe'), (11, 'alpha cafes')]
+    assert result['candidates'].iloc[1] == [] and result['candidates'].iloc[2] == []
+
+def test_match_top_k_long_layout():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3],
+        'POSTAL_CODE': ['12345', '12345', '12345'],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Alpha Cafes', 'Beta Bistro'],
+        'STREET_ADDRESS': ['1 Main St', '1 Main St', '2 Oak Ave'],
+    })
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': ['12345', '12345'],
+        'CUSTOMER_DESC': ['alpha cafe', 'gamma grill'],
+        'STREET_ADDRESS_LINE_1': ['1 main st', '3 pine rd'],
+    })
+    kwargs = dict(
+        zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE', name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+        address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1'
+    )
+    result = FuzzyMatcher(df1.copy(), df2.copy(), **kwargs).match(top_k=2)
+    assert result['customer_id'].tolist() == [1, 2]
+    assert result['candidate_rank'].tolist() == [1, 2]
+    assert result['match_score'].iloc[0] == 100 and result['match_score'].iloc[1] < 100
+    assert result['match_type'].tolist() == ['address-zip', 'address-zip']
+
+    best = FuzzyMatcher(df1.copy(), df2.copy(), **kwargs).match(keep_all=True, top_k=1)
+    assert best['customer_id'].tolist() == [1, pd.NA]
+    assert best['candidate_rank'].tolist() == [1, pd.NA]
+
+def test_duplicate_queries_scored_once():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3],
+        'CUSTOMER_DESC': ['chain store', 'chain store', 'corner shop'],
+    })
+    df2 = pd.DataFrame({'CUSTOMER_DESC': ['chain stor'] * 4 + ['corner shop', None, 'corner shop']})
+    for engine in (FuzzyMatcher.fuzzy_match, FuzzyMatcher.batch_fuzzy_match):
+        stats = Counter()
+        result = engine(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', threshold=80, stats=stats)
+        assert result['customer_id'].tolist()[:5] == [1, 1, 1, 1, 3]
+        assert stats == Counter(query_rows=6, unique_queries=2, scorer_calls=4, scorer_calls_without_dedup=18)
+
+def test_match_reports_dedup_ratio(multi_block_data):
+    df1, df2 = multi_block_data
+    df2 = pd.concat([df2, df2]).reset_index(drop=True)
+    matcher = FuzzyMatcher(df1, df2, **MULTI_BLOCK_KWARGS)
+    matcher.match()
+    assert matcher.stats['unique_queries'] * 2 == matcher.stats['query_rows']
+    assert matcher.dedup_ratio() >= 0.5
+
+@pytest.mark.parametrize('keep_all', [False, True])
+def test_compact_mode_matches_default_mode(multi_block_data, keep_all):
+    df1, df2 = multi_block_data
+    expected = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match(keep_all=keep_all)
+    raw1, raw2 = df1.copy(), df2.copy()
+    matcher = FuzzyMatcher(df1, df2, compact=True, **MULTI_BLOCK_KWARGS)
+    result = matcher.match(keep_all=keep_all)
+    pd.testing.assert_frame_equal(df1, raw1)
+    pd.testing.assert_frame_equal(df2, raw2)
+    assert list(matcher.df2.columns) == ['POSTAL_CODE', 'CUSTOMER_DESC', 'STREET_ADDRESS_LINE_1', 'LATITUDE', 'LONGITUDE']
+    assert result.index.isin(df2.index).all()
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+
+@pytest.mark.parametrize('keep_all', [False, True])
+def test_radius_stage_in_small_chunks_matches_one_go(multi_block_data, keep_all):
+    df1, df2 = multi_block_data
+    kwargs = dict(MULTI_BLOCK_KWARGS, radius_m=10_000)
+    expected = FuzzyMatcher(df1.copy(), df2.copy(), **kwargs).match(keep_all=keep_all)
+    assert (expected['match_type'] == 'lat-long').any()
+    matcher = FuzzyMatcher(df1.copy(), df2.copy(), compact=True, **kwargs)
+    assert (matcher.max_cells, matcher.max_radius_pairs) == (COMPACT_SCORE_CELLS, COMPACT_RADIUS_PAIRS)
+    # One df2 row per radius query and per score matrix
+    matcher.max_radius_pairs = matcher.max_cells = 1
+    result = matcher.match(keep_all=keep_all)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+
+def test_block_results_collapsed_as_they_come(multi_block_data, monkeypatch):
+    df1, df2 = multi_block_data
+    expected = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match(keep_all=True)
+    monkeypatch.setattr(fuzzy_matching_module, 'RESULT_FRAME_BATCH', 1)
+    result = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match(keep_all=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.parametrize('dtype', [object, 'string'])
+def test_share_strings(dtype):
+    values = pd.Series(['10001', None, '10001', np.nan], index=[5, 6, 7, 8], dtype=dtype)
+    shared = FuzzyMatcher.share_strings(values)
+    assert shared.dtype == object
+    assert shared.isna().tolist() == [False, True, False, True]
+    assert shared[5] == shared[7] == '10001'
+    assert shared.iloc[0] is shared.iloc[2]
+    assert list(shared.index) == [5, 6, 7, 8]
+    numbers = pd.Series([1.0, 2.0])
+    assert FuzzyMatcher.share_strings(numbers) is numbers
+
+def test_match_profile_reports_stages(multi_block_data):
+    df1, df2 = multi_block_data
+    matcher = FuzzyMatcher(df1, df2, **MULTI_BLOCK_KWARGS)
+    result = matcher.match()
+    profile = matcher.profile()
+    stages = profile['stages']
+    assert list(stages) == ['clean', 'blocking', 'lat_long', 'address_zip', 'postal_blocks', 'merge', 'total']
+    assert stages['total']['rows_in'] == 30
+    assert stages['total']['rows_out'] == len(result)
+    assert stages['postal_blocks']['rows_in'] == 24
+    assert stages['postal_blocks']['calls'] == 1 and stages['lat_long']['calls'] == 6
+    assert stages['postal_blocks']['rows_out'] == stages['lat_long']['rows_out'] + stages['address_zip']['rows_out']
+    assert 0 < stages['postal_blocks']['rows_out'] <= 24
+    assert stages['postal_blocks']['scorer_calls'] == profile['counters']['scorer_calls']
+    assert stages['total']['wall_s'] >= stages['postal_blocks']['wall_s'] > 0
+    assert profile['block_sizes_df1'] == {'4-7': 6}
+    assert sum(profile['block_sizes_df2'].values()) == 6
+
+def test_match_batch_and_loop_scoring_agree(sample_data):
+    df1, df2 = sample_data
+    results = []
+    for scoring in ('batch', 'loop'):
+        matcher = FuzzyMatcher(
+            df1.copy(), df2.copy(),
+            zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE',
+            name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+            address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1',
+            lat_col1='LATITUDE_COORDINATE', long_col1='LONGITUDE_COORDINATE',
+            lat_col2='LATITUDE', long_col2='LONGITUDE',
+            lat_long_tolerance=2, scoring=scoring
+        )
+        results.append(matcher.match(keep_all=True))
+    pd.testing.assert_frame_equal(results[0], results[1])
+
+def test_resolve_customer_ids_tie_break():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3, 4],
+        'CUSTOMER_DESC': ['alpha cafe', 'beta bistro', 'alpha cafe', None],
+        'PRIORITY': [1, 5, 9, 0],
+    })
+    first = FuzzyMatcher.resolve_customer_ids(df1, 'CUSTOMER_DESC')
+    assert list(first) == [1, 2, 1, 4]
+    priority = FuzzyMatcher.resolve_customer_ids(df1, 'CUSTOMER_DESC', tie_break='priority', priority_col='PRIORITY')
+    assert list(priority) == [3, 2, 3, 4]
+    all_ids = FuzzyMatcher.resolve_customer_ids(df1, 'CUSTOMER_DESC', tie_break='all')
+    assert list(all_ids) == [[1, 3], [2], [1, 3], 4]
+    with pytest.raises(ValueError):
+        FuzzyMatcher.resolve_customer_ids(df1, 'CUSTOMER_DESC', tie_break='priority')
+
+def test_fuzzy_match_duplicate_names_tie_break():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2],
+        'CUSTOMER_DESC': ['alpha cafe', 'alpha cafe'],
+        'PRIORITY': [0, 1],
+    })
+    df2 = pd.DataFrame({'CUSTOMER_DESC': ['alpha cafe']})
+    for engine in (FuzzyMatcher.fuzzy_match, FuzzyMatcher.batch_fuzzy_match):
+        assert engine(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC')['customer_id'].iloc[0] == 1
+        result = engine(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', tie_break='priority', priority_col='PRIORITY')
+        assert result['customer_id'].iloc[0] == 2
+        result = engine(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', tie_break='all')
+        assert result['customer_id'].iloc[0] == [1, 2]
+
+def test_build_blocks_only_shared_postal_codes(sample_data):
+    df1, df2 = sample_data
+    matcher = FuzzyMatcher(df1.copy(), df2.copy(), 'POSTAL_CODE', 'POSTAL_CODE', 'CUSTOMER_DESC', 'CUSTOMER_DESC')
+    blocks = matcher.build_blocks()
+    assert [postal_code for postal_code, _, _ in blocks] == ['12345', '54321']
+    assert [(list(pos1), list(pos2)) for _, pos1, pos2 in blocks] == [([0], [0]), ([1], [1])]
+
+def test_address_stage_never_crosses_postal_codes():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2],
+        'POSTAL_CODE': ['11111', '22222'],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Beta Bistro'],
+        'STREET_ADDRESS': ['100 Main St', '200 Oak Ave'],
+    })
+    # Row 0 is an exact copy of customer 2 but sits in zip 11111; row 1 is in a zip df1 lacks
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': ['11111', '33333', '22222'],
+        'CUSTOMER_DESC': ['Beta Bistro', 'Alpha Cafe', 'Beta Bistro'],
+        'STREET_ADDRESS_LINE_1': ['200 Oak Ave', '100 Main St', '200 Oak Ave'],
+    })
+    matcher = FuzzyMatcher(
+        df1, df2,
+        zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE',
+        name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+        address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1'
+    )
+    result = matcher.match(keep_all=True)
+    assert result['customer_id'].isna().tolist() == [True, True, False]
+    assert result['customer_id'].iloc[2] == 2
+
+def test_block_levels_retry_zip3_and_neighbour_blocks():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3, 4],
+        'POSTAL_CODE': ['11119', '11111', '22222', '33333'],
+        'CUSTOMER_DESC': ['Beta Bistro', 'Alpha Cafe', 'Gamma Grill', 'Delta Diner'],
+        'STREET_ADDRESS': ['2 Oak Ave', '1 Main St', '3 Pine Rd', '4 Elm St'],
+        'LATITUDE_COORDINATE': [35.0, 34.0, 40.0, 40.01],
+        'LONGITUDE_COORDINATE': [-117.0, -118.0, -100.0, -100.0],
+    })
+    # Row 0 has a postal code typo, row 1 sits in the postal code next door, row 2 is nowhere near
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': ['11112', '22222', '99999'],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Delta Diner', 'Alpha Cafe'],
+        'STREET_ADDRESS_LINE_1': ['1 Main St', '4 Elm St', '1 Main St'],
+    })
+    kwargs = dict(
+        zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE', name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+        address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1',
+        lat_col1='LATITUDE_COORDINATE', long_col1='LONGITUDE_COORDINATE'
+    )
+    assert FuzzyMatcher(df1.copy(), df2.copy(), **kwargs).match(keep_all=True)['customer_id'].isna().all()
+
+    matcher = FuzzyMatcher(df1.copy(), df2.copy(), block_levels=('zip3', 'neighbour'), max_level_candidates=1, **kwargs)
+    result = matcher.match(keep_all=True)
+    assert result['customer_id'].tolist() == [2, 4, pd.NA]
+    assert result['match_type'].tolist()[:2] == ['zip3', 'neighbour-zip']
+    # Nearest postal codes come first, and a postal code is never its own candidate
+    df1_groups = matcher.df1_blocks()
+    assert matcher.level_blocks('zip3', ['11112', '11111'], df1_groups, matcher._working_frames()[0]) == {
+        '11112': ['11111', '11119'], '11111': ['11119']
+    }
+
+    with pytest.raises(ValueError):
+        FuzzyMatcher(df1, df2, block_levels=('zip5',), **kwargs)
+
+def test_block_levels_use_their_stage_scorer(monkeypatch):
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2],
+        'POSTAL_CODE': ['11119', '11111'],
+        'CUSTOMER_DESC': ['Beta Bistro', 'Alpha Cafe'],
+    })
+    df2 = pd.DataFrame({'POSTAL_CODE': ['11112'], 'CUSTOMER_DESC': ['Cafe Alpha']})
+    scorers = []
+    batch_fuzzy_match = FuzzyMatcher.batch_fuzzy_match
+
+    def recording_batch_fuzzy_match(*args, **kwargs):
+        scorers.append(kwargs['scorer'])
+        return batch_fuzzy_match(*args, **kwargs)
+
+    monkeypatch.setattr(FuzzyMatcher, 'batch_fuzzy_match', staticmethod(recording_batch_fuzzy_match))
+    kwargs = dict(zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE', name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC')
+    result = FuzzyMatcher(
+        df1.copy(), df2.copy(), block_levels=('zip3',), stage_scorers={'block_levels': 'token_set_ratio'}, **kwargs
+    ).match(keep_all=True)
+    # Reordered words only reach the zip3 threshold under token_set_ratio
+    assert scorers == ['token_set_ratio']
+    assert result['customer_id'].tolist() == [2]
+
+@pytest.mark.parametrize('max_cells', [1, 4_000_000])
+def test_dedupe_clusters_within_postal_blocks(max_cells):
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3, 4, 5, 6],
+        'POSTAL_CODE': ['12345', '12345', '12345', '12345', '54321', '12345'],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Alpha Cafe.', 'Alpha Caffe', 'Beta Bistro', 'Alpha Cafe', None],
+        'STREET_ADDRESS': ['1 Main St', '1 Main St', '1 Main St', '2 Oak Ave', '1 Main St', '1 Main St'],
+    })
+    clusters = FuzzyMatcher.dedupe(
+        df1, zip_col1='POSTAL_CODE', name_col1='CUSTOMER_DESC', address_col1='STREET_ADDRESS', max_cells=max_cells
+    )
+    assert clusters['CUSTOMER_ID'].tolist() == [1, 2, 3, 4, 5, 6]
+    assert clusters['cluster_id'].tolist() == [1, 1, 1, 4, 5, 6]
+    assert clusters['cluster_size'].tolist() == [3, 3, 3, 1, 1, 1]
+
+@pytest.mark.parametrize('max_cells', [1, 100, 4_000_000])
+def test_dedupe_scores_each_pair_once(monkeypatch, max_cells):
+    import fuzzy_matching_module
+    from rapidfuzz import process
+    cells = Counter()
+
+    class CountingProcess:
+        @staticmethod
+        def cdist(queries, choices, **kwargs):
+            cells['cells'] += len(queries) * len(choices)
+            return process.cdist(queries, choices, **kwargs)
+
+        @staticmethod
+        def cpdist(queries, choices, **kwargs):
+            cells['cells'] += len(queries)
+            return process.cpdist(queries, choices, **kwargs)
+
+    monkeypatch.setattr(fuzzy_matching_module, 'process', CountingProcess)
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': range(30),
+        'POSTAL_CODE': ['12345'] * 30,
+        'CUSTOMER_DESC': [f'customer {i}' for i in range(30)],
+    })
+    stats = Counter()
+    clusters = FuzzyMatcher.dedupe(
+        df1, zip_col1='POSTAL_CODE', name_col1='CUSTOMER_DESC', max_cells=max_cells, stats=stats
+    )
+    # 30 distinct keys: 30 * 29 / 2 unordered pairs, no key against itself
+    assert cells['cells'] == 435
+    assert stats[('dedupe', 'scorer_calls')] == 435
+    assert len(clusters) == 30
+
+@pytest.fixture
+def multi_block_data():
+    names = ['alpha cafe', 'beta bistro', 'gamma grill', 'delta diner', 'epsilon eats', 'zeta bar']
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': range(24),
+        'POSTAL_CODE': [f'1000{i % 6}' for i in range(24)],
+        'CUSTOMER_DESC': [f'{names[i % 6]} {i}' for i in range(24)],
+        'STREET_ADDRESS': [f'{i} main st' for i in range(24)],
+        'LATITUDE_COORDINATE': [34.0 + i / 100 for i in range(24)],
+        'LONGITUDE_COORDINATE': [-118.0 - i / 100 for i in range(24)],
+    })
+    # Copies of df1 rows: every 5th sits in an unknown zip, only the first 12 share coordinates
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': ['10009' if i % 5 == 4 else f'1000{i % 24 % 6}' for i in range(30)],
+        'CUSTOMER_DESC': [f'{names[i % 6]} {i % 24}' + ('x' if i % 3 else '') for i in range(30)],
+        'STREET_ADDRESS_LINE_1': [f'{i % 24} main street' for i in range(30)],
+        'LATITUDE': [34.0 + (i % 24) / 100 + (0 if i < 12 else 0.5) for i in range(30)],
+        'LONGITUDE': [-118.0 - (i % 24) / 100 for i in range(30)],
+    }, index=range(100, 130))
+    return df1, df2
+
+MULTI_BLOCK_KWARGS = dict(
+    zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE',
+    name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+    address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1',
+    lat_col1='LATITUDE_COORDINATE', long_col1='LONGITUDE_COORDINATE',
+    lat_col2='LATITUDE', long_col2='LONGITUDE',
+    lat_long_tolerance=2
+)
+
+def test_balanced_chunks():
+    chunks = FuzzyMatcher.balanced_chunks([10, 1, 1, 8, 2], 2)
+    assert sorted(block for chunk in chunks for block in chunk) == [0, 1, 2, 3, 4]
+    assert sorted(sum([10, 1, 1, 8, 2][block] for block in chunk) for chunk in chunks) == [11, 11]
+
+@pytest.mark.parametrize('executor', ['process', 'thread'])
+def test_parallel_match_identical_to_serial(multi_block_data, executor):
+    df1, df2 = multi_block_data
+    serial = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match(keep_all=True)
+    parallel = FuzzyMatcher(
+        df1.copy(), df2.copy(), n_jobs=2, executor=executor, **MULTI_BLOCK_KWARGS
+    ).match(keep_all=True)
+    assert serial['customer_id'].notna().sum() > 0
+    pd.testing.assert_frame_equal(serial, parallel)
+
+def test_sub_blocking_splits_large_blocks(multi_block_data):
+    df1, df2 = multi_block_data
+    default = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match()
+    matcher = FuzzyMatcher(
+        df1.copy(), df2.copy(), max_block_size=2, sub_block_keys=('street_number',), sub_block_audit=10,
+        **MULTI_BLOCK_KWARGS
+    )
+    result = matcher.match()
+    # Street numbers are unique per customer, so splitting on them keeps every match
+    assert result['customer_id'].tolist() == default['customer_id'].tolist()
+    assert matcher.stats['sub_blocked_blocks'] == 6
+    assert matcher.stats['sub_block_pairs_after'] < matcher.stats['sub_block_pairs_before']
+    assert matcher.stats['sub_block_audit_rows'] == 10
+    assert matcher.stats['sub_block_audit_lost'] == 0
+
+def test_stage_scorers_and_thresholds(multi_block_data):
+    df1, df2 = multi_block_data
+    default = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS)
+    default_result = default.match()
+    assert default.stage_thresholds == {'lat_long': 80, 'address_zip': 85, 'name_fallback': 75}
+    # threshold only sets the name fallback default
+    assert FuzzyMatcher(df1, df2, threshold=60, **MULTI_BLOCK_KWARGS).stage_thresholds == {
+        'lat_long': 80, 'address_zip': 85, 'name_fallback': 60
+    }
+    # No df2 address equals its df1 counterpart ('street' vs 'st'), so only lat-long matches remain
+    strict = FuzzyMatcher(
+        df1.copy(), df2.copy(), stage_scorers={'address_zip': 'ratio'},
+        stage_thresholds={'address_zip': 100}, **MULTI_BLOCK_KWARGS
+    )
+    strict_result = strict.match()
+    assert set(strict_result['match_type'].dropna()) == {'lat-long'}
+    assert strict_result['customer_id'].notna().sum() < default_result['customer_id'].notna().sum()
+    address_stage = strict.profile()['stages']['address_zip']
+    assert address_stage['pruned'] > 0
+    assert address_stage['pruned'] + address_stage['scored'] == address_stage['scorer_calls']
+    # rapidfuzz only takes score cutoffs from 0 to 100
+    with pytest.raises(ValueError):
+        FuzzyMatcher(df1, df2, stage_thresholds={'address_zip': 101}, **MULTI_BLOCK_KWARGS)
+    with pytest.raises(ValueError):
+        FuzzyMatcher(df1, df2, stage_scorers={'address_zip': 'partial_ratio'}, **MULTI_BLOCK_KWARGS)
+    with pytest.raises(ValueError):
+        FuzzyMatcher(df1, df2, stage_thresholds={'geohash': 90}, **MULTI_BLOCK_KWARGS)
+
+def test_sub_block_keys_validated(multi_block_data):
+    df1, df2 = multi_block_data
+    with pytest.raises(ValueError):
+        FuzzyMatcher(df1, df2, max_block_size=2, sub_block_keys=('phone',), **MULTI_BLOCK_KWARGS)
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_parallel_workers_do_not_carry_frames(multi_block_data, compact):
+    import pickle
+    from concurrent.futures import ThreadPoolExecutor
+    df1, df2 = multi_block_data
+    # A wide column no stage needs: only block columns may travel to the workers
+    df2['NOTES'] = ['x' * 10_000] * len(df2)
+    workers = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            workers.append(args[0])
+            return super().submit(fn, *args, **kwargs)
+
+    with RecordingExecutor(max_workers=2) as executor:
+        FuzzyMatcher(df1.copy(), df2.copy(), n_jobs=2, executor=executor, compact=compact, **MULTI_BLOCK_KWARGS).match()
+    assert workers
+    for worker in workers:
+        assert worker.df1 is None and worker.df2 is None and worker.df2_input is None
+        assert len(pickle.dumps(worker)) < 10_000
+
+def test_cli_chunked_run_with_all_cores(multi_block_data, tmp_path):
+    from run_fuzzy_matching import main
+    df1, df2 = multi_block_data
+    df1.to_csv(tmp_path / 'customers.csv', index=False)
+    df2.to_csv(tmp_path / 'unmatched.csv', index=False)
+    results = tmp_path / 'matched.csv'
+    main([
+        '--input_customers', str(tmp_path / 'customers.csv'), '--input_unmatched', str(tmp_path / 'unmatched.csv'),
+        '--output_path', str(tmp_path), '--matched_results', str(results),
+        '--zip_col2', 'POSTAL_CODE', '--name_col2', 'CUSTOMER_DESC', '--address_col2', 'STREET_ADDRESS_LINE_1',
+        '--chunksize', '10', '--n_jobs', '-1',
+    ])
+    assert pd.read_csv(results)['customer_id'].notna().any()
+
+def test_cli_dedupe_flag_values_and_stats(multi_block_data, tmp_path):
+    from run_fuzzy_matching import main
+    df1, df2 = multi_block_data
+    df1.to_csv(tmp_path / 'customers.csv', index=False)
+    df2.to_csv(tmp_path / 'unmatched.csv', index=False)
+    common = [
+        '--input_customers', str(tmp_path / 'customers.csv'), '--input_unmatched', str(tmp_path / 'unmatched.csv'),
+        '--output_path', str(tmp_path), '--zip_col2', 'POSTAL_CODE', '--name_col2', 'CUSTOMER_DESC',
+    ]
+    # A pipeline boolean input renders as True/False after the flag
+    main(common + ['--matched_results', str(tmp_path / 'clusters.csv'), '--dedupe', 'True'])
+    assert 'cluster_id' in pd.read_csv(tmp_path / 'clusters.csv')
+    with open(tmp_path / 'clusters.csv.stats.json') as f:
+        assert 'dedupe' in json.load(f)['stages']
+    main(common + ['--matched_results', str(tmp_path / 'matched.csv'), '--dedupe', 'False', '--keep_all'])
+    assert 'customer_id' in pd.read_csv(tmp_path / 'matched.csv')
+
+def test_vectorized_cleaning_identical_to_scalar():
+    zip_codes = pd.Series(['12345-6789', '9876', None, 12345, 1234.0, float('nan'), ' 0 1 2 ', 'abc',
+                           '１２３４５', '12³45', ''], dtype=object, name='zip')
+    expected = zip_codes.apply(FuzzyMatcher.clean_zip_code)
+    pd.testing.assert_series_equal(FuzzyMatcher.clean_zip_code_series(zip_codes), expected)
+    numeric_zips = pd.Series([12345.0, 501.0, float('nan')])
+    pd.testing.assert_series_equal(
+        FuzzyMatcher.clean_zip_code_series(numeric_zips), numeric_zips.apply(FuzzyMatcher.clean_zip_code)
+    )
+
+    names = pd.Series(['Alpha Cafe!', '  BETA, Bistro\x1c', None, 'Ça Va Café', 'İstanbul Grill', 42, ''],
+                      dtype=object, name='name')
+    pd.testing.assert_series_equal(
+        FuzzyMatcher.clean_customer_name_series(names), names.apply(FuzzyMatcher.clean_customer_name)
+    )
+
+    rng = np.random.default_rng(1)
+    lat = pd.Series(np.r_[rng.uniform(-90, 90, 2000), [2.675, 0.125, 1.0005, np.nan]])
+    long = pd.Series(np.r_[rng.uniform(-180, 180, 2000), [1.005, -0.0005, np.nan, 3.0]])
+    messy_lat = pd.Series(['34.123456', None, 'north', 12, ' 1.5 ', float('nan'), '1_0'], dtype=object)
+    messy_long = pd.Series(['-118.987654', 5.0, 3.3, 'x', '2', 1.25, '2.5'], dtype=object)
+    for lat_values, long_values in ((lat, long), (messy_lat, messy_long)):
+        for decimal_places in (None, 0, 2, 3, 5):
+            frame = pd.DataFrame({'lat': lat_values, 'long': long_values})
+            frame[['lat', 'long']] = frame[['lat', 'long']].apply(
+                lambda row: FuzzyMatcher.clean_lat_long(row['lat'], row['long'], decimal_places=decimal_places),
+                axis=1, result_type='expand'
+            )
+            cleaned_lat, cleaned_long = FuzzyMatcher.clean_lat_long_series(
+                lat_values.rename('lat'), long_values.rename('long'), decimal_places=decimal_places
+            )
+            # Byte-identical floats, including the sign of zero
+            assert cleaned_lat.to_numpy(dtype=np.float64).tobytes() == frame['lat'].to_numpy(dtype=np.float64).tobytes()
+            assert cleaned_long.to_numpy(dtype=np.float64).tobytes() == frame['long'].to_numpy(dtype=np.float64).tobytes()
+
+def test_vectorized_process_identical_to_row_wise(multi_block_data):
+    df1, df2 = multi_block_data
+    df2.loc[df2.index[0], 'LATITUDE'] = None
+    matchers = [
+        FuzzyMatcher(df1.copy(), df2.astype(object), vectorized=vectorized, **MULTI_BLOCK_KWARGS)
+        for vectorized in (True, False)
+    ]
+    for matcher in matchers:
+        matcher.process()
+    pd.testing.assert_frame_equal(matchers[0].df1, matchers[1].df1)
+    pd.testing.assert_frame_equal(matchers[0].df2, matchers[1].df2)
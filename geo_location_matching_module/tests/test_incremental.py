@@ -0,0 +1,95 @@
+import json
+import pandas as pd
+import pytest
+from incremental import IncrementalState
+from fuzzy_matching_module import FuzzyMatcher
+from test_fuzzy_matching_module import MULTI_BLOCK_KWARGS, multi_block_data  # noqa: F401
+
+def test_first_incremental_run_matches_everything(multi_block_data):
+    df1, df2 = multi_block_data
+    expected = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match(keep_all=True)
+    result, state = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match_incremental(keep_all=True)
+    pd.testing.assert_frame_equal(result.drop(columns='row_fingerprint'), expected.reset_index(drop=True))
+    assert set(state.results['row_fingerprint']) <= set(state.seen)
+
+def test_incremental_run_rescores_only_changed_blocks(tmp_path, multi_block_data):
+    df1, df2 = multi_block_data
+    _, state = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match_incremental()
+    path = str(tmp_path / 'state.pkl')
+    state.save(path)
+    state = IncrementalState.load(path)
+
+    # Nothing changed: every row is reused
+    matcher = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS)
+    unchanged, _ = matcher.match_incremental(state)
+    assert not matcher.stats['query_rows']
+    first, _ = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match_incremental()
+    pd.testing.assert_frame_equal(unchanged, first, check_dtype=False)
+
+    # A renamed customer only touches its own postal block
+    df1_changed = df1.copy()
+    df1_changed.loc[1, 'CUSTOMER_DESC'] = 'renamed bistro 1'
+    df2_changed = df2.copy()
+    df2_changed.loc[129, 'CUSTOMER_DESC'] = 'zeta bar 5'
+    matcher = FuzzyMatcher(df1_changed.copy(), df2_changed.copy(), **MULTI_BLOCK_KWARGS)
+    patched, _ = matcher.match_incremental(state)
+    rescored_zips = {df1.loc[1, 'POSTAL_CODE'], df2.loc[129, 'POSTAL_CODE']}
+    assert 0 < matcher.stats['query_rows'] <= 2 * df2['POSTAL_CODE'].isin(rescored_zips).sum()
+    full, _ = FuzzyMatcher(df1_changed.copy(), df2_changed.copy(), **MULTI_BLOCK_KWARGS).match_incremental()
+    pd.testing.assert_frame_equal(patched, full, check_dtype=False)
+
+@pytest.mark.parametrize('keep_all', [False, True])
+def test_incremental_run_keeps_match_dtypes(multi_block_data, keep_all):
+    df1, df2 = multi_block_data
+    _, state = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match_incremental(keep_all=keep_all)
+    df2_changed = df2.copy()
+    df2_changed.loc[129, 'CUSTOMER_DESC'] = 'zeta bar 5'
+    patched, _ = FuzzyMatcher(df1.copy(), df2_changed.copy(), **MULTI_BLOCK_KWARGS).match_incremental(
+        state, keep_all=keep_all
+    )
+    expected = FuzzyMatcher(df1.copy(), df2_changed.copy(), **MULTI_BLOCK_KWARGS).match(keep_all=keep_all)
+    pd.testing.assert_series_equal(patched.drop(columns='row_fingerprint').dtypes, expected.dtypes)
+    assert patched['df2_index'].tolist() == expected['df2_index'].tolist()
+
+def test_incremental_run_keeps_integer_labels_next_to_missing_ones(multi_block_data):
+    df1, df2 = multi_block_data
+    _, state = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match_incremental(keep_all=True)
+    state.results['df2_index'] = state.results['df2_index'].astype('Int64')
+    state.results.loc[0, 'df2_index'] = pd.NA
+    patched, _ = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match_incremental(state, keep_all=True)
+    assert patched['df2_index'].dtype == 'Int64'
+    assert patched['df2_index'].tolist()[:3] == [pd.NA, 101, 102]
+
+def test_incremental_state_ignored_for_other_settings(multi_block_data):
+    df1, df2 = multi_block_data
+    _, state = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match_incremental()
+    matcher = FuzzyMatcher(df1.copy(), df2.copy(), **{**MULTI_BLOCK_KWARGS, 'threshold': 60})
+    matcher.match_incremental(state)
+    assert matcher.stats['query_rows'] > 0
+
+def test_cli_chains_state_through_folders(multi_block_data, tmp_path):
+    from run_fuzzy_matching import main
+    df1, df2 = multi_block_data
+    df1.to_csv(tmp_path / 'customers.csv', index=False)
+    df2.to_csv(tmp_path / 'unmatched.csv', index=False)
+    common = [
+        '--input_customers', str(tmp_path / 'customers.csv'), '--input_unmatched', str(tmp_path / 'unmatched.csv'),
+        '--output_path', str(tmp_path), '--zip_col2', 'POSTAL_CODE', '--name_col2', 'CUSTOMER_DESC', '--keep_all',
+    ]
+    (tmp_path / 'first_state').mkdir()
+    (tmp_path / 'second_state').mkdir()
+    # First pipeline run: no previous state, the new one goes to an output folder
+    main(common + [
+        '--matched_results', str(tmp_path / 'first.csv'),
+        '--incremental', 'True', '--incremental_state_out', str(tmp_path / 'first_state'),
+    ])
+    assert (tmp_path / 'first_state' / 'incremental_state.pkl').exists()
+    # Next run reads the previous output and writes a new one
+    main(common + [
+        '--matched_results', str(tmp_path / 'second.csv'),
+        '--incremental_state', str(tmp_path / 'first_state'), '--incremental_state_out', str(tmp_path / 'second_state'),
+    ])
+    assert IncrementalState.load(str(tmp_path / 'second_state' / 'incremental_state.pkl')) is not None
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'second.csv'), pd.read_csv(tmp_path / 'first.csv'))
+    with open(tmp_path / 'second.csv.stats.json') as f:
+        assert json.load(f)['counters']['incremental_reused_rows'] == len(df2)
@@ -0,0 +1,43 @@
+import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from instrumentation import count_sizes, match_profile, size_bucket, timed_stage, write_profile
+
+def test_size_buckets():
+    assert [size_bucket(size) for size in (0, 1, 2, 3, 4, 7, 8, 1000)] == ['0', '1', '2-3', '2-3', '4-7', '4-7', '8-15', '512-1023']
+
+def test_timed_stage_profile(tmp_path):
+    stats = Counter()
+    for _ in range(2):
+        with timed_stage(stats, 'score', rows_in=5):
+            stats['scorer_calls'] += 3
+            stats['scorer_calls_without_dedup'] += 10
+            stats['prefilter_pruned'] += 1
+    count_sizes(stats, 'block_sizes', [9, 1, 2, 3])
+    profile = match_profile(stats)
+    assert list(profile['stages']['score']) == [
+        'calls', 'wall_s', 'cpu_s', 'rows_in', 'comparisons', 'scorer_calls', 'pruned', 'scored'
+    ]
+    assert profile['stages']['score']['calls'] == 2
+    assert profile['stages']['score']['rows_in'] == 10
+    assert profile['stages']['score']['scorer_calls'] == 6
+    assert profile['stages']['score']['comparisons'] == 20
+    assert profile['stages']['score']['pruned'] == 2
+    assert profile['stages']['score']['scored'] == 4
+    assert profile['counters'] == {'scorer_calls': 6, 'scorer_calls_without_dedup': 20, 'prefilter_pruned': 2}
+    assert profile['block_sizes'] == {'1': 1, '2-3': 2, '8-15': 1}
+    path = tmp_path / 'stats.json'
+    write_profile(profile, path)
+    assert json.loads(path.read_text())['block_sizes'] == profile['block_sizes']
+
+def _allocate(size):
+    return len(b'x' * size)
+
+def test_profile_reports_peak_rss_of_finished_workers():
+    pytest.importorskip('resource')
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        pool.submit(_allocate, 200 * 1024 ** 2).result()
+    profile = match_profile(Counter())
+    assert profile['peak_rss_children_mb'] >= 200
+    assert profile['peak_rss_mb'] > 0
@@ -0,0 +1,76 @@
+import pandas as pd
+from match_cache import MatchCache, choice_set_version
+from fuzzy_matching_module import FuzzyMatcher
+from test_fuzzy_matching_module import MULTI_BLOCK_KWARGS, multi_block_data  # noqa: F401
+
+def test_lru_eviction_by_entries():
+    cache = MatchCache(max_entries=2)
+    cache.put_many('ns', ['a', 'b'], [1, 2])
+    assert cache.get_many('ns', ['a']) == [1]
+    # 'b' is now the least recently used entry
+    cache.put_many('ns', ['c'], [3])
+    assert cache.get_many('ns', ['a', 'b', 'c']) == [1, None, 3]
+    assert cache.hits['ns'] == 3 and cache.misses['ns'] == 1
+
+def test_lru_eviction_by_bytes():
+    cache = MatchCache(max_bytes=1000)
+    cache.put_many('ns', [str(number) for number in range(100)], ['x' * 50] * 100)
+    assert 0 < len(cache) < 100
+    assert cache.nbytes <= 1000
+    assert cache.get_many('ns', ['99']) == ['x' * 50]
+
+def test_lookup_computes_only_misses():
+    cache = MatchCache()
+    computed = []
+    def compute(keys):
+        computed.extend(keys)
+        return [key.upper() for key in keys]
+    assert cache.lookup('ns', ['a', 'b'], compute) == ['A', 'B']
+    assert cache.lookup('ns', ['b', 'c'], compute) == ['B', 'C']
+    assert computed == ['a', 'b', 'c']
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / 'cache.pkl'
+    cache = MatchCache(path=str(path))
+    cache.put_many('best_match', [('ratio', 85, 'alpha', choice_set_version(['alpha']))], [(0, 100.0)])
+    cache.save()
+    loaded = MatchCache(path=str(path))
+    assert loaded.get_many('best_match', [('ratio', 85, 'alpha', choice_set_version(['alpha']))]) == [(0, 100.0)]
+    assert choice_set_version(['alpha']) != choice_set_version(['alpha', 'beta'])
+
+def test_match_with_cache_identical_and_reused(tmp_path, multi_block_data):
+    df1, df2 = multi_block_data
+    expected = FuzzyMatcher(df1.copy(), df2.copy(), **MULTI_BLOCK_KWARGS).match(keep_all=True)
+    path = str(tmp_path / 'cache.pkl')
+    for run in range(2):
+        cache = MatchCache(path=path)
+        result = FuzzyMatcher(df1.copy(), df2.copy(), cache=cache, **MULTI_BLOCK_KWARGS).match(keep_all=True)
+        pd.testing.assert_frame_equal(result, expected)
+        cache.save()
+    # The second run found everything from the first
+    assert cache.hits['best_match'] > 0 and not cache.misses
+
+def test_cli_chains_cache_through_folders(multi_block_data, tmp_path):
+    from run_fuzzy_matching import main
+    df1, df2 = multi_block_data
+    df1.to_csv(tmp_path / 'customers.csv', index=False)
+    df2.to_csv(tmp_path / 'unmatched.csv', index=False)
+    common = [
+        '--input_customers', str(tmp_path / 'customers.csv'), '--input_unmatched', str(tmp_path / 'unmatched.csv'),
+        '--output_path', str(tmp_path), '--zip_col2', 'POSTAL_CODE', '--name_col2', 'CUSTOMER_DESC', '--keep_all',
+    ]
+    (tmp_path / 'first_cache').mkdir()
+    (tmp_path / 'second_cache').mkdir()
+    # First pipeline run: no previous cache, the new one goes to an output folder
+    main(common + [
+        '--matched_results', str(tmp_path / 'first.csv'),
+        '--use_match_cache', 'True', '--match_cache_out', str(tmp_path / 'first_cache'),
+    ])
+    assert (tmp_path / 'first_cache' / 'match_cache.pkl').exists()
+    # Next run loads the previous output and writes a new one
+    main(common + [
+        '--matched_results', str(tmp_path / 'second.csv'),
+        '--match_cache', str(tmp_path / 'first_cache'), '--match_cache_out', str(tmp_path / 'second_cache'),
+    ])
+    assert len(MatchCache(path=str(tmp_path / 'second_cache' / 'match_cache.pkl'))) > 0
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'second.csv'), pd.read_csv(tmp_path / 'first.csv'))
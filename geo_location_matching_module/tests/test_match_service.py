@@ -0,0 +1,57 @@
+import io
+import json
+import os
+import pandas as pd
+import pytest
+from fuzzy_matching_module import FuzzyMatcher
+from match_service import MatchService
+
+DF1_COLUMNS = dict(zip_col1='POSTAL_CODE', name_col1='CUSTOMER_DESC', address_col1='STREET_ADDRESS')
+DF2_COLUMNS = dict(zip_col2='POSTAL_CODE', name_col2='CUSTOMER_DESC', address_col2='STREET_ADDRESS_LINE_1')
+
+@pytest.fixture
+def customers():
+    return pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3, 4],
+        'POSTAL_CODE': ['54321', '12345', '54321', '12345'],
+        'CUSTOMER_DESC': ['Beta Bistro', 'Alpha Cafe', 'Gamma Grill', 'Delta Diner'],
+        'STREET_ADDRESS': ['200 Oak Ave', '100 Main St.', '300 Pine Rd', '4 Elm St'],
+    })
+
+RECORDS = [
+    {'POSTAL_CODE': '12345', 'CUSTOMER_DESC': 'alpha cafe', 'STREET_ADDRESS_LINE_1': '100 main st'},
+    {'POSTAL_CODE': '99999', 'CUSTOMER_DESC': 'alpha cafe', 'STREET_ADDRESS_LINE_1': '100 main st'},
+    {'POSTAL_CODE': '54321', 'CUSTOMER_DESC': 'gamma gril', 'STREET_ADDRESS_LINE_1': '300 pine road'},
+]
+
+def test_match_service_agrees_with_batch_match(customers):
+    service = MatchService(
+        lambda: FuzzyMatcher.build_customer_index(customers.copy(), **DF1_COLUMNS), dict(threshold=80, **DF2_COLUMNS)
+    )
+    batch = FuzzyMatcher(customers.copy(), pd.DataFrame(RECORDS), threshold=80, **DF1_COLUMNS, **DF2_COLUMNS).match()
+    matches = service.match_batch(RECORDS)
+    assert [[row['customer_id'] for row in rows] for rows in matches] == [[2], [], [3]]
+    assert [rows[0]['customer_id'] for rows in matches if rows] == batch['customer_id'].tolist()
+    assert service.match_one(RECORDS[0])[0]['match_type'] == 'address-zip'
+    stats = service.latency_stats()
+    assert stats['records'] == 4 and stats['calls'] == 2
+    assert 0 < stats['p50_ms'] <= stats['p99_ms']
+
+def test_match_service_json_lines_and_reload(customers, tmp_path):
+    master = tmp_path / 'customers.csv'
+    customers.to_csv(master, index=False)
+    service = MatchService(
+        lambda: FuzzyMatcher.build_customer_index(pd.read_csv(master, dtype={'POSTAL_CODE': str}), **DF1_COLUMNS),
+        dict(threshold=80, **DF2_COLUMNS), watch_path=str(master)
+    )
+    assert not service.reload_if_changed()
+    customers.loc[1, 'CUSTOMER_ID'] = 20
+    customers.to_csv(master, index=False)
+    os.utime(master, (service.loaded_mtime + 10, service.loaded_mtime + 10))
+
+    out = io.StringIO()
+    service.serve_lines([json.dumps({'record': RECORDS[0]}), json.dumps({'op': 'stats'}), '{"op": "nope"}'], out)
+    responses = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert responses[0]['matches'][0]['customer_id'] == 20
+    assert responses[1]['records'] == 1
+    assert 'error' in responses[2]
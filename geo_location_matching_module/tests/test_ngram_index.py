@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from rapidfuzz import process, fuzz
+from ngram_index import NgramIndex, char_ngrams
+from fuzzy_matching_module import FuzzyMatcher
+
+def test_char_ngrams_pad_word_boundaries():
+    assert char_ngrams('cafe') == {' ca', 'caf', 'afe', 'fe '}
+    assert char_ngrams('a') == {' a '}
+
+def test_shortlist_ranks_by_shared_grams():
+    index = NgramIndex(['alpha cafe', None, 'beta bistro', 'alpha cafe', 'alpine cafe'])
+    positions, counts = index.shortlist('alpha caffe', 2)
+    # Equal counts are ordered by position
+    assert positions.tolist() == [0, 3]
+    assert counts[0] == counts[1] > 0
+    assert len(index.shortlist('zzz', 5)[0]) == 0
+
+def test_shortlist_skips_common_grams():
+    index = NgramIndex(['alpha cafe', 'beta cafe', 'gamma cafe', 'alpha bistro'], max_df=2)
+    assert index.df_limit == 2
+    # The cafe grams are in three names, so only 'ta ' (shared with beta) counts
+    positions, counts = index.shortlist('delta cafe', 5)
+    assert positions.tolist() == [1]
+    assert counts.tolist() == [1]
+    # A query made only of common grams falls back to its rarest gram
+    assert index.shortlist('cafe', 5)[0].tolist() == [0, 1, 2]
+    assert NgramIndex(['alpha cafe'] * 10).df_limit == 1000
+
+def test_shortlist_contains_best_ratio_match():
+    rng = np.random.default_rng(0)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    names = [''.join(rng.choice(letters, rng.integers(5, 15))) for _ in range(500)]
+    index = NgramIndex(names)
+    for name in names[:50]:
+        query = name[:-1] + 'x'
+        best = process.extractOne(query, names, scorer=fuzz.ratio)
+        assert best[2] in index.shortlist(query, 10)[0].tolist()
+
+def test_name_fallback_matches_rows_without_usable_postal_code():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3],
+        'POSTAL_CODE': ['12345', '54321', '11111'],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Beta Bistro', 'Gamma Grill'],
+        'STREET_ADDRESS': ['1 Main St', '2 Oak Ave', '3 Pine Rd'],
+    })
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': ['12345', None, '99999', '54321'],
+        'CUSTOMER_DESC': ['alpha cafe', 'beta bistro', 'gamma grill', 'unrelated name'],
+        'STREET_ADDRESS_LINE_1': ['1 main st', '2 oak ave', '3 pine rd', '9 elm st'],
+    })
+    kwargs = dict(
+        zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE', name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+        address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1', threshold=90
+    )
+    without = FuzzyMatcher(df1.copy(), df2.copy(), **kwargs).match(keep_all=True)
+    assert without['customer_id'].tolist() == [1, pd.NA, pd.NA, pd.NA]
+
+    result = FuzzyMatcher(df1.copy(), df2.copy(), name_fallback=True, **kwargs).match(keep_all=True)
+    assert result['customer_id'].tolist() == [1, 2, 3, pd.NA]
+    assert result['match_type'].tolist()[:3] == ['address-zip', 'name-fallback', 'name-fallback']
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from rapidfuzz import process
+from scorers import SCORERS, ScorePrefilter, get_scorer, length_bound, pair_mask
+
+def random_names(rng, size):
+    words = np.array(['alpha', 'beta', 'cafe', 'grill', 'main', 'st', 'a', 'kitchen', 'delta', 'house'])
+    return [' '.join(rng.choice(words, rng.integers(1, 5))) for _ in range(size)]
+
+def test_length_bound():
+    assert length_bound([4, 0, 0], [4, 3, 0]).tolist() == [100.0, 0.0, 100.0]
+    assert length_bound([2], [6]).tolist() == [50.0]
+
+@pytest.mark.parametrize('scorer', list(SCORERS))
+def test_prefilter_never_prunes_a_match(scorer):
+    rng = np.random.default_rng(0)
+    queries, choices = random_names(rng, 60), random_names(rng, 80) + ['']
+    scores = process.cdist(queries, choices, scorer=get_scorer(scorer), dtype=np.float64)
+    prefilter = ScorePrefilter(scorer, choices)
+    for threshold in (50, 80, 95):
+        covered = 0
+        for positions, columns in prefilter.groups(queries, threshold):
+            covered += len(positions)
+            kept = np.zeros(len(choices), dtype=bool)
+            kept[columns] = True
+            assert not (scores[positions][:, ~kept] >= threshold).any()
+        assert covered == len(queries)
+        rows, cols = np.nonzero(np.ones_like(scores, dtype=bool))
+        mask = pair_mask(scorer, [queries[row] for row in rows], [choices[col] for col in cols], threshold)
+        assert not (scores[rows, cols][~mask] >= threshold).any()
+
+def test_prefilter_prunes_by_length():
+    prefilter = ScorePrefilter('ratio', ['abc', 'abcdefghijklmnop', 'abd'])
+    assert prefilter.columns('abc', 80).tolist() == [0, 2]
+
+def test_unknown_scorer():
+    with pytest.raises(ValueError):
+        get_scorer('partial_ratio')
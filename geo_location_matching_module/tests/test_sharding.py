@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fuzzy_matching_module import FuzzyMatcher
+from sharding import merge_partials, partial_path, shard_of
+from table_io import write_table
+
+KWARGS = dict(
+    zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE',
+    name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+    address_col1='STREET_ADDRESS', address_col2='STREET_ADDRESS_LINE_1',
+)
+
+@pytest.fixture
+def data():
+    names = ['alpha cafe', 'beta bistro', 'gamma grill', 'delta diner', 'epsilon eats']
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': range(20),
+        'POSTAL_CODE': [f'2000{i % 7}' for i in range(20)],
+        'CUSTOMER_DESC': [f'{names[i % 5]} {i}' for i in range(20)],
+        'STREET_ADDRESS': [f'{i} main st' for i in range(20)],
+    })
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': [None if i % 9 == 8 else f'2000{i % 20 % 7}' for i in range(25)],
+        'CUSTOMER_DESC': [f'{names[i % 20 % 5]} {i % 20}' + ('x' if i % 2 else '') for i in range(25)],
+        'STREET_ADDRESS_LINE_1': [f'{i % 20} main street' for i in range(25)],
+    }, index=range(50, 75))
+    return df1, df2
+
+def test_shard_of_is_stable_and_in_range():
+    codes = pd.Series(['20001', '20002', None, '20001'])
+    shards = shard_of(codes, 4)
+    assert shards.tolist() == shard_of(codes.to_numpy(dtype=object), 4).tolist()
+    assert shards[0] == shards[3]
+    assert ((shards >= 0) & (shards < 4)).all()
+
+@pytest.mark.parametrize('keep_all', [False, True])
+def test_merged_shards_equal_single_node_run(data, tmp_path, keep_all):
+    df1, df2 = data
+    single = tmp_path / 'single.csv'
+    write_table(FuzzyMatcher(df1.copy(), df2.copy(), **KWARGS).match(keep_all=keep_all), single)
+
+    matched_results = str(tmp_path / 'merged.csv')
+    partials = []
+    for shard_id in range(3):
+        matcher = FuzzyMatcher(df1.copy(), df2.copy(), **KWARGS)
+        matcher.shard(3, shard_id)
+        assert (shard_of(matcher.df1['POSTAL_CODE'], 3) == shard_id).all()
+        partials.append(partial_path(matched_results, shard_id))
+        write_table(matcher.match(keep_all=keep_all), partials[-1])
+    assert partials[0].endswith('merged.shard0.csv')
+
+    merge_partials(partials, matched_results)
+    assert open(matched_results).read() == single.read_text()
+
+def test_shard_keeps_df1_whole_for_cross_block_stages(data):
+    df1, df2 = data
+    matcher = FuzzyMatcher(df1, df2, name_fallback=True, **KWARGS)
+    matcher.shard(3, 1)
+    assert len(matcher.df1) == 20
+    assert (shard_of(matcher.df2['POSTAL_CODE'], 3) == 1).all()
+    assert np.isin(matcher.df2['__row_position'], np.arange(25)).all()
+    with pytest.raises(ValueError):
+        matcher.shard(3, 3)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from spatial_index import GeohashIndex, GridIndex, geohash, geohash_cells, haversine_m
+from fuzzy_matching_module import FuzzyMatcher
+
+def test_haversine_m():
+    # One degree of latitude is ~111.2 km
+    assert abs(haversine_m(0, 0, 1, 0) - 111195) < 1
+    assert haversine_m(34.05, -118.25, 34.05, -118.25) == 0
+
+def test_grid_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    lat1, long1 = rng.uniform(34, 34.02, 300), rng.uniform(-118.02, -118, 300)
+    lat2, long2 = rng.uniform(34, 34.02, 50), rng.uniform(-118.02, -118, 50)
+    lat1[3] = np.nan
+    index = GridIndex(lat1, long1, radius_m=150)
+    queries, points, distances = index.query_radius(lat2, long2)
+
+    all_distances = haversine_m(lat2[:, None], long2[:, None], lat1[None, :], long1[None, :])
+    expected_queries, expected_points = np.nonzero(all_distances <= 150)
+    assert len(queries) > 0
+    assert list(zip(queries, points)) == list(zip(expected_queries, expected_points))
+    assert np.allclose(distances, all_distances[expected_queries, expected_points])
+
+def test_geohash_known_values():
+    hashes = geohash([57.64911, 42.6, np.nan, 91.0], [10.40744, -5.6, 0.0, 0.0], 11)
+    assert hashes[0] == 'u4pruydqqvj'
+    assert hashes[1][:5] == 'ezs42'
+    assert hashes[2] is None and hashes[3] is None
+
+def test_geohash_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    lat1, long1 = rng.uniform(34, 34.1, 300), np.r_[rng.uniform(-118.1, -118, 297), [179.999, -179.999, np.nan]]
+    lat2, long2 = rng.uniform(34, 34.1, 50), np.r_[rng.uniform(-118.1, -118, 49), [179.999]]
+    lat1[297] = lat1[298] = lat2[49]
+    queries, points = GeohashIndex(lat1, long1, 5).query_neighbours(lat2, long2)
+
+    lat_cells1, long_cells1, valid1 = geohash_cells(lat1, long1, 5)
+    lat_cells2, long_cells2, _ = geohash_cells(lat2, long2, 5)
+    long_diff = np.abs(long_cells2[:, None] - long_cells1[None, :])
+    # Longitude cells wrap around the antimeridian (13 longitude bits at precision 5)
+    near = (np.abs(lat_cells2[:, None] - lat_cells1[None, :]) <= 1) & (np.minimum(long_diff, 2 ** 13 - long_diff) <= 1)
+    expected_queries, expected_points = np.nonzero(near & valid1[None, :])
+    assert len(queries) > 0
+    assert list(zip(queries, points)) == list(zip(expected_queries, expected_points))
+    assert 298 in points[queries == 49]
+
+def test_geohash_blocking_recovers_rows_without_postal_code():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2],
+        'POSTAL_CODE': ['12345', '54321'],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Beta Bistro'],
+        'LATITUDE_COORDINATE': [34.0, 40.0],
+        'LONGITUDE_COORDINATE': [-118.25, -100.0],
+    })
+    # Missing, unknown and missing postal codes; the last row has no coordinates either
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': [None, '00000', None],
+        'CUSTOMER_DESC': ['alpha cafe', 'beta bistro', 'beta bistro'],
+        'LATITUDE': [34.0005, 40.001, None],
+        'LONGITUDE': [-118.2505, -100.0, None],
+    })
+    kwargs = dict(
+        zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE',
+        name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+        lat_col1='LATITUDE_COORDINATE', long_col1='LONGITUDE_COORDINATE',
+        lat_col2='LATITUDE', long_col2='LONGITUDE',
+        lat_long_tolerance=4
+    )
+    assert FuzzyMatcher(df1.copy(), df2.copy(), **kwargs).match().empty
+    matcher = FuzzyMatcher(df1.copy(), df2.copy(), geohash_precision=6, **kwargs)
+    result = matcher.match(keep_all=True)
+    assert result['customer_id'].tolist() == [1, 2, pd.NA]
+    assert result['match_type'].tolist()[:2] == ['geohash', 'geohash']
+    assert matcher.stats['geohash_recovered'] == 2
+
+def test_radius_match_across_rounding_boundary():
+    # The two points are ~2 m apart but round to different values at 3 decimal places
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2],
+        'POSTAL_CODE': ['12345', '12345'],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Alpha Cafe'],
+        'LATITUDE_COORDINATE': [34.00049, 34.10000],
+        'LONGITUDE_COORDINATE': [-118.25, -118.25],
+    })
+    df2 = pd.DataFrame({
+        'POSTAL_CODE': ['12345'],
+        'CUSTOMER_DESC': ['alpha cafe'],
+        'LATITUDE': [34.00051],
+        'LONGITUDE': [-118.25],
+    })
+    kwargs = dict(
+        zip_col1='POSTAL_CODE', zip_col2='POSTAL_CODE',
+        name_col1='CUSTOMER_DESC', name_col2='CUSTOMER_DESC',
+        lat_col1='LATITUDE_COORDINATE', long_col1='LONGITUDE_COORDINATE',
+        lat_col2='LATITUDE', long_col2='LONGITUDE',
+        lat_long_tolerance=3
+    )
+    assert FuzzyMatcher(df1.copy(), df2.copy(), **kwargs).match().empty
+    result = FuzzyMatcher(df1.copy(), df2.copy(), radius_m=50, **kwargs).match()
+    assert result['customer_id'].tolist() == [1]
+    assert result['match_type'].tolist() == ['lat-long']
+
+def test_pairwise_fuzzy_match_tie_break():
+    df1 = pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3],
+        'CUSTOMER_DESC': ['beta', 'alpha', 'alpha'],
+        'PRIORITY': [9, 0, 5],
+    })
+    df2 = pd.DataFrame({'CUSTOMER_DESC': ['alpha', 'gamma']}, index=[10, 20])
+    pairs = (np.array([0, 0, 0, 1]), np.array([0, 1, 2, 0]))
+    first = FuzzyMatcher.pairwise_fuzzy_match(df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', pairs, threshold=90)
+    assert first['df2_index'].tolist() == [10, 20]
+    assert first['customer_id'].tolist()[0] == 2
+    assert not first['is_matched'].iloc[1]
+    priority = FuzzyMatcher.pairwise_fuzzy_match(
+        df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', pairs, threshold=90, tie_break='priority', priority_col='PRIORITY'
+    )
+    assert priority['customer_id'].iloc[0] == 3
+    all_ids = FuzzyMatcher.pairwise_fuzzy_match(
+        df1, df2, 'CUSTOMER_DESC', 'CUSTOMER_DESC', pairs, threshold=90, tie_break='all'
+    )
+    assert all_ids['customer_id'].iloc[0] == [2, 3]
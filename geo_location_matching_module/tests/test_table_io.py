@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+from table_io import TableWriter, detect_format, iter_table, read_table, table_columns, write_table
+from fuzzy_matching_module import FuzzyMatcher
+
+pytest.importorskip('pyarrow')
+
+@pytest.fixture
+def customers():
+    return pd.DataFrame({
+        'CUSTOMER_ID': [1, 2, 3],
+        'POSTAL_CODE': ['02134', '54321', None],
+        'CUSTOMER_DESC': ['Alpha Cafe', 'Beta Bistro', 'Gamma Grill'],
+        'STREET_ADDRESS': ['1 Main St', '2 Oak Ave', '3 Pine Rd'],
+        'REGION': ['MA', 'NV', 'CA'],
+    })
+
+def test_detect_format():
+    assert detect_format('data/customers.parquet') == 'parquet'
+    assert detect_format('data/customers.FEATHER') == 'arrow'
+    assert detect_format('data/customers.csv') == 'csv'
+    assert detect_format('data/customers', 'parquet') == 'parquet'
+    with pytest.raises(ValueError):
+        detect_format('data/customers.csv', 'xlsx')
+
+@pytest.mark.parametrize('suffix', ['csv', 'parquet', 'arrow'])
+def test_round_trip_with_projection(tmp_path, customers, suffix):
+    path = tmp_path / f'customers.{suffix}'
+    write_table(customers, path)
+    assert table_columns(path) == list(customers.columns)
+
+    loaded = read_table(path, columns=['CUSTOMER_ID', 'CUSTOMER_DESC'])
+    assert list(loaded.columns) == ['CUSTOMER_ID', 'CUSTOMER_DESC']
+    assert loaded['CUSTOMER_ID'].tolist() == [1, 2, 3]
+    assert loaded['CUSTOMER_DESC'].tolist() == ['Alpha Cafe', 'Beta Bistro', 'Gamma Grill']
+    if suffix != 'csv':
+        # Columnar formats keep zip codes as text and strings Arrow-backed
+        zips = read_table(path)['POSTAL_CODE']
+        assert isinstance(zips.dtype, pd.ArrowDtype)
+        assert zips.iloc[0] == '02134' and pd.isna(zips.iloc[2])
+
+@pytest.mark.parametrize('suffix', ['csv', 'parquet', 'arrow'])
+def test_iter_table_keeps_running_index(tmp_path, customers, suffix):
+    path = tmp_path / f'customers.{suffix}'
+    write_table(customers, path)
+    chunks = list(iter_table(path, chunksize=2))
+    assert [list(chunk.index) for chunk in chunks] == [[0, 1], [2]]
+
+@pytest.mark.parametrize('suffix', ['parquet', 'arrow'])
+def test_table_writer_waits_for_rows_to_fix_schema(tmp_path, customers, suffix):
+    path = tmp_path / f'matched.{suffix}'
+    empty = customers.iloc[:0].assign(customer_id=None)
+    with TableWriter(path) as writer:
+        writer.write(empty)
+        writer.write(customers.assign(customer_id=[None, 'A1', 'B2']))
+    loaded = read_table(path)
+    assert writer.rows == 3
+    assert loaded['customer_id'].tolist()[1:] == ['A1', 'B2']
+
+def test_table_writer_empty_output_keeps_columns(tmp_path, customers):
+    path = tmp_path / 'matched.parquet'
+    with TableWriter(path) as writer:
+        writer.write(customers.iloc[:0])
+    assert table_columns(path) == list(customers.columns)
+
+def test_match_from_parquet_keeps_zip_codes(tmp_path, customers):
+    unmatched = pd.DataFrame({
+        'ZIP': ['02134', '54321'],
+        'NAME': ['alpha cafe', 'beta bistro'],
+        'ADDRESS': ['1 main st', '2 oak ave'],
+    })
+    write_table(customers, tmp_path / 'customers.parquet')
+    write_table(unmatched, tmp_path / 'unmatched.parquet')
+
+    # Through CSV the customer zip column (with a gap) would come back as floats like 2134.0
+    matcher = FuzzyMatcher(
+        read_table(tmp_path / 'customers.parquet'), read_table(tmp_path / 'unmatched.parquet'),
+        zip_col1='POSTAL_CODE', zip_col2='ZIP', name_col1='CUSTOMER_DESC', name_col2='NAME',
+        address_col1='STREET_ADDRESS', address_col2='ADDRESS'
+    )
+    result = matcher.match()
+    assert result['customer_id'].tolist() == [1, 2]
+    assert result['ZIP'].tolist() == ['02134', '54321']
@@ -0,0 +1,9 @@
+from union_find import UnionFind
+
+def test_union_find_roots_are_smallest_members():
+    clusters = UnionFind(6)
+    clusters.union(4, 2)
+    clusters.union_many([5, 2], [4, 0])
+    assert clusters.roots().tolist() == [0, 1, 0, 3, 0, 0]
+    assert clusters.find(5) == 0
+    assert len(clusters) == 6